@@ -0,0 +1,385 @@
+"""
+Fake Telegram Client
+--------------------
+An in-process stand-in for telethon's TelegramClient, good enough to drive
+scraper.py without a network connection or an account.
+
+- Channels and their comments are built from the synthetic corpus generator.
+- Every API request (one page of iter_messages) can cost a configurable latency.
+- Flood waits can be injected every N requests. Waits up to flood_sleep_threshold
+  are slept through, like telethon does; longer ones raise FloodWaitError.
+- rate_limit=(requests, seconds) emulates Telegram's per-account limits: every client (one per account)
+  gets flood waits once it goes over the limit, so multi-session scheduling can be exercised.
+- FakeApiStats counts requests and flood-wait seconds so benchmarks can report them.
+- FakeEventStream publishes new and edited posts to the event handlers of the connected clients, and can
+  drop every connection so live.LiveIngester's reconnect and backfill path can be exercised.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from telethon import events
+from telethon.errors import FloodWaitError
+
+from synthetic_corpus import synthetic_rows, synthetic_reactions
+
+PAGE_SIZE = 100  # Telethon fetches iter_messages in pages of up to 100 messages per request
+
+
+class FakeApiStats:
+
+    # Counters shared by every FakeTelegramClient built from the same channels.
+
+    def __init__(self):
+        self.api_calls = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+
+
+class FakeReaction:
+
+    def __init__(self, emoticon):
+        self.emoticon = emoticon
+
+
+class FakeCustomReaction:
+
+    # Custom emoji reactions carry a document_id and no emoticon, like telethon's ReactionCustomEmoji.
+
+    def __init__(self, document_id):
+        self.document_id = document_id
+
+
+class FakeReactionCount:
+
+    def __init__(self, emoticon, count):
+        self.reaction = FakeCustomReaction(emoticon) if isinstance(emoticon, int) else FakeReaction(emoticon)
+        self.count = count
+
+
+class FakeReactions:
+
+    def __init__(self, results):
+        self.results = results
+
+
+class FakeMedia:
+
+    # Stands in for a telethon Photo or Document: only the id is read.
+
+    def __init__(self, media_id):
+        self.id = media_id
+
+
+class FakeFile:
+
+    # Mirrors telethon's message.file helper.
+
+    def __init__(self, size, mime_type, ext):
+        self.size = size
+        self.mime_type = mime_type
+        self.ext = ext
+
+
+class FakeMessage:
+
+    # Mirrors the attributes of telethon's Message that scraper.py reads.
+    # media_id/media_kind describe the attached file ('photo' or 'video'); the same media_id in two
+    # channels behaves like a forwarded file.
+
+    def __init__(self, message_id, date, text, sender_id, views, forwards, media, reactions, post_author=None,
+                 media_id=None, media_kind='photo', media_size=0):
+        self.id = message_id
+        self.date = date
+        self.text = text
+        self.sender_id = sender_id
+        self.views = views
+        self.forwards = forwards
+        self.media = media
+        self.photo = FakeMedia(media_id) if media and media_kind == 'photo' else None
+        self.document = FakeMedia(media_id) if media and media_kind != 'photo' else None
+        self.video = self.document if media_kind == 'video' else None
+        if media:
+            self.file = FakeFile(media_size, 'image/jpeg' if media_kind == 'photo' else 'video/mp4',
+                                 '.jpg' if media_kind == 'photo' else '.mp4')
+        else:
+            self.file = None
+        self.reactions = FakeReactions([FakeReactionCount(emoji, count) for emoji, count in reactions]) if reactions else None
+        self.post_author = post_author
+        self.edit_date = None
+        self.forward = None
+
+
+def _parse_date(date_time):
+    return datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+
+def build_fake_channels(num_messages, num_groups=10, comments_per_post=2.0, seed=42):
+
+    # Builds fake channel histories from the synthetic corpus generator.
+
+    # Parameters:
+    # num_messages (int): Total number of posts across all channels.
+    # num_groups (int): Number of channels.
+    # comments_per_post (float): Average number of comments per post.
+    # seed (int): Seed for the random generator.
+
+    # Returns:
+    # dict: {channel: {'messages': [FakeMessage, ...] newest first, 'comments': {message_id: [FakeMessage, ...]}}}
+
+    rng = random.Random(seed + 1)
+    channels = {}
+    # A small pool of media ids, so the same file shows up in several posts and channels like forwards do
+    media_pool = max(1, num_messages // 3)
+    for row in synthetic_rows(num_messages, num_groups, comments_per_post, seed=seed):
+        channel = channels.setdefault(row['Group'], {'messages': [], 'comments': {}})
+        media_id = rng.randrange(media_pool)
+        message = FakeMessage(
+            message_id=row['Message ID'],
+            date=_parse_date(row['Date']),
+            text=row['Content'],
+            sender_id=row['Author ID'],
+            views=row['Views'],
+            forwards=row['Shares'],
+            media=object() if row['Media'] == 'True' else None,
+            reactions=synthetic_reactions(rng),
+            media_id=media_id,
+            media_kind='video' if media_id % 10 == 0 else 'photo',
+            media_size=1024 * (1 + media_id % 256),
+        )
+        channel['messages'].append(message)
+        channel['comments'][message.id] = [
+            FakeMessage(
+                message_id=comment['Comment Message ID'],
+                date=_parse_date(comment['Comment Date']),
+                text=comment['Comment Content'],
+                sender_id=comment['Comment Author ID'],
+                views=None,
+                forwards=None,
+                media=object() if comment['Comment Media'] == 'True' else None,
+                reactions=synthetic_reactions(rng)[:2],
+            )
+            for comment in json.loads(row['Comments List'])
+        ]
+
+    for channel in channels.values():
+        channel['messages'].reverse()  # iter_messages walks history from the newest message back
+    return channels
+
+
+class FakeEvent:
+
+    # The parts of telethon's NewMessage.Event / MessageEdited.Event that live.py reads.
+
+    def __init__(self, message, chat_id):
+        self.message = message
+        self.chat_id = chat_id
+
+
+def fake_peer_id(channels, channel):
+    # Marked channel IDs look like -100<id>, stable for a given channels dict
+    return -1000000000000 - sorted(channels).index(channel)
+
+
+class FakeEventStream:
+
+    # Update events for the FakeTelegramClients sharing the same channels.
+    #
+    # Parameters:
+    # channels (dict): Output of build_fake_channels(), new posts are added to it so backfills find them.
+    #
+    # Usage:
+    # stream = FakeEventStream(channels)
+    # client_factory = functools.partial(FakeTelegramClient, channels=channels, events=stream)
+    # await stream.publish('@channel', 'text')  # delivered to the handlers of connected clients
+    # stream.drop_connections()                 # run_until_disconnected() returns, posts are only stored
+
+    def __init__(self, channels):
+        self.channels = channels
+        self.clients = set()
+        self.next_id = {name: max((message.id for message in channel['messages']), default=0) + 1
+                        for name, channel in channels.items()}
+        self.published = 0
+        self.delivered = 0
+
+    async def publish(self, channel, text, date=None):
+        message = FakeMessage(self.next_id[channel], date or datetime.now(timezone.utc), text, sender_id=None,
+                              views=0, forwards=0, media=None, reactions=[])
+        self.next_id[channel] += 1
+        self.channels[channel]['messages'].insert(0, message)  # Newest first, like the history
+        self.channels[channel]['comments'][message.id] = []
+        self.published += 1
+        await self._dispatch(channel, message, edited=False)
+        return message
+
+    async def edit(self, channel, message_id, text):
+        message = next(message for message in self.channels[channel]['messages'] if message.id == message_id)
+        message.text = text
+        message.edit_date = datetime.now(timezone.utc)
+        await self._dispatch(channel, message, edited=True)
+        return message
+
+    async def _dispatch(self, channel, message, edited):
+        event = FakeEvent(message, fake_peer_id(self.channels, channel))
+        for client in list(self.clients):
+            for callback, builder in client.handlers:
+                # MessageEdited is a subclass of NewMessage
+                if isinstance(builder, events.MessageEdited) != edited or channel not in (builder.chats or ()):
+                    continue
+                self.delivered += 1
+                await callback(event)
+
+    def drop_connections(self):
+        for client in list(self.clients):
+            client.disconnect()
+
+
+class FakeTelegramClient:
+
+    # Drop-in replacement for telethon.sync.TelegramClient as used by scraper.py.
+    #
+    # Parameters:
+    # session (str): Session name, accepted for signature compatibility only.
+    # api_id, api_hash: Accepted for signature compatibility only.
+    # channels (dict): Output of build_fake_channels().
+    # latency (float): Seconds each API request takes.
+    # flood_every (int): Inject a flood wait every N requests (0 disables it).
+    # flood_wait (float): Seconds requested by each injected flood wait.
+    # flood_sleep_threshold (float): Flood waits up to this many seconds are slept through, longer ones raise.
+    # stats (FakeApiStats): Shared counters, a new one is created if omitted.
+    # download_latency (float): Seconds each download_media() call takes, defaults to latency.
+    # rate_limit (tuple): (requests, seconds) allowed per client before flood waits, None for no limit.
+    # base_logger (logging.Logger): Like telethon, flood waits are logged to base_logger's 'client.users' child.
+    # events (FakeEventStream): Source of the update events delivered while the client is connected.
+    #
+    # Usage:
+    # functools.partial(FakeTelegramClient, channels=build_fake_channels(1000), latency=0.05)
+    # can replace scrape.TelegramClient.
+
+    def __init__(self, session, api_id=None, api_hash=None, channels=None, latency=0.0, flood_every=0,
+                 flood_wait=0.0, flood_sleep_threshold=60, stats=None, download_latency=None, rate_limit=None,
+                 base_logger=None, events=None):
+        self.session = session
+        self.channels = channels or {}
+        self.latency = latency
+        self.download_latency = latency if download_latency is None else download_latency
+        self.flood_every = flood_every
+        self.flood_wait = flood_wait
+        self.flood_sleep_threshold = flood_sleep_threshold
+        self.stats = stats if stats is not None else FakeApiStats()
+        self.rate_limit = rate_limit
+        self.recent_requests = deque()
+        self.blocked_until = 0.0
+        self.log = (base_logger or logging.getLogger('telethon')).getChild('client.users')
+        self.events = events
+        self.handlers = []
+        self.disconnected = None
+
+    async def __aenter__(self):
+        await self._call()
+        self.disconnected = asyncio.Event()
+        if self.events is not None:
+            self.events.clients.add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.disconnect()
+        return False
+
+    def disconnect(self):
+        if self.events is not None:
+            self.events.clients.discard(self)
+        if self.disconnected is not None:
+            self.disconnected.set()
+
+    async def run_until_disconnected(self):
+        await self.disconnected.wait()
+
+    def add_event_handler(self, callback, event):
+        self.handlers.append((callback, event))
+
+    async def get_peer_id(self, entity):
+        await self._call()
+        if entity not in self.channels:
+            raise ValueError(f'Cannot find any entity corresponding to "{entity}"')
+        return fake_peer_id(self.channels, entity)
+
+    async def _call(self, request=None):
+        # Same name as telethon's request method, so ScrapeMetrics.instrument() counts fake requests too
+        self.stats.api_calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_every and self.stats.api_calls % self.flood_every == 0:
+            await self._flood_wait(self.flood_wait)
+        if self.rate_limit:
+            await self._check_rate_limit()
+
+    async def _check_rate_limit(self):
+        requests, window = self.rate_limit
+        now = time.monotonic()
+        if self.blocked_until > now:
+            await self._flood_wait(self.blocked_until - now)
+            now = time.monotonic()
+        while self.recent_requests and now - self.recent_requests[0] >= window:
+            self.recent_requests.popleft()
+        if len(self.recent_requests) >= requests:
+            wait = window - (now - self.recent_requests[0])
+            self.blocked_until = now + wait
+            await self._flood_wait(wait)
+            self.recent_requests.clear()
+        self.recent_requests.append(time.monotonic())
+
+    async def _flood_wait(self, seconds):
+        self.stats.flood_waits += 1
+        if seconds > self.flood_sleep_threshold:
+            raise FloodWaitError(request=None, capture=math.ceil(seconds))
+        self.stats.flood_wait_seconds += seconds
+        # Same record telethon logs before sleeping through a flood wait
+        self.log.info('Sleeping%s for %ds (%s) on %s flood wait', '', seconds, timedelta(seconds=seconds), 'FakeRequest')
+        await asyncio.sleep(seconds)
+
+    async def iter_messages(self, entity, search=None, reply_to=None, limit=None, offset_id=0, min_id=0,
+                            reverse=False):
+        if entity not in self.channels:
+            raise ValueError(f'Cannot find any entity corresponding to "{entity}"')
+        channel = self.channels[entity]
+
+        if reply_to is not None:
+            messages = channel['comments'].get(reply_to, [])
+        else:
+            messages = channel['messages']
+        if offset_id:
+            messages = [message for message in messages if message.id < offset_id]
+        if min_id:
+            messages = [message for message in messages if message.id > min_id]
+        if search:
+            messages = [message for message in messages if search.lower() in message.text.lower()]
+        if reverse:
+            messages = messages[::-1]
+        if limit is not None:
+            messages = messages[:limit]
+
+        await self._call()
+        for index, message in enumerate(messages):
+            if index and index % PAGE_SIZE == 0:
+                await self._call()
+            yield message
+
+    async def download_media(self, message, file=None):
+        # Writes message.file.size deterministic bytes derived from the media id, so identical media hash the same
+        await self._call()
+        if self.download_latency:
+            await asyncio.sleep(self.download_latency)
+        media = message.photo or message.document
+        if media is None or file is None:
+            return None
+        pattern = f'{media.id}:'.encode()
+        with open(file, 'wb') as f:
+            f.write((pattern * (message.file.size // len(pattern) + 1))[:message.file.size])
+        return file
@@ -0,0 +1,474 @@
+"""
+Benchmark Suite for the TelegramScrap Scripts
+---------------------------------------------
+Times every entry point of the repository on a synthetic corpus and reports
+rows/s and peak RSS, so throughput regressions show up before a real run.
+
+- Generates a synthetic corpus (see synthetic_corpus.py) split into FINAL_*.parquet files.
+- Runs telegramscrap.scraper against the in-process FakeTelegramClient (see fake_telegram.py).
+- Runs combine, keyword filter, month summary, hyperlink analysis, sampling, snowballing and trends
+  on the generated files.
+- Streams --scrape-rows posts through telegramscrap.live with a dropped connection half way, and reports
+  how many reached the partitions and how long that took.
+- Each stage runs in its own process, so the peak RSS belongs to that stage alone.
+- Results are printed as a table and can be appended to a JSON-lines file and compared
+  against a previous run with --compare.
+
+Example:
+python benchmarks/run_benchmarks.py --rows 50000 --scrape-rows 2000 --latency 0.01 --output bench.jsonl
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import glob
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+for path in (BENCHMARKS_DIR, REPO_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ['scrape', 'combine', 'keyword_filter', 'month_summary', 'hyperlinks', 'sampling', 'snowballing', 'channel_graph', 'authors', 'trends', 'live']
+UNIFIED_FILENAME = 'unified_data_telegram.parquet'
+
+
+def peak_rss_mb():
+
+    # Returns the peak resident set size of the current process in MB, or None if it cannot be measured.
+
+    # ru_maxrss survives fork+exec, so a stage would report the peak of the parent that generated the corpus;
+    # VmHWM belongs to the current address space only
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    except (ImportError, AttributeError):
+        return None
+
+
+def count_parquet_rows(paths):
+    import pyarrow.parquet as pq
+    return sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+
+
+# --- Stages: each one receives the benchmark work directory and the parsed arguments and returns the rows it processed ---
+
+def stage_scrape(workdir, args):
+    from telegramscrap import scraper
+    from fake_telegram import FakeTelegramClient, build_fake_channels
+
+    channels = build_fake_channels(args.scrape_rows, args.groups, args.comments_per_post, seed=args.seed)
+    rate_limit = tuple(args.rate_limit) if args.rate_limit else None
+    client_factory = functools.partial(
+        FakeTelegramClient, channels=channels, latency=args.latency, flood_every=args.flood_every,
+        flood_wait=args.flood_wait, download_latency=args.download_latency, rate_limit=rate_limit,
+    )
+
+    date_min = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    date_max = datetime(2100, 1, 1, tzinfo=timezone.utc)
+    media_options = {'download_media': args.download_media, 'media_folder': os.path.join(workdir, 'media')}
+    if args.sessions > 1:
+        sessions = [f'bench_session_{i}' for i in range(args.sessions)]
+        metrics = asyncio.run(scraper.scrape_with_sessions('parquet', list(channels), date_min, date_max, '', sessions,
+                                                          client_factory=client_factory, **media_options))
+    else:
+        # scrape() pads every channel to one minute to be gentle with the API, which only inflates benchmark timings
+        metrics = asyncio.run(scraper.scrape('parquet', list(channels), date_min, date_max, '', client_factory=client_factory,
+                                            min_channel_seconds=0, **media_options))
+
+    total = metrics.snapshot()['total']
+    extra = {key: total[key] for key in ('comments', 'api_calls', 'flood_waits', 'flood_wait_seconds', 'bytes_written')}
+    return count_parquet_rows(glob.glob(os.path.join(workdir, 'FINAL_*.parquet'))), extra
+
+
+def stage_combine(workdir, args):
+    from telegramscrap.combine import combine_parquet_files
+
+    final_dir = os.path.join(workdir, 'final')
+    combine_parquet_files(final_dir, ['Group', 'Message ID'], os.path.join(workdir, 'combined.parquet'))
+    return count_parquet_rows(glob.glob(os.path.join(final_dir, '*.parquet'))), {}
+
+
+def stage_keyword_filter(workdir, args):
+    from telegramscrap.keywords import filter_and_save_by_keywords
+
+    filter_and_save_by_keywords(workdir, UNIFIED_FILENAME, 'filtered_keywords', 'Content', args.keywords, 1000000)
+    return count_parquet_rows([os.path.join(workdir, UNIFIED_FILENAME)]), {}
+
+
+def stage_month_summary(workdir, args):
+    from telegramscrap.month_summary import create_group_month_summary
+
+    create_group_month_summary(workdir, UNIFIED_FILENAME, 'resume', 'Date', 'Group', 'Comments')
+    return count_parquet_rows([os.path.join(workdir, UNIFIED_FILENAME)]), {}
+
+
+def stage_hyperlinks(workdir, args):
+    from telegramscrap.hyperlinks import analyze_hyperlinks
+
+    analyze_hyperlinks(workdir, UNIFIED_FILENAME)
+    return count_parquet_rows([os.path.join(workdir, UNIFIED_FILENAME)]), {}
+
+
+def stage_sampling(workdir, args):
+    from telegramscrap.sampling import create_sampled_file
+
+    create_sampled_file(workdir, UNIFIED_FILENAME, 'Content', 'Group', args.sample_size, 'sampled_data.xlsx', 20)
+    return count_parquet_rows([os.path.join(workdir, UNIFIED_FILENAME)]), {}
+
+
+def stage_snowballing(workdir, args):
+    from telegramscrap.snowball import process_file_for_telegram_links
+
+    process_file_for_telegram_links(workdir, UNIFIED_FILENAME, 'telegram_links.xlsx')
+    return count_parquet_rows([os.path.join(workdir, UNIFIED_FILENAME)]), {}
+
+
+def stage_channel_graph(workdir, args):
+    from telegramscrap.graph import build_channel_graph
+
+    build_channel_graph(workdir, UNIFIED_FILENAME)
+    return count_parquet_rows([os.path.join(workdir, UNIFIED_FILENAME)]), {}
+
+
+def stage_authors(workdir, args):
+    from telegramscrap.authors import create_author_report
+
+    # The synthetic corpus has no comments.parquet, so this includes building it from 'Comments List'
+    index = create_author_report(workdir, UNIFIED_FILENAME)
+    return len(index.comments), {}
+
+
+def stage_trends(workdir, args):
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    from telegramscrap.trends import create_trend_report
+
+    # The synthetic corpus stores 'Date' as text; the cache needs the timestamp column of a combined file
+    table = pq.read_table(os.path.join(workdir, UNIFIED_FILENAME), columns=['Group', 'Date', 'Content'])
+    dates = pc.strptime(table.column('Date'), format='%Y-%m-%d %H:%M:%S', unit='us', error_is_null=True)
+    table = table.set_column(1, 'Date', dates).sort_by([('Date', 'descending')])
+    pq.write_table(table, os.path.join(workdir, 'trends_corpus.parquet'))
+
+    # A full count, then a rerun on the unchanged corpus that only counts the newest day again
+    cache = os.path.join(workdir, 'trends_daily.parquet')
+    if os.path.exists(cache):
+        os.remove(cache)
+    create_trend_report(workdir, 'trends_corpus.parquet', keywords=args.keywords)
+    start = time.perf_counter()
+    create_trend_report(workdir, 'trends_corpus.parquet', keywords=args.keywords)
+    return table.num_rows, {'trends_cached_s': time.perf_counter() - start}
+
+
+def stage_live(workdir, args):
+    import numpy as np
+    import pyarrow.parquet as pq
+    from telegramscrap.live import LiveIngester
+    from fake_telegram import FakeApiStats, FakeEventStream, FakeTelegramClient, build_fake_channels
+
+    channels = build_fake_channels(args.scrape_rows, args.groups, args.comments_per_post, seed=args.seed)
+    stream = FakeEventStream(channels)
+    stats = FakeApiStats()
+    client_factory = functools.partial(FakeTelegramClient, channels=channels, events=stream, latency=args.latency,
+                                       stats=stats)
+    # The state of an earlier run would make the ingester skip the regenerated message IDs
+    live_dir = os.path.join(workdir, 'live')
+    shutil.rmtree(live_dir, ignore_errors=True)
+    ingester = LiveIngester(list(channels), live_dir, flush_interval=0.2, reconnect_delay=0.05,
+                            progress_interval=3600, client_factory=client_factory)
+    published = {}
+
+    async def traffic(stop):
+        while ingester.connections == 0:
+            await asyncio.sleep(0.01)
+        names = sorted(channels)
+        for i in range(args.scrape_rows):
+            if i == args.scrape_rows // 2:
+                # Posts published until the client reconnects only reach the partitions through the backfill
+                stream.drop_connections()
+            channel = names[i % len(names)]
+            message = await stream.publish(channel, f'live post {i}')
+            published[(channel, message.id)] = time.time()
+            if i % 100 == 0:
+                await asyncio.sleep(0.01)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and any(ingester.written.get(channel, 0) < stream.next_id[channel] - 1
+                                                  for channel in names):
+            await asyncio.sleep(0.05)
+        stop.set()
+
+    async def main():
+        stop = asyncio.Event()
+        await asyncio.gather(ingester.run(stop), traffic(stop))
+
+    asyncio.run(main())
+
+    latencies, ingested = [], set()
+    for path in ingester.partitions:
+        written_at = os.path.getmtime(path)
+        table = pq.read_table(path, columns=['Group', 'Message ID'])
+        for channel, message_id in zip(table.column('Group').to_pylist(), table.column('Message ID').to_pylist()):
+            key = (channel, message_id)
+            if key in published and key not in ingested:
+                ingested.add(key)
+                latencies.append(written_at - published[key])
+    extra = {
+        'live_published': len(published),
+        'live_missed': len(published) - len(ingested),
+        'live_latency_p50': float(np.median(latencies)) if latencies else None,
+        'live_latency_max': max(latencies) if latencies else None,
+        'live_api_calls': stats.api_calls,
+        'live_partitions': len(ingester.partitions),
+        'live_connections': ingester.connections,
+    }
+    return len(ingested), extra
+
+
+STAGE_FUNCTIONS = {
+    'scrape': stage_scrape,
+    'combine': stage_combine,
+    'keyword_filter': stage_keyword_filter,
+    'month_summary': stage_month_summary,
+    'hyperlinks': stage_hyperlinks,
+    'sampling': stage_sampling,
+    'snowballing': stage_snowballing,
+    'channel_graph': stage_channel_graph,
+    'authors': stage_authors,
+    'trends': stage_trends,
+    'live': stage_live,
+}
+
+# Files each stage writes to its folder; the analysis functions print their errors instead of raising, so a stage
+# only counts as done when these exist (the same check as Pipeline._finish)
+STAGE_OUTPUTS = {
+    'scrape': ['FINAL_*.parquet'],
+    'combine': ['combined.parquet'],
+    'keyword_filter': ['filtered_keywords_*.xlsx', 'filtered_keywords_matrix.npz', 'filtered_keywords_cooccurrence.csv'],
+    'month_summary': ['resume_contents.xlsx', 'resume_comments.xlsx', 'resume_total.xlsx'],
+    'hyperlinks': ['url_counts.csv', 'domain_counts.csv', 'messages_with_urls.csv'],
+    'sampling': ['sampled_data.xlsx'],
+    'snowballing': ['telegram_links.xlsx'],
+    'channel_graph': ['channel_edges.csv', 'channel_ranking.csv', 'next_channels.txt'],
+    'authors': ['authors_most_active.csv', 'authors_cross_group.csv', 'authors_group_overlap.csv'],
+    'trends': ['trends_day.csv', 'trends_week.csv', 'trends_month.csv', 'trends_daily.parquet'],
+    'live': [os.path.join('live', 'LIVE_*.parquet')],
+}
+
+
+def _run_stage_in_child(stage, workdir, args, queue):
+    result = {'stage': stage, 'rows': 0, 'seconds': None, 'rows_per_s': None, 'peak_rss_mb': None, 'error': None}
+    stage_dir = os.path.join(workdir, stage)
+    os.makedirs(stage_dir, exist_ok=True)
+    # Every stage writes its outputs next to its input, so each one gets its own folder linking to the shared corpus
+    for name in ('final', UNIFIED_FILENAME):
+        source, target = os.path.join(workdir, name), os.path.join(stage_dir, name)
+        if os.path.exists(source) and not os.path.exists(target):
+            try:
+                os.symlink(source, target)
+            except OSError:  # Windows without symlink privileges
+                shutil.copytree(source, target) if os.path.isdir(source) else shutil.copyfile(source, target)
+    os.chdir(stage_dir)
+    from telegramscrap.pipeline import missing_outputs
+
+    # Outputs of an earlier run in the same --workdir would hide a failure
+    outputs = [os.path.join(stage_dir, pattern) for pattern in STAGE_OUTPUTS[stage]]
+    for path in (path for pattern in outputs for path in glob.glob(pattern)):
+        os.remove(path)
+
+    output = sys.stdout if args.verbose else open(os.devnull, 'w')
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            rows, extra = STAGE_FUNCTIONS[stage](stage_dir, args)
+        result.update(extra)
+        result['rows'] = rows
+        missing = missing_outputs(outputs)
+        if missing:
+            result['error'] = f'missing outputs {", ".join(os.path.relpath(path, stage_dir) for path in missing)}'
+    except BaseException as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['seconds'] = time.perf_counter() - start
+    if result['rows'] and result['seconds'] and not result['error']:
+        result['rows_per_s'] = result['rows'] / result['seconds']
+    result['peak_rss_mb'] = peak_rss_mb()
+    queue.put(result)
+
+
+def run_stage(stage, workdir, args):
+
+    # Runs one stage in a fresh process and returns its result dict.
+
+    # Parameters:
+    # stage (str): Name of the stage, one of STAGES.
+    # workdir (str): Folder holding the synthetic corpus.
+    # args (Namespace): Parsed command line arguments.
+
+    # Returns:
+    # dict: stage, rows, seconds, rows_per_s, peak_rss_mb, error and any stage specific counters.
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_stage_in_child, args=(stage, workdir, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def prepare_corpus(workdir, args):
+
+    # Writes the synthetic FINAL_*.parquet files and the unified file every analysis stage reads.
+
+    from synthetic_corpus import generate_corpus, write_final_files
+
+    df = generate_corpus(args.rows, args.groups, args.comments_per_post, seed=args.seed)
+    write_final_files(df, os.path.join(workdir, 'final'))
+
+    # Same columns and dtypes combine_parquet_files() writes, so analysis stages do not depend on the combine stage
+    unified = df.copy()
+    unified['Message ID'] = unified['Message ID'].astype(str)
+    unified['Comments'] = unified['Comments List'].map(lambda value: len(json.loads(value)))
+    unified['Media'] = unified['Media'].astype(bool)
+    unified.to_parquet(os.path.join(workdir, UNIFIED_FILENAME), index=False)
+
+
+def print_report(results, baseline=None, tolerance=0.2):
+
+    # Prints the benchmark table and flags stages that got slower than the baseline.
+
+    # Parameters:
+    # results (list): Result dicts returned by run_stage().
+    # baseline (dict): Optional {stage: result dict} from a previous run.
+    # tolerance (float): Relative rows/s drop that counts as a regression.
+
+    # Returns:
+    # int: Number of regressions found.
+
+    regressions = 0
+    print(f'{"Stage":<16}{"Rows":>10}{"Seconds":>10}{"Rows/s":>12}{"Peak RSS MB":>13}  Notes')
+    for result in results:
+        rows_per_s = f'{result["rows_per_s"]:,.0f}' if result['rows_per_s'] else '-'
+        rss = f'{result["peak_rss_mb"]:,.1f}' if result['peak_rss_mb'] else '-'
+        notes = []
+        if result['error']:
+            notes.append(result['error'])
+        if 'api_calls' in result:
+            notes.append(f'{result["comments"]} comments, {result["api_calls"]} API calls, '
+                         f'{result["flood_waits"]} flood waits ({result["flood_wait_seconds"]:.1f}s), '
+                         f'{result["bytes_written"] / 1024 ** 2:.1f} MB written')
+        if result.get('live_published') is not None:
+            latency = (f'latency p50 {result["live_latency_p50"]:.2f}s, max {result["live_latency_max"]:.2f}s'
+                       if result['live_latency_p50'] is not None else 'no latency')
+            notes.append(f'{result["live_published"]} published, {result["live_missed"]} missed, {latency}, '
+                         f'{result["live_api_calls"]} API calls, {result["live_partitions"]} partitions, '
+                         f'{result["live_connections"]} connections')
+        previous = (baseline or {}).get(result['stage'])
+        if previous and previous.get('rows_per_s') and result['rows_per_s']:
+            change = result['rows_per_s'] / previous['rows_per_s'] - 1
+            notes.append(f'{change:+.1%} vs baseline')
+            if change < -tolerance:
+                notes.append('REGRESSION')
+                regressions += 1
+        print(f'{result["stage"]:<16}{result["rows"]:>10}{result["seconds"]:>10.2f}{rows_per_s:>12}{rss:>13}  {"; ".join(notes)}')
+    return regressions
+
+
+def load_baseline(path):
+    baseline = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                baseline[result['stage']] = result  # The last run of each stage wins
+    return baseline
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the TelegramScrap entry points on a synthetic corpus.')
+    parser.add_argument('--rows', type=int, default=20000, help='Posts in the synthetic corpus used by the analysis stages.')
+    parser.add_argument('--scrape-rows', type=int, default=2000, help='Posts served by the fake Telegram client.')
+    parser.add_argument('--groups', type=int, default=10, help='Number of synthetic channels.')
+    parser.add_argument('--comments-per-post', type=float, default=2.0, help='Average comments per post.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per fake API request.')
+    parser.add_argument('--flood-every', type=int, default=0, help='Inject a flood wait every N fake API requests.')
+    parser.add_argument('--flood-wait', type=float, default=0.0, help='Seconds of each injected flood wait.')
+    parser.add_argument('--download-media', action='store_true', help='Run the media stage of the scrape benchmark.')
+    parser.add_argument('--download-latency', type=float, default=None, help='Seconds per fake media download (default: --latency).')
+    parser.add_argument('--sessions', type=int, default=1, help='Fake accounts for the scrape stage (more than 1 uses the session pool).')
+    parser.add_argument('--rate-limit', type=float, nargs=2, metavar=('REQUESTS', 'SECONDS'),
+                        help='Per-account fake rate limit, e.g. 30 1 for 30 requests per second.')
+    parser.add_argument('--keywords', nargs='+', default=['Trump', 'Biden', 'Kamala'], help='Keywords for the keyword filter stage.')
+    parser.add_argument('--sample-size', type=int, default=1000, help='Sample size for the sampling stage.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stages', default=','.join(STAGES), help='Comma separated stages to run.')
+    parser.add_argument('--workdir', help='Folder for the synthetic corpus and stage outputs (default: temporary folder).')
+    parser.add_argument('--output', help='Append results to this JSON-lines file.')
+    parser.add_argument('--compare', help='JSON-lines file from a previous run to compare rows/s against.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Relative rows/s drop reported as a regression.')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the scripts being benchmarked.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f'Unknown stages: {", ".join(sorted(unknown))}')
+
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='telegramscrap_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    print(f'Generating synthetic corpus with {args.rows} posts in {workdir}...')
+    start = time.perf_counter()
+    prepare_corpus(workdir, args)
+    print(f'Corpus ready in {time.perf_counter() - start:.2f} seconds\n')
+
+    results = [run_stage(stage, workdir, args) for stage in stages]
+    for result in results:
+        result.update({'timestamp': datetime.now(timezone.utc).isoformat(), 'corpus_rows': args.rows})
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    regressions = print_report(results, baseline, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+        print(f'\nResults appended to {args.output}')
+
+    failed = [result['stage'] for result in results if result['error']]
+    if failed:
+        print(f'\nFailed stages: {", ".join(failed)}')
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
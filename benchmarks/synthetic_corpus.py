@@ -0,0 +1,221 @@
+"""
+Synthetic Corpus Generator
+--------------------------
+Builds fake Telegram corpora with the same columns scraper.py writes to the
+FINAL_*.parquet files, so the analysis scripts can be timed on any corpus size
+without touching the Telegram API or the checked-in data.
+
+- 'Content' mixes plain words, keywords, generic URLs and t.me links.
+- 'Reactions' uses the "emoji count " string format produced by scraper.py.
+- 'Comments List' is a JSON list of comment dicts, same keys as scraper.py.
+"""
+
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+WORDS = [
+    'the', 'plan', 'news', 'truth', 'people', 'today', 'watch', 'share', 'storm', 'freedom',
+    'media', 'election', 'video', 'breaking', 'report', 'world', 'patriots', 'government', 'live', 'update',
+]
+KEYWORDS = ['Trump', 'Biden', 'Kamala']
+DOMAINS = ['youtube.com', 'rumble.com', 'x.com', 'bitchute.com', 'substack.com', 'foxnews.com', 'cnn.com']
+EMOJIS = ['👍', '❤', '🔥', '🙏', '👏', '🤔', '😱', '🤬', '💯', '😁', '👀', '🤡']
+CUSTOM_EMOJI_IDS = [5368324170671202286, 5420315771991497307, 5373141891321699086]
+
+
+def synthetic_group_names(num_groups):
+
+    # Returns a list of channel handles ('@SyntheticGroup000', ...) for the generated corpus.
+
+    # Parameters:
+    # num_groups (int): Number of channel handles to create.
+
+    # Returns:
+    # list: The channel handles, each starting with '@'.
+
+    return [f'@SyntheticGroup{i:03}' for i in range(num_groups)]
+
+
+def synthetic_content(rng, group_names):
+
+    # Builds one message text with a random mix of words, keywords, URLs and t.me links.
+
+    # Parameters:
+    # rng (random.Random): Seeded random generator.
+    # group_names (list): Channel handles that t.me links may point to.
+
+    # Returns:
+    # str: The message text.
+
+    parts = rng.choices(WORDS, k=rng.randint(5, 40))
+    if rng.random() < 0.3:
+        parts.insert(rng.randrange(len(parts)), rng.choice(KEYWORDS))
+    if rng.random() < 0.4:
+        parts.append(f'https://{rng.choice(DOMAINS)}/watch/{rng.randint(1, 5000)}')
+    if rng.random() < 0.15:
+        parts.append(f'https://t.me/{rng.choice(group_names).lstrip("@")}/{rng.randint(1, 9000)}')
+    return ' '.join(parts)
+
+
+def synthetic_reactions(rng, custom_emoji_rate=0.05):
+
+    # Picks a random set of reactions for one message.
+
+    # Parameters:
+    # rng (random.Random): Seeded random generator.
+    # custom_emoji_rate (float): Probability that a reaction is a custom emoji (int id instead of an emoji).
+
+    # Returns:
+    # list: (emoji or custom emoji id, count) tuples, most reacted first.
+
+    emojis = [rng.choice(CUSTOM_EMOJI_IDS) if rng.random() < custom_emoji_rate else emoji
+              for emoji in rng.sample(EMOJIS, k=rng.randint(0, 6))]
+    counts = sorted((rng.randint(1, 400) for _ in emojis), reverse=True)
+    return list(zip(emojis, counts))
+
+
+def structured_reactions(reactions):
+
+    # Converts (emoji or custom emoji id, count) tuples into the 'Reactions List' entries scraper.py writes.
+
+    # Parameters:
+    # reactions (list): Output of synthetic_reactions().
+
+    # Returns:
+    # list: Dicts with 'Type', 'Emoji', 'Custom Emoji ID' and 'Count'.
+
+    return [{
+        'Type': 'custom_emoji' if isinstance(emoji, int) else 'emoji',
+        'Emoji': None if isinstance(emoji, int) else emoji,
+        'Custom Emoji ID': emoji if isinstance(emoji, int) else None,
+        'Count': count,
+    } for emoji, count in reactions]
+
+
+def format_reactions(reactions):
+
+    # Formats (emoji or custom emoji id, count) tuples the same way scraper.py writes the 'Reactions' column.
+
+    # Parameters:
+    # reactions (list): Output of synthetic_reactions().
+
+    # Returns:
+    # str: The reactions string, e.g. "👍 12 ❤ 5 [custom:5368324170671202286] 3 ".
+
+    return ''.join(f'[custom:{emoji}] {count} ' if isinstance(emoji, int) else f'{emoji} {count} '
+                   for emoji, count in reactions)
+
+
+def synthetic_rows(num_rows, num_groups=10, comments_per_post=2.0, date_min='2025-01-01', date_max='2025-04-30', seed=42):
+
+    # Yields synthetic post rows matching the scraper.py output schema.
+
+    # Parameters:
+    # num_rows (int): Number of posts to generate.
+    # num_groups (int): Number of channels the posts are spread across.
+    # comments_per_post (float): Average number of comments per post (Poisson-like).
+    # date_min (str): First date of the generated time window (ISO format).
+    # date_max (str): Last date of the generated time window (ISO format).
+    # seed (int): Seed for the random generator, so runs are reproducible.
+
+    # Returns:
+    # generator: One dict per post, with the same keys scraper.py stores.
+
+    rng = random.Random(seed)
+    group_names = synthetic_group_names(num_groups)
+    start = datetime.fromisoformat(date_min).replace(tzinfo=timezone.utc)
+    span = (datetime.fromisoformat(date_max).replace(tzinfo=timezone.utc) - start).total_seconds()
+    message_ids = {group: 0 for group in group_names}
+    comment_id = 0
+
+    # Dates are drawn up front and sorted, so message IDs grow with the date inside each group like on Telegram
+    offsets = sorted(rng.random() for _ in range(num_rows))
+
+    for offset in offsets:
+        group = rng.choice(group_names)
+        message_ids[group] += 1
+        message_id = message_ids[group]
+        date = start + timedelta(seconds=offset * span)
+        date_time = date.strftime('%Y-%m-%d %H:%M:%S')
+        handle = group.replace('@', '')
+
+        comments_list = []
+        num_comments = int(rng.expovariate(1 / comments_per_post)) if comments_per_post > 0 else 0
+        for _ in range(num_comments):
+            comment_id += 1
+            comment_date = date + timedelta(seconds=rng.randint(1, 86400))
+            comment_reactions = synthetic_reactions(rng)[:2]
+            comments_list.append({
+                'Type': 'comment',
+                'Comment Group': group,
+                'Comment Author ID': rng.randint(10_000, 10_000 + 50 * num_groups),
+                'Comment Content': synthetic_content(rng, group_names),
+                'Comment Date': comment_date.strftime('%Y-%m-%d %H:%M:%S'),
+                'Comment Message ID': comment_id,
+                'Comment Author': None,
+                'Comment Views': None,
+                'Comment Reactions': format_reactions(comment_reactions),
+                'Comment Reactions List': structured_reactions(comment_reactions),
+                'Comment Shares': None,
+                'Comment Media': 'True' if rng.random() < 0.1 else 'False',
+                'Comment Url': f'https://t.me/{handle}/{message_id}?comment={comment_id}',
+            })
+
+        reactions = synthetic_reactions(rng)
+        yield {
+            'Type': 'text',
+            'Group': group,
+            'Author ID': -1_000_000_000_000 - group_names.index(group),
+            'Content': synthetic_content(rng, group_names),
+            'Date': date_time,
+            'Message ID': message_id,
+            'Author': None,
+            'Views': rng.randint(10, 100_000),
+            'Reactions': format_reactions(reactions),
+            'Reactions List': structured_reactions(reactions),
+            'Shares': rng.randint(0, 500),
+            'Media': 'True' if rng.random() < 0.35 else 'False',
+            'Url': f'https://t.me/{handle}/{message_id}',
+            'Comments List': json.dumps(comments_list),
+        }
+
+
+def generate_corpus(num_rows, num_groups=10, comments_per_post=2.0, seed=42):
+
+    # Generates a synthetic corpus as a single DataFrame, sorted by 'Date' descending like scraper.py output.
+
+    # Parameters:
+    # num_rows (int): Number of posts to generate.
+    # num_groups (int): Number of channels the posts are spread across.
+    # comments_per_post (float): Average number of comments per post.
+    # seed (int): Seed for the random generator.
+
+    # Returns:
+    # DataFrame: The synthetic corpus.
+
+    df = pd.DataFrame(synthetic_rows(num_rows, num_groups, comments_per_post, seed=seed))
+    return df.sort_values(by='Date', ascending=False, ignore_index=True)
+
+
+def write_final_files(df, folder_path):
+
+    # Writes one FINAL_<group>_with_<n>.parquet file per group, mirroring the files scraper.py produces.
+
+    # Parameters:
+    # df (DataFrame): The corpus to split by 'Group'.
+    # folder_path (str): Folder where the Parquet files are written.
+
+    # Returns:
+    # list: Paths of the written files.
+
+    os.makedirs(folder_path, exist_ok=True)
+    paths = []
+    for group, group_df in df.groupby('Group', sort=True):
+        path = os.path.join(folder_path, f'FINAL_{group}_with_{len(group_df):05}.parquet')
+        group_df.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,64 @@
+"""
+TelegramScrap
+-------------
+Scrapes Telegram channels with Telethon and analyzes the resulting Parquet files.
+
+- scrape / scrape_with_sessions: scrape channels into FINAL_<channel>_with_<n> files.
+- LiveIngester: follow channels through update events into rolling LIVE_*.parquet partitions.
+- combine_parquet_files: combine the FINAL files into one deduplicated Parquet file.
+- create_group_month_summary, filter_and_save_by_keywords, create_sampled_file,
+  process_file_for_telegram_links, analyze_hyperlinks, run_topic_modelling and
+  create_engagement_report: analyses of the combined file.
+- build_channel_graph: rank the channels linked or forwarded from the corpus by PageRank, to scrape next.
+- create_author_report / AuthorIndex: comment authors indexed by group and time (comments.parquet from combine).
+- create_trend_report / plot_trends: cached daily, weekly and monthly counts per group and their charts.
+- read_corpus / memory_report: compact, Arrow-backed loading of a corpus and its memory use per column.
+- connect / query: SQL over the corpus with DuckDB (posts, comments, links and monthly views).
+- Pipeline / build_stages: run the steps above as a cached dependency graph.
+
+The submodules are only imported when one of their functions is first used, so
+`import telegramscrap` does not pull in Telethon, pandas or BERTopic by itself.
+The same functions are available from the command line: `python -m telegramscrap --help`.
+"""
+
+import importlib
+
+# Public function -> submodule that defines it
+_EXPORTS = {
+    'scrape': 'scraper',
+    'scrape_with_sessions': 'scraper',
+    'LiveIngester': 'live',
+    'combine_parquet_files': 'combine',
+    'create_group_month_summary': 'month_summary',
+    'filter_and_save_by_keywords': 'keywords',
+    'create_sampled_file': 'sampling',
+    'process_file_for_telegram_links': 'snowball',
+    'analyze_hyperlinks': 'hyperlinks',
+    'run_topic_modelling': 'topics',
+    'create_engagement_report': 'engagement',
+    'build_channel_graph': 'graph',
+    'create_author_report': 'authors',
+    'AuthorIndex': 'authors',
+    'create_trend_report': 'trends',
+    'plot_trends': 'trends',
+    'read_corpus': 'corpus',
+    'memory_report': 'corpus',
+    'connect': 'sql',
+    'query': 'sql',
+    'Pipeline': 'pipeline',
+    'build_stages': 'pipeline',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,307 @@
+"""
+Comment Author Activity
+-----------------------
+Turns the 'Comments List' JSON of every post into a flat comments table once per combine, and indexes it
+by comment author, so questions about commenters never parse JSON again.
+
+- comments.parquet: one row per comment with the group and message ID of the post it answers, sorted by
+  'Comment Author ID'. The Parquet statistics of the sorted file let read_author_comments() load the
+  comments of a few authors without reading the rest. sql.connect() uses it as the comments view.
+- The JSON is parsed by Arrow's JSON reader in one pass over all posts, not with json.loads per row.
+- AuthorIndex: the comments plus a sparse author x group matrix of comment counts, answering "most active
+  commenters", "authors who comment in N+ groups", groups sharing commenters and per-author time series
+  with vectorized groupbys and sparse products.
+- create_author_report() saves authors_most_active.csv, authors_cross_group.csv and authors_group_overlap.csv.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+from .engagement import REACTIONS_LIST_TYPE
+from .filenames import COMMENTS_FILENAME
+
+# Keys of the comment dicts written by scraper.collect_comments, as read from the JSON
+COMMENT_SCHEMA = pa.schema([
+    ('Type', pa.string()),
+    ('Comment Group', pa.string()),
+    ('Comment Author ID', pa.int64()),
+    ('Comment Content', pa.string()),
+    ('Comment Date', pa.string()),
+    ('Comment Message ID', pa.int64()),
+    ('Comment Author', pa.string()),
+    ('Comment Views', pa.int64()),
+    ('Comment Reactions', pa.string()),
+    ('Comment Reactions List', REACTIONS_LIST_TYPE),
+    ('Comment Shares', pa.int64()),
+    ('Comment Media', pa.string()),
+    ('Comment Url', pa.string()),
+])
+
+# Rows per row group of comments.parquet; smaller groups make author lookups read less
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def _parse_comment_lists(comment_lists):
+    # All comment lists as one newline-delimited JSON document {"c": [...]}, parsed by Arrow in C++.
+    # json.dumps escapes line breaks inside strings, so every post is exactly one line.
+    text = pa.large_string()
+    lines = pc.binary_join_element_wise(pa.scalar('{"c": ', text), pc.fill_null(comment_lists.cast(text), '[]'),
+                                        pa.scalar('}\n', text), pa.scalar('', text))
+    lines = lines.combine_chunks() if isinstance(lines, pa.ChunkedArray) else lines
+    offsets = np.frombuffer(lines.buffers()[1], dtype=np.int64)[lines.offset:lines.offset + len(lines) + 1]
+    document = lines.buffers()[2][offsets[0]:offsets[-1]]
+    schema = pa.schema([('c', pa.list_(pa.struct(list(COMMENT_SCHEMA))))])
+    options = pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior='ignore')
+    column = pa_json.read_json(pa.BufferReader(document), parse_options=options).column('c').combine_chunks()
+    return pc.list_parent_indices(column), pc.list_flatten(column).flatten()
+
+
+def _parse_comment_lists_slowly(comment_lists):
+    # Fallback for comment lists the JSON reader rejects, e.g. IDs stored as strings by old scraper versions
+    parents, rows = [], []
+    for i, value in enumerate(comment_lists.to_pylist()):
+        for comment in json.loads(value) if value else []:
+            parents.append(i)
+            rows.append(comment)
+    table = pa.Table.from_pylist(rows) if rows else pa.table({})
+    fields = [table.column(field.name).cast(field.type) if field.name in table.column_names
+              else pa.nulls(len(rows), field.type) for field in COMMENT_SCHEMA]
+    return pa.array(parents, type=pa.int64()), fields
+
+
+def comments_table(table):
+
+    # Flattens the 'Comments List' of a posts table into one row per comment.
+
+    # Parameters:
+    # table (pyarrow.Table): Posts with 'Group', 'Message ID' and 'Comments List' columns.
+
+    # Returns:
+    # pyarrow.Table: 'Post Group', 'Post Message ID' and the comment fields of scraper.collect_comments, with
+    #                'Comment Date' as a timestamp, 'Comment Message ID' as a string and 'Comment Media' as a boolean,
+    #                sorted by 'Comment Author ID' and 'Comment Date'.
+
+    comment_lists = table.column('Comments List')
+    try:
+        parents, fields = _parse_comment_lists(comment_lists)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        parents, fields = _parse_comment_lists_slowly(comment_lists)
+
+    columns = {
+        'Post Group': pc.take(table.column('Group'), parents),
+        'Post Message ID': pc.take(table.column('Message ID'), parents).cast(pa.large_string()),
+    }
+    for field, values in zip(COMMENT_SCHEMA, fields):
+        if field.name == 'Comment Date':
+            values = pc.cast(values, pa.timestamp('us'))
+        elif field.name == 'Comment Message ID':
+            values = values.cast(pa.large_string())
+        elif field.name == 'Comment Media':
+            values = pc.equal(pc.utf8_lower(values), 'true')
+        elif pa.types.is_string(field.type):
+            values = values.cast(pa.large_string())
+        columns[field.name] = values
+    comments = pa.table(columns)
+    return comments.sort_by([('Comment Author ID', 'ascending'), ('Comment Date', 'ascending')])
+
+
+def write_comments(table, output_path):
+
+    # Builds the comments table of a posts table and saves it as comments.parquet.
+
+    # Parameters:
+    # table (pyarrow.Table): Posts, e.g. the combined table of combine_parquet_files.
+    # output_path (str): Path of the comments Parquet file.
+
+    # Returns:
+    # int: Number of comments written.
+
+    comments = comments_table(table)
+    pq.write_table(comments, output_path, row_group_size=ROW_GROUP_SIZE)
+    return comments.num_rows
+
+
+def read_author_comments(path, author_ids, columns=None):
+
+    # Reads the comments of some authors from comments.parquet, skipping the row groups of other authors.
+
+    # Parameters:
+    # path (str): Path of comments.parquet.
+    # author_ids (list of int): 'Comment Author ID' values.
+    # columns (list of str): Columns to read (default: all).
+
+    # Returns:
+    # DataFrame: The comments of these authors.
+
+    filters = [('Comment Author ID', 'in', [int(author_id) for author_id in author_ids])]
+    return pq.read_table(path, columns=columns, filters=filters).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+class AuthorIndex:
+
+    # Comments indexed by author, with a sparse author x group matrix of comment counts.
+
+    # Attributes:
+    # comments (DataFrame): One row per comment with a known author, sorted by 'Comment Author ID'.
+    # authors (Index): Author IDs, row i of matrix is authors[i].
+    # groups (Index): Groups commented in, column j of matrix is groups[j].
+    # matrix (csr_matrix): Number of comments of every author in every group.
+
+    # Example:
+    # index = AuthorIndex.from_parquet(r'C:\Users\Public\PyCharmProjects\Data_Conspira\comments.parquet')
+    # index.most_active(20)
+    # index.cross_group_authors(min_groups=3)
+
+    COLUMNS = ['Post Group', 'Post Message ID', 'Comment Group', 'Comment Author ID', 'Comment Date',
+               'Comment Message ID']
+
+    def __init__(self, comments):
+        from scipy import sparse
+
+        comments = comments[comments['Comment Author ID'].notna()]
+        if not comments['Comment Author ID'].is_monotonic_increasing:
+            comments = comments.sort_values('Comment Author ID', kind='stable')
+        self.comments = comments.reset_index(drop=True)
+
+        author_codes, authors = pd.factorize(self.comments['Comment Author ID'], sort=True)
+        group_codes, groups = pd.factorize(self.comments['Post Group'], sort=True)
+        self.authors, self.groups = pd.Index(authors), pd.Index(groups)
+        self.matrix = sparse.csr_matrix((np.ones(len(self.comments), dtype=np.int64), (author_codes, group_codes)),
+                                        shape=(len(self.authors), len(self.groups)))
+        self.matrix.sum_duplicates()
+        # Comments of author i are rows _starts[i]:_starts[i + 1]
+        self._starts = np.searchsorted(author_codes, np.arange(len(self.authors) + 1))
+
+    @classmethod
+    def from_parquet(cls, path):
+        return cls(pq.read_table(path, columns=cls.COLUMNS).to_pandas(types_mapper=pd.ArrowDtype))
+
+    @classmethod
+    def from_posts(cls, table):
+        return cls(comments_table(table).select(cls.COLUMNS).to_pandas(types_mapper=pd.ArrowDtype))
+
+    def comments_of(self, author_id):
+        position = self.authors.get_indexer([author_id])[0]
+        if position < 0:
+            return self.comments.iloc[0:0]
+        return self.comments.iloc[self._starts[position]:self._starts[position + 1]]
+
+    def groups_of(self, author_id):
+        position = self.authors.get_indexer([author_id])[0]
+        if position < 0:
+            return pd.Series(dtype=np.int64, name='Comments')
+        row = self.matrix.getrow(position)
+        counts = pd.Series(row.data, index=self.groups[row.indices], name='Comments')
+        return counts.sort_values(ascending=False)
+
+    def activity(self):
+
+        # One row per author: 'Comments', 'Groups' (distinct groups), 'Posts' (distinct posts commented),
+        # 'First Comment', 'Last Comment' and 'Top Group', by number of comments.
+
+        by_author = self.comments.groupby('Comment Author ID', sort=True)
+        dates = by_author['Comment Date']
+        posts = self.comments.drop_duplicates(['Comment Author ID', 'Post Group', 'Post Message ID'])
+        activity = pd.DataFrame({
+            'Author ID': self.authors,
+            'Comments': self.matrix.sum(axis=1).A1,
+            'Groups': np.diff(self.matrix.indptr),
+            'Posts': posts.groupby('Comment Author ID', sort=True).size().to_numpy(),
+            'First Comment': dates.min().to_numpy(),
+            'Last Comment': dates.max().to_numpy(),
+            'Top Group': self.groups[np.asarray(self.matrix.argmax(axis=1)).ravel()],
+        })
+        return activity.sort_values(['Comments', 'Author ID'], ascending=[False, True], ignore_index=True)
+
+    def most_active(self, n=20, by='Comments'):
+        return self.activity().sort_values([by, 'Comments'], ascending=False, kind='stable').head(n)
+
+    def cross_group_authors(self, min_groups=2):
+
+        # Authors who commented in at least min_groups groups, with their comment count in each group.
+
+        matrix = self.matrix
+        selected = np.flatnonzero(np.diff(matrix.indptr) >= min_groups)
+        table = pd.DataFrame(matrix[selected].toarray(), index=self.authors[selected], columns=self.groups)
+        table.insert(0, 'Groups', np.diff(matrix.indptr)[selected])
+        table.index.name = 'Author ID'
+        return table.sort_values(['Groups'], ascending=False, kind='stable')
+
+    def group_overlap(self):
+
+        # Number of authors every pair of groups has in common (the diagonal is the number of authors per group).
+
+        binary = self.matrix.copy()
+        binary.data[:] = 1
+        shared = (binary.T @ binary).toarray()
+        return pd.DataFrame(shared, index=self.groups, columns=self.groups)
+
+    def timeline(self, author_id=None, freq='M'):
+
+        # Comments per period ('D', 'W' or 'M') and group, for one author or for everyone.
+
+        comments = self.comments if author_id is None else self.comments_of(author_id)
+        periods = comments['Comment Date'].astype('datetime64[us]').dt.to_period(freq).rename('Period')
+        counts = comments.groupby([periods, comments['Post Group']], observed=True).size()
+        return counts.unstack(fill_value=0)
+
+
+def load_author_index(folder_path, input_filename='unified_data_telegram.parquet'):
+
+    # Loads the author index from comments.parquet in folder_path, or builds it from the posts file if there is none.
+
+    comments_path = os.path.join(folder_path, COMMENTS_FILENAME)
+    if os.path.exists(comments_path):
+        return AuthorIndex.from_parquet(comments_path)
+    print(f"No {COMMENTS_FILENAME} in {folder_path}, building it from {input_filename}...")
+    table = pq.read_table(os.path.join(folder_path, input_filename), columns=['Group', 'Message ID', 'Comments List'])
+    write_comments(table, comments_path)
+    return AuthorIndex.from_parquet(comments_path)
+
+
+def create_author_report(folder_path, input_filename='unified_data_telegram.parquet', output_filename_base='authors',
+                         top_n=1000, min_groups=2):
+
+    # Saves the most active commenters, the authors commenting in several groups and the groups sharing commenters.
+
+    # Parameters:
+    # folder_path (str): Folder with comments.parquet (written by combine_parquet_files) or the unified file.
+    # input_filename (str): Unified Parquet file, only read if comments.parquet does not exist.
+    # output_filename_base (str): Base name of the CSV files.
+    # top_n (int): Number of authors in <base>_most_active.csv.
+    # min_groups (int): Minimum number of groups of the authors in <base>_cross_group.csv.
+
+    # Returns:
+    # AuthorIndex: The index, for further questions.
+
+    # Steps:
+    # 1. Load comments.parquet (or build it) and the author x group matrix.
+    # 2. Compute the activity of every author with groupbys over the comments table.
+    # 3. Select the authors with comments in min_groups or more groups from the matrix.
+    # 4. Count the authors shared by every pair of groups with one sparse product.
+
+    # Example:
+    # create_author_report(r'C:\Users\Public\PyCharmProjects\Data_Conspira', min_groups=3)
+
+    index = load_author_index(folder_path, input_filename)
+    print(f"{len(index.comments)} comments by {len(index.authors)} authors in {len(index.groups)} groups.")
+
+    activity = index.activity()
+    cross_group = index.cross_group_authors(min_groups)
+    activity.head(top_n).to_csv(os.path.join(folder_path, f'{output_filename_base}_most_active.csv'), index=False)
+    cross_group.to_csv(os.path.join(folder_path, f'{output_filename_base}_cross_group.csv'))
+    index.group_overlap().to_csv(os.path.join(folder_path, f'{output_filename_base}_group_overlap.csv'))
+
+    print("\nMost active commenters:")
+    print(activity.head(10).to_string(index=False))
+    print(f"\n{len(cross_group)} authors commented in {min_groups} or more groups.")
+    print(f"Author report saved: {output_filename_base}_most_active.csv, {output_filename_base}_cross_group.csv "
+          f"and {output_filename_base}_group_overlap.csv in {folder_path}")
+    return index
@@ -0,0 +1,376 @@
+"""
+Command Line Interface
+----------------------
+One entry point for every TelegramScrap step: `python -m telegramscrap <command> --help`.
+
+- Only argparse is imported to parse the command line; each command imports its own
+  module when it runs, so `month-summary` never loads Telethon or BERTopic.
+- Folder/file arguments follow the functions: a folder plus a file name inside it.
+
+Examples:
+python -m telegramscrap scrape --channels @ChannelA @ChannelB --date-min 2025-01-20 --date-max 2025-04-30
+python -m telegramscrap combine --folder data --output data/unified_data_telegram.parquet
+python -m telegramscrap month-summary --folder data --input unified_data_telegram.parquet
+python -m telegramscrap graph --folder data && python -m telegramscrap scrape --channels-file data/next_channels.txt ...
+"""
+
+import argparse
+import os
+import re
+import sys
+
+DEFAULT_INPUT = 'unified_data_telegram.parquet'
+
+
+def parse_date(value):
+    from datetime import datetime, timezone
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+# https://t.me/<name>, t.me/s/<name>, telegram.me/<name>/<post>; the name rules are graph.USERNAME_PATTERN
+CHANNEL_URL_PATTERN = r'(?:https?://)?(?:www\.)?(?:t|telegram)\.(?:me|dog)/(?:s/)?([A-Za-z]\w{3,31})(?:[/?#].*)?'
+
+
+def normalize_channel(channel):
+    # Turns a t.me URL into '@name'; channels end up in file names, so other URLs are refused
+    channel = channel.strip()
+    match = re.fullmatch(CHANNEL_URL_PATTERN, channel)
+    if match:
+        return '@' + match.group(1)
+    if '/' in channel:
+        sys.exit(f"Unsupported channel {channel!r}: use '@ChannelName' or 'https://t.me/ChannelName'")
+    return channel
+
+
+def split_channels(values):
+    # Accepts '@A @B' as well as the notebook's '@A, @B'
+    return [normalize_channel(channel) for value in values for channel in value.split(',') if channel.strip()]
+
+
+# --- Commands: each receives the parsed arguments ---
+
+def read_channels_file(path):
+    # One channel per line, like the next_channels.txt written by the graph command
+    with open(path, encoding='utf-8') as f:
+        return [normalize_channel(line) for line in f if line.strip() and not line.startswith('#')]
+
+
+def run_scrape(args):
+    import asyncio
+    from .scraper import scrape, scrape_with_sessions
+
+    channels = split_channels(args.channels) if args.channels else read_channels_file(args.channels_file)
+    options = {
+        'progress_interval': args.progress_interval,
+        'metrics_file': args.metrics_file,
+        'download_media': args.download_media,
+        'media_folder': args.media_folder,
+        'media_concurrency': args.media_concurrency,
+        'api_id': args.api_id,
+        'api_hash': args.api_hash,
+    }
+    if args.sessions:
+        return asyncio.run(scrape_with_sessions(args.format, channels, args.date_min, args.date_max, args.search,
+                                                args.sessions, **options))
+    return asyncio.run(scrape(args.format, channels, args.date_min, args.date_max, args.search,
+                              username=args.username, **options))
+
+
+def run_live(args):
+    import asyncio
+    from .live import LiveIngester
+
+    channels = split_channels(args.channels) if args.channels else read_channels_file(args.channels_file)
+    ingester = LiveIngester(channels, args.folder, flush_interval=args.flush_interval, max_rows=args.max_rows,
+                            backfill_interval=args.backfill_interval, progress_interval=args.progress_interval,
+                            metrics_file=args.metrics_file, username=args.username, api_id=args.api_id,
+                            api_hash=args.api_hash)
+    try:
+        asyncio.run(ingester.run())
+    except KeyboardInterrupt:
+        print(f'Stopped, {len(ingester.partitions)} partitions written to {args.folder}')
+
+
+def run_combine(args):
+    from .combine import combine_parquet_files
+    output = args.output or os.path.join(args.folder, DEFAULT_INPUT)
+    combine_parquet_files(args.folder, args.duplicate_columns, output, max_workers=args.workers,
+                          comments_file_path=args.comments_output)
+
+
+def run_month_summary(args):
+    from .month_summary import create_group_month_summary
+    create_group_month_summary(args.folder, args.input, args.output, args.date_col, args.group_col, args.comments_col)
+
+
+def run_keywords(args):
+    from .keywords import filter_and_save_by_keywords
+    filter_and_save_by_keywords(args.folder, args.input, args.output, args.content_col, args.keywords,
+                                args.max_rows_per_file)
+
+
+def run_sample(args):
+    from .sampling import create_sampled_file
+    create_sampled_file(args.folder, args.input, args.text_col, args.category_col, args.sample_size, args.output,
+                        args.min_length)
+
+
+def run_snowball(args):
+    from .snowball import process_file_for_telegram_links
+    process_file_for_telegram_links(args.folder, args.input, args.output)
+
+
+def run_hyperlinks(args):
+    from .hyperlinks import analyze_hyperlinks
+    analyze_hyperlinks(args.folder, args.input, args.output_folder, plots=args.plots)
+
+
+def run_topics(args):
+    from .topics import run_topic_modelling
+    run_topic_modelling(args.folder, args.input, args.sample_size, args.min_cluster_size, args.output_folder,
+                        visualize=args.visualize)
+
+
+def run_engagement(args):
+    from .engagement import create_engagement_report
+    create_engagement_report(args.folder, args.input, args.output, args.top_n)
+
+
+def run_graph(args):
+    from .graph import build_channel_graph
+    build_channel_graph(args.folder, args.input, args.output_folder, args.next_n, args.min_linking_channels)
+
+
+def run_authors(args):
+    from .authors import create_author_report
+    create_author_report(args.folder, args.input, args.output, args.top_n, args.min_groups)
+
+
+def run_trends(args):
+    from .trends import create_trend_report
+    create_trend_report(args.folder, args.input, args.output_folder, args.keywords, args.topics_file, args.output,
+                        rebuild=args.rebuild)
+
+
+def run_trend_charts(args):
+    from .trends import plot_trends
+    for period in args.periods:
+        plot_trends(args.folder, args.output, period, args.top_n, png=args.png)
+
+
+def run_memory_report(args):
+    from .corpus import print_memory_report
+    print_memory_report(os.path.join(args.folder, args.input), columns=args.columns, compare=not args.no_compare)
+
+
+def run_query(args):
+    from .sql import export_query, query
+
+    options = {'source': args.source, 'threads': args.threads, 'memory_limit': args.memory_limit}
+    if args.output:
+        export_query(args.sql, args.output, args.folder, **options)
+        return
+    import pandas as pd
+    with pd.option_context('display.max_rows', args.max_rows, 'display.max_columns', None, 'display.width', None):
+        print(query(args.sql, args.folder, **options))
+
+
+def run_pipeline(args):
+    from .pipeline import Pipeline, build_stages
+
+    stages = build_stages(args.folder, args.final_folder, keywords=args.keywords,
+                          channels=split_channels(args.channels) if args.channels else None,
+                          date_min=args.date_min, date_max=args.date_max, key_search=args.search, sessions=args.sessions,
+                          sample_size=args.sample_size, stages=args.stages)
+    pipeline = Pipeline(stages, args.folder, jobs=args.jobs)
+    if args.status:
+        for name, status in pipeline.status().items():
+            print(f'{name:<15} {status}')
+        return
+    results = pipeline.run(force=args.force)
+    if 'failed' in results.values():
+        sys.exit(1)
+
+
+def add_input_arguments(parser, default_input=DEFAULT_INPUT):
+    parser.add_argument('--folder', default='.', help='Folder containing the input Parquet file (default: .)')
+    parser.add_argument('--input', default=default_input, help=f'Input Parquet file name (default: {default_input})')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='telegramscrap', description='Scrape and analyze Telegram channels.')
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    p = commands.add_parser('scrape', help='Scrape channels into FINAL_<channel>_with_<n> files')
+    channels = p.add_mutually_exclusive_group(required=True)
+    channels.add_argument('--channels', nargs='+', help="Channels like '@ChannelName' or 'https://t.me/ChannelName'")
+    channels.add_argument('--channels-file', help='File with one channel per line, e.g. next_channels.txt from graph')
+    p.add_argument('--date-min', type=parse_date, required=True, help='First day to scrape (YYYY-MM-DD, UTC)')
+    p.add_argument('--date-max', type=parse_date, required=True, help='Last day to scrape (YYYY-MM-DD, UTC)')
+    p.add_argument('--search', default='', help='Only scrape messages matching this keyword')
+    p.add_argument('--format', default='parquet', choices=['parquet', 'excel'], help='Output file format')
+    p.add_argument('--username', default=os.environ.get('TELEGRAM_USERNAME', ''),
+                   help='Telegram username, also the session file name (default: $TELEGRAM_USERNAME)')
+    p.add_argument('--api-id', default=os.environ.get('TELEGRAM_API_ID', ''), help='API ID (default: $TELEGRAM_API_ID)')
+    p.add_argument('--api-hash', default=os.environ.get('TELEGRAM_API_HASH', ''),
+                   help='API hash (default: $TELEGRAM_API_HASH)')
+    p.add_argument('--sessions', nargs='+', help='Scrape on several session files at once instead of --username')
+    p.add_argument('--progress-interval', type=float, default=5, help='Seconds between progress lines')
+    p.add_argument('--metrics-file', help='Export metrics to this file (.prom for Prometheus, otherwise JSON lines)')
+    p.add_argument('--download-media', action='store_true', help='Also download photos, videos and documents')
+    p.add_argument('--media-folder', default='media', help='Where downloaded media is stored')
+    p.add_argument('--media-concurrency', type=int, default=4, help='Parallel media downloads per session')
+    p.set_defaults(handler=run_scrape)
+
+    p = commands.add_parser('live', help='Follow channels through update events into LIVE_*.parquet partitions')
+    channels = p.add_mutually_exclusive_group(required=True)
+    channels.add_argument('--channels', nargs='+', help="Channels like '@ChannelName' or 'https://t.me/ChannelName'")
+    channels.add_argument('--channels-file', help='File with one channel per line')
+    p.add_argument('--folder', default='.', help='Where partitions and .live_state.json are written (default: .)')
+    p.add_argument('--flush-interval', type=float, default=30, help='Seconds between two partitions')
+    p.add_argument('--max-rows', type=int, default=10000, help='Flush earlier once this many posts are buffered')
+    p.add_argument('--backfill-interval', type=float, default=600,
+                   help='Seconds between backfills while connected (0: only after reconnecting)')
+    p.add_argument('--username', default=os.environ.get('TELEGRAM_USERNAME', ''),
+                   help='Telegram username, also the session file name (default: $TELEGRAM_USERNAME)')
+    p.add_argument('--api-id', default=os.environ.get('TELEGRAM_API_ID', ''), help='API ID (default: $TELEGRAM_API_ID)')
+    p.add_argument('--api-hash', default=os.environ.get('TELEGRAM_API_HASH', ''),
+                   help='API hash (default: $TELEGRAM_API_HASH)')
+    p.add_argument('--progress-interval', type=float, default=60, help='Seconds between progress lines')
+    p.add_argument('--metrics-file', help='Export metrics to this file (.prom for Prometheus, otherwise JSON lines)')
+    p.set_defaults(handler=run_live)
+
+    p = commands.add_parser('combine', help='Combine the FINAL_* Parquet files into one deduplicated file')
+    p.add_argument('--folder', default='.', help='Folder containing the Parquet files to combine (default: .)')
+    p.add_argument('--output', help=f'Output Parquet file (default: <folder>/{DEFAULT_INPUT})')
+    p.add_argument('--duplicate-columns', nargs='+', default=['Group', 'Message ID'], help='Columns identifying duplicates')
+    p.add_argument('--workers', type=int, help='Files read at once (default: up to 32 threads)')
+    p.add_argument('--comments-output', help='Comments table indexed by author (default: comments.parquet next to --output)')
+    p.set_defaults(handler=run_combine)
+
+    p = commands.add_parser('month-summary', help='Contents and comments per group and month')
+    add_input_arguments(p)
+    p.add_argument('--output', default='resume', help='Base name of the output Excel files')
+    p.add_argument('--date-col', default='Date')
+    p.add_argument('--group-col', default='Group')
+    p.add_argument('--comments-col', default='Comments')
+    p.set_defaults(handler=run_month_summary)
+
+    p = commands.add_parser('keywords', help='Filter rows by keywords into Excel files')
+    add_input_arguments(p)
+    p.add_argument('--keywords', nargs='+', required=True)
+    p.add_argument('--output', default='filtered_keywords', help='Base name of the output Excel files')
+    p.add_argument('--content-col', default='Content')
+    p.add_argument('--max-rows-per-file', type=int, default=1000000)
+    p.set_defaults(handler=run_keywords)
+
+    p = commands.add_parser('sample', help='Sample rows proportionally per group into an Excel file')
+    add_input_arguments(p)
+    p.add_argument('--sample-size', type=int, default=10000)
+    p.add_argument('--output', default='sampled_data.xlsx')
+    p.add_argument('--text-col', default='Content')
+    p.add_argument('--category-col', default='Group')
+    p.add_argument('--min-length', type=int, default=20, help='Minimum text length to include')
+    p.set_defaults(handler=run_sample)
+
+    p = commands.add_parser('snowball', help='Count the t.me links found in the messages')
+    add_input_arguments(p)
+    p.add_argument('--output', default='telegram_links.xlsx')
+    p.set_defaults(handler=run_snowball)
+
+    p = commands.add_parser('hyperlinks', help='Count URLs and domains')
+    add_input_arguments(p)
+    p.add_argument('--output-folder', help='Where results are saved (default: --folder)')
+    p.add_argument('--plots', action='store_true', help='Also render the plotly charts (PNG export needs kaleido)')
+    p.set_defaults(handler=run_hyperlinks)
+
+    p = commands.add_parser('topics', help='Topic modelling with BERTopic')
+    add_input_arguments(p)
+    p.add_argument('--sample-size', type=int, default=10000)
+    p.add_argument('--min-cluster-size', type=int, default=50)
+    p.add_argument('--output-folder', help='Where results are saved (default: --folder)')
+    p.add_argument('--visualize', action='store_true', help='Open the BERTopic visualizations')
+    p.set_defaults(handler=run_topics)
+
+    p = commands.add_parser('engagement', help='Reactions and engagement per group and month')
+    add_input_arguments(p)
+    p.add_argument('--output', default='engagement', help='Base name of the output Excel files')
+    p.add_argument('--top-n', type=int, default=20)
+    p.set_defaults(handler=run_engagement)
+
+    p = commands.add_parser('graph', help='Rank channels by PageRank in the t.me link and forward graph')
+    add_input_arguments(p)
+    p.add_argument('--output-folder', help='Where results are saved (default: --folder)')
+    p.add_argument('--next-n', type=int, default=100, help='Channels written to next_channels.txt')
+    p.add_argument('--min-linking-channels', type=int, default=2,
+                   help='Only suggest channels linked from at least this many scraped channels')
+    p.set_defaults(handler=run_graph)
+
+    p = commands.add_parser('authors', help='Most active commenters and commenters active in several groups')
+    add_input_arguments(p)
+    p.add_argument('--output', default='authors', help='Base name of the output CSV files')
+    p.add_argument('--top-n', type=int, default=1000, help='Authors in <output>_most_active.csv')
+    p.add_argument('--min-groups', type=int, default=2, help='Minimum groups of the authors in <output>_cross_group.csv')
+    p.set_defaults(handler=run_authors)
+
+    p = commands.add_parser('trends', help='Messages, URLs, domains, keywords and topics per group and day/week/month')
+    add_input_arguments(p)
+    p.add_argument('--output-folder', help='Where results and the cache are saved (default: --folder)')
+    p.add_argument('--output', default='trends', help='Base name of the output CSV files')
+    p.add_argument('--keywords', nargs='+', help='Keywords to count')
+    p.add_argument('--topics-file', help='documents_with_topics.csv of the topics command, in --output-folder')
+    p.add_argument('--rebuild', action='store_true', help='Ignore the cached daily counts')
+    p.set_defaults(handler=run_trends)
+
+    p = commands.add_parser('trend-charts', help='Render the saved trends as plotly charts')
+    p.add_argument('--folder', default='.', help='Folder of the trends CSV files (default: .)')
+    p.add_argument('--output', default='trends', help='Base name used by the trends command')
+    p.add_argument('--periods', nargs='+', default=['day'], choices=['day', 'week', 'month'])
+    p.add_argument('--top-n', type=int, default=10, help='Groups and values per chart')
+    p.add_argument('--png', action='store_true', help='Also save PNG charts (needs kaleido, slow)')
+    p.set_defaults(handler=run_trend_charts)
+
+    p = commands.add_parser('memory-report', help='Memory used per column when a Parquet file is loaded')
+    add_input_arguments(p)
+    p.add_argument('--columns', nargs='+', help='Only load these columns')
+    p.add_argument('--no-compare', action='store_true', help='Skip loading the file with the default pandas types')
+    p.set_defaults(handler=run_memory_report)
+
+    p = commands.add_parser('query', help='Run SQL over the posts, comments, links and monthly views (DuckDB)')
+    p.add_argument('sql', help='SQL query, e.g. "SELECT * FROM monthly ORDER BY \\"Total\\" DESC LIMIT 10"')
+    p.add_argument('--folder', default='.', help='Folder with the unified file or the FINAL_*.parquet files (default: .)')
+    p.add_argument('--source', default='auto', choices=['auto', 'unified', 'final'],
+                   help='Build the posts view on the unified file or on the FINAL files (default: unified if it exists)')
+    p.add_argument('--output', help='Save the result to a .parquet, .csv or .xlsx file instead of printing it')
+    p.add_argument('--threads', type=int, help='Threads DuckDB may use (default: all cores)')
+    p.add_argument('--memory-limit', help="DuckDB memory limit like '4GB', it spills to disk beyond it")
+    p.add_argument('--max-rows', type=int, default=50, help='Rows printed when there is no --output')
+    p.set_defaults(handler=run_query)
+
+    p = commands.add_parser('pipeline', help='Run combine and the analyses, skipping the stages that are up to date')
+    p.add_argument('--folder', default='.', help='Where the unified file and the analysis outputs go (default: .)')
+    p.add_argument('--final-folder', required=True, help='Folder with the FINAL_*.parquet files of the scrape')
+    p.add_argument('--stages', nargs='+', help='Stages to run (default: all configured stages except topics)')
+    p.add_argument('--force', nargs='+', default=[], help='Rerun these stages even if they are up to date')
+    p.add_argument('--jobs', type=int, help='Stages running at once (default: number of CPUs)')
+    p.add_argument('--status', action='store_true', help='Only print which stages are up to date')
+    p.add_argument('--keywords', nargs='+', help='Keywords of the keyword filter stage')
+    p.add_argument('--sample-size', type=int, default=10000, help='Size of the proportional sample')
+    p.add_argument('--channels', nargs='+', help='Also scrape these channels into --final-folder first')
+    p.add_argument('--date-min', type=parse_date, help='First day to scrape (YYYY-MM-DD, UTC)')
+    p.add_argument('--date-max', type=parse_date, help='Last day to scrape (YYYY-MM-DD, UTC)')
+    p.add_argument('--search', default='', help='Only scrape messages matching this keyword')
+    p.add_argument('--sessions', nargs='+', help='Scrape on several session files at once')
+    p.set_defaults(handler=run_pipeline)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
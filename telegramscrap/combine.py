@@ -0,0 +1,213 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+
+from .authors import write_comments
+from .engagement import REACTIONS_LIST_TYPE
+from .filenames import COMMENTS_FILENAME
+
+# Columns written by the different versions of scraper.py and the type every file is cast to before concatenating.
+# Columns a file does not have are added as nulls, unknown columns are kept as they are.
+CANONICAL_SCHEMA = pa.schema([
+    ('Type', pa.large_string()),
+    ('Group', pa.large_string()),
+    ('Author ID', pa.int64()),
+    ('Content', pa.large_string()),
+    ('Date', pa.timestamp('us')),
+    ('Message ID', pa.large_string()),
+    ('Author', pa.large_string()),
+    ('Views', pa.int64()),
+    ('Reactions', pa.large_string()),
+    ('Reactions List', REACTIONS_LIST_TYPE),
+    ('Shares', pa.int64()),
+    ('Media', pa.bool_()),
+    ('Url', pa.large_string()),
+    ('Comments List', pa.large_string()),
+    ('Comments', pa.int64()),
+    ('Forwarded From', pa.large_string()),
+    ('Edit Date', pa.timestamp('us')),
+])
+
+
+def is_empty_parquet(file_path):
+
+    # Checks, from the Parquet footer only, whether a file has no rows or only null values.
+
+    # Parameters:
+    # file_path (str): Path of the Parquet file.
+
+    # Returns:
+    # bool: True if the file can be skipped. Files without column statistics are never considered empty.
+
+    metadata = pq.ParquetFile(file_path).metadata
+    if metadata.num_rows == 0:
+        return True
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            statistics = row_group.column(j).statistics
+            if statistics is None or statistics.null_count != row_group.num_rows:
+                return False
+    return True
+
+
+def _cast_column(column, field):
+    if column.type == field.type:
+        return column
+    if field.name == 'Media' and not pa.types.is_boolean(column.type):
+        # Older files store 'True'/'False' strings
+        return pc.equal(pc.utf8_lower(column.cast(pa.large_string())), 'true')
+    if field.name in ('Date', 'Edit Date') and not pa.types.is_timestamp(column.type):
+        try:
+            return column.cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return pa.chunked_array([pa.array(pd.to_datetime(column.to_pandas(), errors='coerce'), type=field.type)])
+    if pa.types.is_timestamp(column.type) and column.type.tz is not None:
+        column = column.cast(pa.timestamp(column.type.unit))
+    return column.cast(field.type)
+
+
+def to_canonical_schema(table):
+
+    # Casts a table read from one FINAL_/complete_ file to CANONICAL_SCHEMA.
+
+    # Parameters:
+    # table (pyarrow.Table): The table as read from the file.
+
+    # Returns:
+    # pyarrow.Table: The canonical columns first (missing ones as nulls), followed by any other columns.
+
+    # Steps:
+    # 1. Cast every known column to its canonical type ('Message ID' int -> str, 'Media' str -> bool, ...).
+    # 2. Add missing columns (e.g. 'Comments' or 'Reactions List' in older files) as nulls.
+    # 3. Add "@" to the beginning of items in 'Group' column if missing.
+
+    columns, fields = [], []
+    for field in CANONICAL_SCHEMA:
+        if field.name in table.column_names:
+            columns.append(_cast_column(table.column(field.name), field))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+        fields.append(field)
+    for name in table.column_names:
+        if name not in CANONICAL_SCHEMA.names:
+            columns.append(table.column(name))
+            fields.append(table.schema.field(name))
+    table = pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+    group = table.column('Group')
+    at, separator = pa.scalar('@', group.type), pa.scalar('', group.type)
+    group = pc.if_else(pc.starts_with(group, '@'), group, pc.binary_join_element_wise(at, group, separator))
+    return table.set_column(table.schema.get_field_index('Group'), 'Group', group)
+
+
+def read_parquet_files(file_paths, max_workers=None):
+
+    # Reads Parquet files concurrently, skipping empty ones, and returns them as one table with the canonical schema.
+
+    # Parameters:
+    # file_paths (list of str): Files to read, the order is kept.
+    # max_workers (int): Threads reading files at once (default: up to 32, reading is mostly waiting on I/O).
+
+    # Returns:
+    # pyarrow.Table: The concatenated table, or None if every file is empty.
+
+    def read(file_path):
+        if is_empty_parquet(file_path):
+            return None
+        return to_canonical_schema(pq.read_table(file_path))
+
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tables = list(tqdm(executor.map(read, file_paths), total=len(file_paths), desc="Reading files"))
+    tables = [table for table in tables if table is not None]
+    print(f"{len(file_paths) - len(tables)} empty files skipped.")
+    if not tables:
+        return None
+    # Files only differ in the columns outside the canonical schema, which are filled with nulls where missing
+    return pa.concat_tables(tables, promote_options='default')
+
+
+def combine_parquet_files(folder_path, duplicate_columns, output_file_path, max_workers=None, comments_file_path=None):
+
+    # Combines multiple Parquet files from a specified folder into a single DataFrame,
+    # removes duplicates, adjusts the 'Group' and 'Comments' columns, and saves the result as a Parquet file.
+    #
+    # Parameters:
+    # folder_path (str): Path to the folder containing the Parquet files to be combined.
+    # duplicate_columns (list of str): List of column names to check for duplicates.
+    # output_file_path (str): Path to save the combined Parquet file.
+    # max_workers (int): Threads reading files at once (default: up to 32).
+    # comments_file_path (str): Where the comments table is saved (default: comments.parquet next to the output).
+    #
+    # Returns:
+    # None
+    #
+    # Steps:
+    # 1. Read the Parquet files in the specified folder concurrently, skipping empty files from their metadata.
+    # 2. Cast each file to the canonical schema ('Message ID' as string, 'Group' starting with '@',
+    #    'Media' as boolean, 'Date' as timestamp, missing columns as nulls) and concatenate them.
+    # 3. Remove duplicate rows based on specified columns, keeping the latest edit of a post.
+    # 4. Recalculate the 'Comments' column by counting occurrences of 'Type': 'comment' in 'Comments List'.
+    # 5. Sort the DataFrame by 'Date' in descending order.
+    # 6. Print the number of rows, number of comments, and total contents.
+    # 7. Save the combined DataFrame to a Parquet file.
+    # 8. Save the comments of the remaining rows as one row per comment, indexed by author (see authors.py).
+    #
+    # Usage:
+    # Place all .parquet files to be unified in the specified folder path.
+    #
+    # Example:
+    # folder_path = r'C:\Users\Public\PyCharmProjects\Data_Conspira'
+    # duplicate_columns = ['Group', 'Message ID']
+    # output_file_path = os.path.join(folder_path, 'data_conspira_telegram.parquet')
+    #
+    # combine_parquet_files(folder_path, duplicate_columns, output_file_path)
+
+    # The comments table of an earlier combine into the same folder is not a scraped file
+    file_paths = sorted(os.path.join(folder_path, file) for file in os.listdir(folder_path)
+                        if file.endswith('.parquet') and file != COMMENTS_FILENAME)
+
+    table = read_parquet_files(file_paths, max_workers)
+    if table is None:
+        print("No rows found in the Parquet files.")
+        return
+
+    print(f"Number of rows before removing duplicates: {table.num_rows}")
+    print(f"Checking duplicates based on columns {duplicate_columns}...")
+    # Live partitions can hold several versions of a post; the latest edit comes first (nulls last, the sort is
+    # stable) and is the one kept
+    if table.column('Edit Date').null_count < table.num_rows:
+        table = table.take(pc.sort_indices(table, [('Edit Date', 'descending')]))
+    keys = table.select(duplicate_columns).to_pandas(types_mapper=pd.ArrowDtype)
+    duplicated = keys.duplicated().to_numpy()
+    print(duplicated.sum(), "duplicated rows found.")
+
+    table = table.filter(pa.array(~duplicated))
+
+    print(f"Number of rows after removing duplicates: {table.num_rows}")
+
+    # json.dumps writes every comment as {"Type": "comment", ...}, so counting the substring counts the comments
+    comments = pc.fill_null(pc.count_substring(table.column('Comments List'), '"Type": "comment"'), 0).cast(pa.int64())
+    table = table.set_column(table.schema.get_field_index('Comments'), 'Comments', comments)
+
+    table = table.sort_by([('Date', 'descending')])
+
+    num_comments = pc.sum(comments).as_py() or 0
+
+    print("\n")
+    print(f" / Number of rows in the combined dataframe: {table.num_rows}")
+    print(f" / Number of comments: {num_comments}")
+    print(f" / Total contents (rows + comments): {table.num_rows + num_comments}")
+
+    pq.write_table(table, output_file_path)
+
+    print(f" / Combined file saved at: {output_file_path}")
+
+    comments_file_path = comments_file_path or os.path.join(os.path.dirname(output_file_path), COMMENTS_FILENAME)
+    written = write_comments(table.select(['Group', 'Message ID', 'Comments List']), comments_file_path)
+    print(f" / {written} comments indexed by author at: {comments_file_path}")
@@ -0,0 +1,126 @@
+"""
+Compact Corpus Loading
+----------------------
+Loads scraped or combined Parquet files into pandas without the per-value Python object overhead of
+the default representation, which makes a multi-million-row corpus take several times the size of the
+Parquet file in RAM.
+
+- Every column is Arrow-backed (dtype_backend="pyarrow"): strings are stored in Arrow buffers and
+  integer columns stay nullable ints instead of turning into floats when a value is missing.
+- Low-cardinality text columns (Group, Type, Author, Media, Reactions) are read straight into pandas
+  categoricals from Parquet's dictionary encoding, so each distinct value is stored once. Columns that
+  turn out to be mostly unique (more distinct values than half the rows) are kept as Arrow strings.
+- Only the requested columns are read.
+- memory_report() shows how much memory each column of a DataFrame takes.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Columns with few distinct values, stored as categoricals
+CATEGORY_COLUMNS = ['Type', 'Group', 'Author', 'Media', 'Reactions']
+
+
+def _arrow_dtype(arrow_type):
+    # Dictionary columns become pandas categoricals, everything else an ArrowDtype
+    if pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
+def read_corpus(path, columns=None, categories=CATEGORY_COLUMNS):
+
+    # Reads a Parquet file into a compact, Arrow-backed DataFrame.
+
+    # Parameters:
+    # path (str): Path of the Parquet file.
+    # columns (list of str): Columns to read (default: all). Missing columns are ignored.
+    # categories (list of str): Text columns to read as categoricals, if present.
+
+    # Returns:
+    # DataFrame: The corpus with ArrowDtype columns and categorical low-cardinality columns.
+
+    # Example:
+    # df = read_corpus(r'C:\Users\Public\PyCharmProjects\Data_Conspira\unified_data_telegram.parquet',
+    #                  columns=['Group', 'Date', 'Comments'])
+
+    schema = pq.read_schema(path)
+    if columns is not None:
+        columns = [column for column in columns if column in schema.names]
+    # read_dictionary only applies to string columns, e.g. 'Media' is a bool in combined files
+    dictionary_columns = [
+        column for column in categories
+        if column in schema.names and (columns is None or column in columns)
+        and (pa.types.is_string(schema.field(column).type) or pa.types.is_large_string(schema.field(column).type))
+    ]
+    table = pq.read_table(path, columns=columns, read_dictionary=dictionary_columns)
+    # 'Author' is often all null, which Parquet stores as the null type; keep it a (nullable) categorical
+    for i, field in enumerate(table.schema):
+        if field.name in categories and pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.dictionary(pa.int32(), pa.string())))
+    df = table.to_pandas(types_mapper=_arrow_dtype, self_destruct=True)
+    # A dictionary only pays off when values repeat, e.g. 'Reactions' can be almost unique per post
+    for column in dictionary_columns:
+        if len(df[column].cat.categories) > len(df) // 2:
+            df[column] = df[column].astype(pd.ArrowDtype(pa.large_string()))
+        else:
+            # Categories come in order of appearance; sorted ones keep groupby/sort results in the usual order
+            df[column] = df[column].cat.reorder_categories(df[column].cat.categories.sort_values())
+    return df
+
+
+def memory_report(df, parquet_path=None):
+
+    # Reports the memory used by each column of a DataFrame.
+
+    # Parameters:
+    # df (DataFrame): The DataFrame to measure.
+    # parquet_path (str): Optional Parquet file the DataFrame was loaded from, for the ratio to its size.
+
+    # Returns:
+    # DataFrame: 'Column', 'Dtype', 'MB' and 'Share' per column, sorted by 'MB', followed by a 'Total' row
+    #            (and a 'Parquet file' row with the file size if parquet_path is given).
+
+    usage = df.memory_usage(deep=True, index=True)
+    total = usage.sum()
+    report = pd.DataFrame({
+        'Column': usage.index.astype(str),
+        'Dtype': ['index' if column == 'Index' else str(df[column].dtype) for column in usage.index],
+        'MB': usage.to_numpy() / 1024 ** 2,
+        'Share': usage.to_numpy() / total if total else 0.0,
+    }).sort_values('MB', ascending=False, ignore_index=True)
+    rows = [{'Column': 'Total', 'Dtype': '', 'MB': total / 1024 ** 2, 'Share': 1.0}]
+    if parquet_path:
+        file_size = os.path.getsize(parquet_path)
+        rows.append({'Column': 'Parquet file', 'Dtype': f'{total / file_size:.1f}x in memory' if file_size else '',
+                     'MB': file_size / 1024 ** 2, 'Share': float('nan')})
+    return pd.concat([report, pd.DataFrame(rows)], ignore_index=True)
+
+
+def print_memory_report(path, columns=None, compare=True):
+
+    # Prints the memory report of a Parquet file loaded with read_corpus, and with plain pd.read_parquet to compare.
+
+    # Parameters:
+    # path (str): Path of the Parquet file.
+    # columns (list of str): Columns to load (default: all).
+    # compare (bool): Also load the file with the default pandas representation.
+
+    # Example:
+    # print_memory_report(r'C:\Users\Public\PyCharmProjects\Data_Conspira\unified_data_telegram.parquet')
+
+    with pd.option_context('display.max_rows', None, 'display.width', None, 'display.float_format', '{:,.2f}'.format):
+        print("Compact (Arrow-backed, categorical):")
+        compact = memory_report(read_corpus(path, columns=columns), path)
+        print(compact.to_string(index=False))
+        if compare:
+            print("\nDefault pandas:")
+            default = memory_report(pd.read_parquet(path, columns=columns), path)
+            print(default.to_string(index=False))
+            compact_total = compact.loc[compact['Column'] == 'Total', 'MB'].iloc[0]
+            default_total = default.loc[default['Column'] == 'Total', 'MB'].iloc[0]
+            print(f"\nCompact representation uses {compact_total:,.1f} MB instead of {default_total:,.1f} MB "
+                  f"({default_total / compact_total:.1f}x less).")
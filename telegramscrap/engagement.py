@@ -0,0 +1,225 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .corpus import read_corpus
+
+# Arrow type of the 'Reactions List' column written by scraper.py
+REACTION_TYPE = pa.struct([
+    ('Type', pa.string()),
+    ('Emoji', pa.string()),
+    ('Custom Emoji ID', pa.int64()),
+    ('Count', pa.int64()),
+])
+REACTIONS_LIST_TYPE = pa.list_(REACTION_TYPE)
+
+# Legacy 'Reactions' strings look like "👍 12 ❤ 5 [custom:5368324170671202286] 3 "
+LEGACY_REACTION_PATTERN = r'(?P<Reaction>\S+) (?P<Count>\d+)(?: |$)'
+
+
+def _reactions_to_arrow(series):
+
+    # Converts a 'Reactions List' column (numpy object arrays or pyarrow-backed) into a list<struct> Arrow array.
+
+    if isinstance(series.dtype, pd.ArrowDtype):
+        array = pa.array(series)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        return array.cast(REACTIONS_LIST_TYPE) if array.type != REACTIONS_LIST_TYPE else array
+    return pa.array(series.to_numpy(), type=REACTIONS_LIST_TYPE, from_pandas=True)
+
+
+def explode_reactions(df, reactions_col='Reactions', reactions_list_col='Reactions List'):
+
+    # Turns the reactions of every row into a long table with one row per (row, reaction), without a Python loop per row.
+
+    # Parameters:
+    # df (DataFrame): The scraped data.
+    # reactions_col (str): The legacy reactions string column, used for rows without structured reactions.
+    # reactions_list_col (str): The structured reactions column written by scraper.py.
+
+    # Returns:
+    # DataFrame: Columns 'Row' (position of the row in df), 'Reaction', 'Type' and 'Count'.
+
+    # Steps:
+    # 1. Flatten the list<struct> 'Reactions List' column in Arrow, keeping the parent row of each reaction.
+    # 2. Label each reaction with its emoji, or 'custom:<id>' for custom emoji reactions.
+    # 3. Parse the legacy 'Reactions' string with one vectorized regex pass for rows without 'Reactions List'
+    #    (files scraped before the structured column existed).
+
+    parts = []
+    legacy_rows = pd.Series(True, index=range(len(df)))
+
+    if reactions_list_col in df.columns:
+        reactions = _reactions_to_arrow(df[reactions_list_col])
+        legacy_rows = pd.Series(reactions.is_null().to_numpy(zero_copy_only=False), index=range(len(df)))
+        flat = pc.list_flatten(reactions)
+        custom_labels = pc.binary_join_element_wise('custom:', pc.cast(flat.field('Custom Emoji ID'), pa.string()), '')
+        labels = pc.coalesce(flat.field('Emoji'), custom_labels, flat.field('Type'))
+        parts.append(pd.DataFrame({
+            'Row': pc.list_parent_indices(reactions).to_numpy(),
+            'Reaction': labels.to_numpy(zero_copy_only=False),
+            'Type': flat.field('Type').to_numpy(zero_copy_only=False),
+            'Count': pc.fill_null(flat.field('Count'), 0).to_numpy(),
+        }))
+
+    if reactions_col in df.columns and legacy_rows.any():
+        legacy = pd.Series(df[reactions_col].to_numpy(), index=range(len(df)))[legacy_rows].dropna().astype(str)
+        extracted = legacy.str.extractall(LEGACY_REACTION_PATTERN)
+        if not extracted.empty:
+            reaction = extracted['Reaction'].str.strip('[]')
+            parts.append(pd.DataFrame({
+                'Row': extracted.index.get_level_values(0).to_numpy(),
+                'Reaction': reaction.to_numpy(),
+                'Type': reaction.str.startswith('custom:').map({True: 'custom_emoji', False: 'emoji'}).to_numpy(),
+                'Count': extracted['Count'].astype('int64').to_numpy(),
+            }))
+
+    if not parts:
+        return pd.DataFrame({'Row': pd.Series(dtype='int64'), 'Reaction': pd.Series(dtype=object),
+                             'Type': pd.Series(dtype=object), 'Count': pd.Series(dtype='int64')})
+    return pd.concat(parts, ignore_index=True)
+
+
+def total_reactions(df, reactions=None):
+
+    # Returns the total number of reactions of every row, aligned with df.
+
+    # Parameters:
+    # df (DataFrame): The scraped data.
+    # reactions (DataFrame): Output of explode_reactions(df), computed if omitted.
+
+    # Returns:
+    # Series: Total reactions per row, 0 for rows without reactions.
+
+    if reactions is None:
+        reactions = explode_reactions(df)
+    totals = reactions.groupby('Row')['Count'].sum().reindex(range(len(df)), fill_value=0)
+    return pd.Series(totals.to_numpy(), index=df.index, name='Total Reactions')
+
+
+def top_reactions(df, n=10, group_col=None, reactions=None):
+
+    # Returns the most used reactions, overall or per group.
+
+    # Parameters:
+    # df (DataFrame): The scraped data.
+    # n (int): Number of reactions to keep (per group if group_col is given).
+    # group_col (str): Optional column to rank reactions within, e.g. 'Group'.
+    # reactions (DataFrame): Output of explode_reactions(df), computed if omitted.
+
+    # Returns:
+    # DataFrame: 'Reaction', 'Type', 'Count' (and group_col), sorted by 'Count' descending.
+
+    if reactions is None:
+        reactions = explode_reactions(df)
+    keys = ['Reaction', 'Type']
+    if group_col:
+        reactions = reactions.assign(**{group_col: df[group_col].to_numpy()[reactions['Row'].to_numpy()]})
+        keys = [group_col] + keys
+    counts = reactions.groupby(keys, sort=False)['Count'].sum().reset_index()
+    counts = counts.sort_values('Count', ascending=False, ignore_index=True)
+    if group_col:
+        return counts.groupby(group_col, sort=True).head(n).sort_values([group_col, 'Count'], ascending=[True, False], ignore_index=True)
+    return counts.head(n)
+
+
+def engagement_by_group_month(df, date_col='Date', group_col='Group', views_col='Views', shares_col='Shares',
+                              comments_col='Comments', comments_list_col='Comments List', reactions=None):
+
+    # Computes per group and month: posts, views, reactions, comments, shares and engagement rates.
+
+    # Parameters:
+    # df (DataFrame): The scraped data.
+    # date_col, group_col, views_col, shares_col (str): Column names.
+    # comments_col (str): Comment count column written by combine_parquet_files(); if missing, comments are
+    #                     counted from comments_list_col with a vectorized substring count instead of JSON parsing.
+    # reactions (DataFrame): Output of explode_reactions(df), computed if omitted.
+
+    # Returns:
+    # DataFrame: One row per (group, month) with 'Posts', 'Views', 'Reactions', 'Comments', 'Shares',
+    #            'Reactions per Post', 'Engagement per Post' and 'Engagement Rate' (interactions / views).
+
+    if comments_col in df.columns:
+        comments = pd.to_numeric(df[comments_col], errors='coerce').fillna(0).to_numpy()
+    elif comments_list_col in df.columns:
+        comments = df[comments_list_col].astype(str).str.count('"Type": "comment"').fillna(0).to_numpy()
+    else:
+        comments = 0
+
+    frame = pd.DataFrame({
+        group_col: df[group_col].to_numpy(),
+        'Month': pd.to_datetime(df[date_col]).dt.to_period('M').to_numpy(),
+        'Posts': 1,
+        'Views': pd.to_numeric(df[views_col], errors='coerce').fillna(0).to_numpy() if views_col in df.columns else 0,
+        'Reactions': total_reactions(df, reactions).to_numpy(),
+        'Comments': comments,
+        'Shares': pd.to_numeric(df[shares_col], errors='coerce').fillna(0).to_numpy() if shares_col in df.columns else 0,
+    })
+    summary = frame.groupby([group_col, 'Month'], sort=True).sum().reset_index()
+
+    interactions = summary['Reactions'] + summary['Comments'] + summary['Shares']
+    summary['Reactions per Post'] = summary['Reactions'] / summary['Posts']
+    summary['Engagement per Post'] = interactions / summary['Posts']
+    summary['Engagement Rate'] = (interactions / summary['Views'].where(summary['Views'] > 0)).fillna(0)
+    summary['Month'] = summary['Month'].astype(str)
+    return summary
+
+
+def create_engagement_report(folder_path, input_filename, output_filename_base, top_n=20):
+
+    # Creates engagement tables from a scraped or combined Parquet file.
+
+    # Parameters:
+    # folder_path (str): The path to the folder containing the Parquet file.
+    # input_filename (str): The name of the input Parquet file.
+    # output_filename_base (str): The base name of the output Excel files.
+    # top_n (int): Number of top reactions to list, overall and per group.
+
+    # Returns:
+    # None
+
+    # Steps:
+    # 1. Load the Parquet file into a DataFrame.
+    # 2. Explode the reactions once into a long table.
+    # 3. Compute the top reactions overall and per group.
+    # 4. Compute the per group and month engagement table.
+    # 5. Save the resulting DataFrames to Excel files.
+
+    # Usage:
+    # Place the Parquet file to be analyzed in the specified folder path and specify the output file base name.
+
+    # Example:
+    # create_engagement_report(
+    #     folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira',
+    #     input_filename='unified_data_telegram.parquet',
+    #     output_filename_base='engagement',
+    #     top_n=20
+    # )
+
+    try:
+        input_file_path = os.path.join(folder_path, input_filename)
+        print(f"Loading {input_file_path}...")
+        # Only the columns of the engagement tables are loaded, 'Comments List' only if there is no 'Comments' count
+        columns = ['Group', 'Date', 'Views', 'Shares', 'Comments', 'Reactions', 'Reactions List']
+        if 'Comments' not in pq.read_schema(input_file_path).names:
+            columns.append('Comments List')
+        df = read_corpus(input_file_path, columns=columns)
+
+        print("Exploding reactions...")
+        reactions = explode_reactions(df)
+        print(f"Found {reactions['Count'].sum()} reactions in {len(df)} rows.")
+
+        outputs = {
+            'top_reactions': top_reactions(df, top_n, reactions=reactions),
+            'top_reactions_by_group': top_reactions(df, top_n, group_col='Group', reactions=reactions),
+            'by_group_month': engagement_by_group_month(df, reactions=reactions),
+        }
+        for name, output_df in outputs.items():
+            output_path = os.path.join(folder_path, f"{output_filename_base}_{name}.xlsx")
+            output_df.to_excel(output_path, index=False, engine='openpyxl')
+            print(f"Engagement table saved as: {output_path}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
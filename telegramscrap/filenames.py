@@ -0,0 +1,12 @@
+"""
+File Names
+----------
+Names of the files several steps share. The module imports nothing, so light modules like sql.py and
+pipeline.py can use it without loading pandas or pyarrow.
+
+- UNIFIED_FILENAME: the posts file written by combine_parquet_files and read by the analyses.
+- COMMENTS_FILENAME: one row per comment, written next to it by combine_parquet_files (see authors.py).
+"""
+
+UNIFIED_FILENAME = 'unified_data_telegram.parquet'
+COMMENTS_FILENAME = 'comments.parquet'
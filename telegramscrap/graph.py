@@ -0,0 +1,286 @@
+"""
+Channel Mention Graph
+---------------------
+Builds a directed graph of which channel links to (or forwards from) which other channel, and ranks the
+channels that have not been scraped yet so the next snowball round starts with the most central ones.
+
+- Edges: source 'Group' -> t.me handle mentioned in its 'Content', and source 'Group' -> the channel a post
+  was forwarded from ('Forwarded From', written by newer versions of scraper.py). Forwards from chats without
+  a public username (stored as a chat ID) or from hidden users (a display name) cannot be scraped and are left out.
+- The weighted adjacency matrix is a scipy.sparse CSR matrix, so graphs with hundreds of thousands of edges
+  are ranked in seconds.
+- PageRank (power iteration on the sparse matrix), in-degree (distinct linking channels and total links),
+  out-degree and communities (label propagation on the symmetrized matrix) are computed per channel.
+- Results: channel_edges.csv (edge list), channel_ranking.csv (one row per channel) and next_channels.txt
+  (unscraped channels by PageRank, ready for `python -m telegramscrap scrape --channels-file`).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .corpus import read_corpus
+
+# A Telegram username: a letter, then 4 to 32 letters, digits or underscores in total
+USERNAME_PATTERN = r'[A-Za-z]\w{3,31}'
+
+# t.me/<handle>, t.me/s/<handle>, telegram.me/<handle>; invite links (t.me/+...) do not start with a letter.
+# The host must not continue another domain name (about.me/..., vkt.me/...).
+TELEGRAM_HANDLE_PATTERN = rf'(?<![\w.-])(?:www\.)?(?:t|telegram)\.(?:me|dog)/(?:s/)?(?P<Handle>{USERNAME_PATTERN})'
+
+# t.me paths that are not channels
+RESERVED_PATHS = {
+    'addemoji', 'addlist', 'addstickers', 'addtheme', 'bg', 'boost', 'c', 'confirmphone', 'contact', 'iv',
+    'joinchat', 'login', 'proxy', 'setlanguage', 'share', 'socks',
+}
+
+
+def normalize_handle(handles):
+
+    # Normalizes channel names ('@Name', 'Name', 'Name__') to lowercase '@name', Telegram usernames are case-insensitive.
+
+    # Parameters:
+    # handles (Series): Channel names or handles.
+
+    # Returns:
+    # Series: The normalized handles.
+
+    handles = handles.astype(str).str.strip().str.lstrip('@').str.rstrip('_').str.lower()
+    return '@' + handles
+
+
+def extract_edges(df, content_col='Content', group_col='Group', forward_col='Forwarded From'):
+
+    # Extracts the channel -> channel mentions and forwards of a corpus.
+
+    # Parameters:
+    # df (DataFrame): The corpus.
+    # content_col (str): Column with the post text.
+    # group_col (str): Column with the channel a post belongs to.
+    # forward_col (str): Column with the channel a post was forwarded from, used if present.
+
+    # Returns:
+    # DataFrame: 'Source', 'Target', 'Kind' ('link' or 'forward') and 'Weight' (number of posts), without self loops.
+
+    groups = normalize_handle(df[group_col])
+    frames = []
+
+    # One regex pass over all posts, the match index points back to the posting row
+    mentions = df[content_col].astype(str).str.extractall(TELEGRAM_HANDLE_PATTERN)
+    if not mentions.empty:
+        rows = mentions.index.get_level_values(0)
+        frames.append(pd.DataFrame({
+            'Source': groups.loc[rows].to_numpy(),
+            'Target': normalize_handle(mentions['Handle']).to_numpy(),
+            'Kind': 'link',
+        }))
+
+    if forward_col in df.columns:
+        # scraper.forwarded_from writes '@username' when there is one, otherwise a chat ID or a display name
+        forwarded = df[forward_col].notna() & df[forward_col].astype(str).str.fullmatch(f'@{USERNAME_PATTERN}')
+        forwarded = forwarded.fillna(False).astype(bool)
+        frames.append(pd.DataFrame({
+            'Source': groups[forwarded].to_numpy(),
+            'Target': normalize_handle(df.loc[forwarded, forward_col]).to_numpy(),
+            'Kind': 'forward',
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=['Source', 'Target', 'Kind', 'Weight'])
+    edges = pd.concat(frames, ignore_index=True)
+    edges = edges[(edges['Source'] != edges['Target']) & ~edges['Target'].str[1:].isin(RESERVED_PATHS)]
+    return edges.groupby(['Source', 'Target', 'Kind'], sort=False).size().rename('Weight').reset_index()
+
+
+def adjacency_matrix(edges):
+
+    # Builds the weighted adjacency matrix of an edge list (link and forward weights are summed).
+
+    # Parameters:
+    # edges (DataFrame): Edge list from extract_edges.
+
+    # Returns:
+    # tuple: (scipy.sparse.csr_matrix with rows = sources and columns = targets, Index of the node names).
+
+    from scipy import sparse
+
+    codes, nodes = pd.factorize(pd.concat([edges['Source'], edges['Target']], ignore_index=True), sort=True)
+    sources, targets = codes[:len(edges)], codes[len(edges):]
+    matrix = sparse.csr_matrix((edges['Weight'].to_numpy(dtype=np.float64), (sources, targets)),
+                               shape=(len(nodes), len(nodes)))
+    matrix.sum_duplicates()
+    return matrix, pd.Index(nodes)
+
+
+def pagerank(matrix, alpha=0.85, tol=1e-10, max_iter=100):
+
+    # Weighted PageRank by power iteration; the rank of channels without outgoing links is spread evenly.
+
+    # Parameters:
+    # matrix (csr_matrix): Adjacency matrix, rows link to columns.
+    # alpha (float): Damping factor.
+    # tol (float): Stop when the L1 change of the ranks is below tol * number of nodes.
+    # max_iter (int): Maximum number of iterations.
+
+    # Returns:
+    # ndarray: PageRank of every node, summing to 1.
+
+    from scipy import sparse
+
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    # Transposed, row-normalized matrix: transition.T @ rank moves rank along the links
+    transition = (sparse.diags(inverse) @ matrix).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = rank
+        rank = alpha * (transition @ rank + rank[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+    return rank / rank.sum()
+
+
+def _row_argmax(matrix):
+    # Column of the largest stored value of every row (no row may be empty); csr_matrix.argmax is far slower
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    row_max = np.maximum.reduceat(matrix.data, matrix.indptr[:-1])
+    hits = np.flatnonzero(matrix.data == row_max[rows])
+    result = np.empty(matrix.shape[0], dtype=np.int64)
+    result[rows[hits]] = matrix.indices[hits]
+    return result
+
+
+def label_propagation(matrix, max_iter=30, seed=0):
+
+    # Detects communities by label propagation on the symmetrized matrix: every node repeatedly takes the label
+    # with the largest total link weight among its neighbours. Each round is one sparse product.
+
+    # Parameters:
+    # matrix (csr_matrix): Adjacency matrix.
+    # max_iter (int): Maximum number of rounds.
+    # seed (int): Seed of the small random weights that break ties.
+
+    # Returns:
+    # ndarray: Community number of every node, 0 being the largest community.
+
+    from scipy import sparse
+
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    # Self loops make nodes keep their label on ties, which stops labels from oscillating between neighbours
+    weights = (matrix + matrix.T + sparse.identity(n, format='csr')).tocsr()
+    labels = np.arange(n)
+    for _ in range(max_iter):
+        one_hot = sparse.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, n))
+        scores = (weights @ one_hot).tocsr()
+        scores.data += rng.random(len(scores.data)) * 1e-6
+        scores.sum_duplicates()
+        new_labels = _row_argmax(scores)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    # Number the communities by size
+    _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    renumber = np.empty_like(order)
+    renumber[order] = np.arange(len(order))
+    return renumber[inverse]
+
+
+def rank_channels(edges, scraped=()):
+
+    # Computes PageRank, degrees and communities of every channel in an edge list.
+
+    # Parameters:
+    # edges (DataFrame): Edge list from extract_edges.
+    # scraped (iterable of str): Channels already scraped (any casing, with or without '@').
+
+    # Returns:
+    # DataFrame: 'Channel', 'Scraped', 'PageRank', 'Linking Channels' (distinct in-degree), 'Incoming Links'
+    #            (weighted in-degree), 'Linked Channels' (distinct out-degree) and 'Community', by PageRank.
+
+    matrix, nodes = adjacency_matrix(edges)
+    scraped = set(normalize_handle(pd.Series(list(scraped), dtype=object))) if len(scraped) else set()
+    ranking = pd.DataFrame({
+        'Channel': nodes,
+        'Scraped': nodes.isin(scraped),
+        'PageRank': pagerank(matrix),
+        'Linking Channels': np.diff(matrix.tocsc().indptr),
+        'Incoming Links': np.asarray(matrix.sum(axis=0)).ravel().astype(np.int64),
+        'Linked Channels': np.diff(matrix.indptr),
+        'Community': label_propagation(matrix),
+    })
+    return ranking.sort_values('PageRank', ascending=False, ignore_index=True)
+
+
+def next_channels(ranking, n=100, min_linking_channels=1):
+
+    # Picks the unscraped channels to scrape next, by PageRank.
+
+    # Parameters:
+    # ranking (DataFrame): Output of rank_channels.
+    # n (int): Number of channels.
+    # min_linking_channels (int): Only channels linked from at least this many different channels.
+
+    # Returns:
+    # list of str: Channel handles like '@name'.
+
+    candidates = ranking[~ranking['Scraped'] & (ranking['Linking Channels'] >= min_linking_channels)]
+    return candidates['Channel'].head(n).tolist()
+
+
+def build_channel_graph(folder_path, input_filename, output_folder=None, next_n=100, min_linking_channels=2):
+
+    # Builds the channel mention graph of a corpus and saves the edge list, the ranking and the next channels to scrape.
+
+    # Parameters:
+    # folder_path (str): The path to the folder containing the Parquet file.
+    # input_filename (str): The name of the input Parquet file.
+    # output_folder (str): Where results are saved, defaults to folder_path.
+    # next_n (int): Number of channels written to next_channels.txt.
+    # min_linking_channels (int): Only suggest channels linked from at least this many scraped channels.
+
+    # Returns:
+    # DataFrame: The channel ranking.
+
+    # Steps:
+    # 1. Load the 'Group', 'Content' and 'Forwarded From' columns of the Parquet file.
+    # 2. Extract the channel -> channel links and forwards.
+    # 3. Build the sparse adjacency matrix and rank the channels.
+    # 4. Save channel_edges.csv, channel_ranking.csv and next_channels.txt.
+
+    # Example:
+    # build_channel_graph(
+    #     folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira',
+    #     input_filename='unified_data_telegram.parquet'
+    # )
+
+    output_folder = output_folder or folder_path
+    input_file_path = os.path.join(folder_path, input_filename)
+    print(f"Loading {input_file_path}...")
+    df = read_corpus(input_file_path, columns=['Group', 'Content', 'Forwarded From'])
+
+    print("Extracting channel links and forwards...")
+    edges = extract_edges(df)
+    print(f"Found {len(edges)} edges ({int(edges['Weight'].sum())} links and forwards).")
+
+    print("Ranking channels...")
+    ranking = rank_channels(edges, scraped=df['Group'].unique())
+    suggestions = next_channels(ranking, next_n, min_linking_channels)
+
+    edges.sort_values('Weight', ascending=False).to_csv(os.path.join(output_folder, 'channel_edges.csv'), index=False)
+    ranking.to_csv(os.path.join(output_folder, 'channel_ranking.csv'), index=False)
+    with open(os.path.join(output_folder, 'next_channels.txt'), 'w', encoding='utf-8') as f:
+        f.writelines(f'{channel}\n' for channel in suggestions)
+
+    print("\nTop 10 channels to scrape next:")
+    print(ranking[ranking['Channel'].isin(suggestions)].head(10).to_string(index=False))
+    print(f"\nGraph saved: channel_edges.csv, channel_ranking.csv and next_channels.txt in {output_folder}")
+    return ranking
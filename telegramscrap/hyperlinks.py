@@ -0,0 +1,174 @@
+"""
+Hyperlink Analysis for Telegram Messages
+----------------------------------------
+Extracts, counts, and summarizes hyperlinks (URLs) from the 'Content' column of your Telegram message dataset.
+
+- Loads the Parquet file (e.g. 'korpus.parquet').
+- Extracts all URLs from each message.
+- Counts most common domains and full URLs.
+- Saves results to CSV files for further analysis.
+- Optionally (plots=True, or --plots on the command line) renders the time trend and top 10 charts with plotly,
+  imported only when charts are requested.
+- Per-group daily, weekly and monthly URL and domain counts are computed, and cached, by trends.py.
+
+Best practice: Run this analysis separately from topic modeling to keep analyses modular.
+"""
+
+import os
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from .corpus import read_corpus
+
+
+# Regex matches http(s) and www URLs
+URL_PATTERN = r"http[s]?://\S+|www\.\S+"
+
+
+# Function to extract all URLs from a text string
+def extract_urls(text):
+    return re.findall(URL_PATTERN, str(text))
+
+
+# Extract domains from URLs
+def get_domain(url):
+    try:
+        parsed = urlparse(url if url.startswith('http') else 'http://' + url)
+        return parsed.netloc.lower()
+    except Exception:
+        return None
+
+
+def analyze_hyperlinks(folder_path, input_filename, output_folder=None, plots=False):
+
+    # Extracts and counts URLs and domains, and saves the results.
+
+    # Parameters:
+    # folder_path (str): The path to the folder containing the Parquet file.
+    # input_filename (str): The name of the input Parquet file.
+    # output_folder (str): Where results are saved, defaults to folder_path.
+    # plots (bool): Also render the HTML/PNG charts (needs plotly, and kaleido for PNG). Off by default, so the
+    #   counts never wait for the chart export.
+
+    # Returns:
+    # tuple: (url_counts, domain_counts) as Counter objects.
+
+    # Steps:
+    # 1. Load the Parquet file into a DataFrame.
+    # 2. Extract all URLs from each message and count the full URLs.
+    # 3. Extract the domain of every URL and count the domains.
+    # 4. Save url_counts.csv, domain_counts.csv and messages_with_urls.csv.
+    # 5. Compute the number of messages with URLs per day.
+    # 6. Optionally, render the charts.
+
+    # Example:
+    # analyze_hyperlinks(
+    #     folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira',
+    #     input_filename='korpus.parquet'
+    # )
+
+    output_folder = output_folder or folder_path
+
+    # Load the dataset
+    print("Reading parquet file...")
+    df = read_corpus(os.path.join(folder_path, input_filename))
+    print(f"Loaded {len(df)} messages.")
+
+    # Extract URLs from each message
+    print("Extracting URLs from messages...")
+    df['urls'] = df['Content'].apply(extract_urls)
+
+    # Flatten all URLs into a single list
+    all_urls = [url for urls in df['urls'] for url in urls]
+    print(f"Found {len(all_urls)} total URLs.")
+
+    # Count most common full URLs
+    url_counts = Counter(all_urls)
+    print("Top 10 most common URLs:")
+    for url, count in url_counts.most_common(10):
+        print(f"{url}: {count}")
+
+    df['domains'] = df['urls'].apply(lambda urls: [get_domain(url) for url in urls])
+    all_domains = [domain for domains in df['domains'] for domain in domains if domain]
+    domain_counts = Counter(all_domains)
+
+    print("\nTop 10 most common domains:")
+    for domain, count in domain_counts.most_common(10):
+        print(f"{domain}: {count}")
+
+    # Save results to CSV for further analysis
+    print("\nSaving URL and domain counts to CSV files...")
+    pd.DataFrame(url_counts.most_common(), columns=['url', 'count']).to_csv(os.path.join(output_folder, "url_counts.csv"), index=False)
+    pd.DataFrame(domain_counts.most_common(), columns=['domain', 'count']).to_csv(os.path.join(output_folder, "domain_counts.csv"), index=False)
+
+    # Save messages with at least one URL for qualitative review
+    df_with_urls = df[df['urls'].apply(len) > 0]
+    df_with_urls.to_csv(os.path.join(output_folder, "messages_with_urls.csv"), index=False)
+
+    # --- Time trend: URLs per day ---
+    url_trend = None
+    if 'Date' in df.columns:
+        print("\nAnalyzing URL frequency over time...")
+        # Combined files store 'Date' as a timestamp, only older string columns are parsed
+        if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        df['has_url'] = df['urls'].apply(lambda x: len(x) > 0)
+        url_trend = df.groupby(df['Date'].dt.date)['has_url'].sum()
+    else:
+        print("No 'Date' column found for time trend analysis.")
+
+    if plots:
+        plot_hyperlinks(url_trend, url_counts, domain_counts, output_folder)
+
+    print("\nAnalysis complete. Results saved:")
+    print("- url_counts.csv: Frequency of each unique URL")
+    print("- domain_counts.csv: Frequency of each domain")
+    print("- messages_with_urls.csv: All messages containing at least one URL")
+    return url_counts, domain_counts
+
+
+def plot_hyperlinks(url_trend, url_counts, domain_counts, output_folder):
+
+    # Renders the URL time trend and the top 10 domains/URLs as HTML (interactive) and PNG (static) charts.
+
+    # Parameters:
+    # url_trend (Series): Messages with URLs per day, or None to skip the trend chart.
+    # url_counts (Counter): Frequency of each URL.
+    # domain_counts (Counter): Frequency of each domain.
+    # output_folder (str): Where the charts are saved.
+
+    # Returns:
+    # None
+
+    # plotly is only needed for charts, so it is imported here and not when the module is loaded
+    import plotly.express as px
+
+    def save(fig, name, description):
+        fig.write_html(os.path.join(output_folder, f'{name}.html'))
+        print(f"Saved: {name}.html (interactive) - {description}")
+        fig.write_image(os.path.join(output_folder, f'{name}.png'))
+        print(f"Saved: {name}.png (static) - {description}")
+
+    # --- Time trend: URLs per day (with HTML export) ---
+    if url_trend is not None:
+        fig = px.line(url_trend, title='Number of Messages with URLs per Day', labels={'value': 'Messages with URLs', 'index': 'Date'})
+        save(fig, 'url_trend_per_day', 'Time trend of messages with URLs')
+
+    # --- Visualization: Top 10 domains (with HTML export) ---
+    if domain_counts:
+        print("\nVisualizing top 10 domains...")
+        domains, counts = zip(*domain_counts.most_common(10))
+        fig = px.bar(x=domains, y=counts, labels={'x': 'Domain', 'y': 'Count'}, title='Top 10 Most Common Domains')
+        fig.update_layout(xaxis_tickangle=-45)
+        save(fig, 'top_10_domains', 'Bar chart of top 10 domains')
+
+    # --- Visualization: Top 10 URLs (with HTML export) ---
+    if url_counts:
+        print("\nVisualizing top 10 URLs...")
+        urls, url_counts_ = zip(*url_counts.most_common(10))
+        fig = px.bar(x=urls, y=url_counts_, labels={'x': 'URL', 'y': 'Count'}, title='Top 10 Most Common URLs')
+        fig.update_layout(xaxis_tickangle=-45)
+        save(fig, 'top_10_urls', 'Bar chart of top 10 URLs')
@@ -0,0 +1,226 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+import os
+import json
+
+
+def keyword_matrix(texts, keywords, max_workers=None):
+
+    # Finds which keywords every message contains, as a sparse message x keyword matrix.
+
+    # Parameters:
+    # texts (pyarrow.Array or ChunkedArray): The message texts.
+    # keywords (list of str): Keywords, matched case-sensitively as substrings (like `keyword in text`).
+    # max_workers (int): Keywords searched at once; Arrow releases the GIL, so threads use several cores.
+
+    # Returns:
+    # scipy.sparse.csr_matrix: int8 matrix with a 1 where message i contains keyword j.
+
+    from scipy import sparse
+
+    if not (pa.types.is_string(texts.type) or pa.types.is_large_string(texts.type)):
+        texts = texts.cast(pa.large_string())
+
+    def hits(keyword):
+        return np.flatnonzero(pc.fill_null(pc.match_substring(texts, keyword), False).to_numpy(zero_copy_only=False))
+
+    max_workers = max_workers or min(len(keywords), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(tqdm(executor.map(hits, keywords), total=len(keywords), desc="Searching keywords"))
+    columns = np.repeat(np.arange(len(keywords)), [len(r) for r in rows])
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, columns)), shape=(len(texts), len(keywords)))
+
+
+def keyword_cooccurrence(matrix, keywords):
+
+    # Counts how many messages contain each pair of keywords (one sparse product).
+
+    # Parameters:
+    # matrix (csr_matrix): Output of keyword_matrix.
+    # keywords (list of str): Keywords of the matrix columns.
+
+    # Returns:
+    # DataFrame: keyword x keyword counts, the diagonal being the number of messages with each keyword.
+
+    counts = matrix.T.astype(np.int64) @ matrix.astype(np.int64)
+    return pd.DataFrame(counts.toarray(), index=keywords, columns=keywords)
+
+
+def keyword_timeline(matrix, keywords, groups, dates, freq='D'):
+
+    # Counts the messages containing each keyword per group and period, as the product of a sparse
+    # (group, period) indicator matrix with the keyword matrix.
+
+    # Parameters:
+    # matrix (csr_matrix): Output of keyword_matrix.
+    # keywords (list of str): Keywords of the matrix columns.
+    # groups (Series): Group of every message.
+    # dates (Series): Date of every message.
+    # freq (str): 'D' for days, 'M' for months (any pandas period frequency).
+
+    # Returns:
+    # DataFrame: 'Group', 'Period', 'Keyword' and 'Count', only for non-zero counts.
+
+    from scipy import sparse
+
+    periods = pd.to_datetime(dates, errors='coerce').dt.tz_localize(None).dt.to_period(freq)
+    valid = (periods.notna() & groups.notna()).to_numpy()
+    group_codes, group_names = pd.factorize(groups[valid], sort=True)
+    period_codes, period_names = pd.factorize(periods[valid], sort=True)
+    # One row per (group, period) that has messages
+    keys, key_codes = np.unique(group_codes.astype(np.int64) * len(period_names) + period_codes, return_inverse=True)
+    indicator = sparse.csr_matrix((np.ones(len(key_codes), dtype=np.int64), (key_codes, np.arange(len(key_codes)))),
+                                  shape=(len(keys), len(key_codes)))
+    counts = (indicator @ matrix[valid].astype(np.int64)).tocoo()
+    return pd.DataFrame({
+        'Group': np.asarray(group_names)[keys[counts.row] // len(period_names)],
+        'Period': period_names[keys[counts.row] % len(period_names)].astype(str),
+        'Keyword': np.asarray(keywords, dtype=object)[counts.col],
+        'Count': counts.data,
+    }).sort_values(['Group', 'Period', 'Keyword'], ignore_index=True)
+
+
+def read_rows(file_path, rows, batch_size=8192):
+
+    # Reads some rows of a Parquet file without loading the others: row groups without any of the rows are
+    # skipped, the others are read batch by batch and only the requested rows of each batch are kept.
+
+    # Parameters:
+    # file_path (str): Path of the Parquet file.
+    # rows (ndarray): Sorted row numbers to read.
+    # batch_size (int): Rows decoded at once.
+
+    # Returns:
+    # pyarrow.Table: The rows, in order.
+
+    parquet_file = pq.ParquetFile(file_path)
+    tables = []
+    offset = 0  # Row number of the first row of the current batch
+    for i in range(parquet_file.metadata.num_row_groups):
+        num_rows = parquet_file.metadata.row_group(i).num_rows
+        if np.searchsorted(rows, offset + num_rows) == np.searchsorted(rows, offset):
+            offset += num_rows
+            continue
+        for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=[i]):
+            first, last = np.searchsorted(rows, offset), np.searchsorted(rows, offset + batch.num_rows)
+            if last > first:
+                tables.append(pa.Table.from_batches([batch]).take(pa.array(rows[first:last] - offset)))
+            offset += batch.num_rows
+    if not tables:
+        return parquet_file.schema_arrow.empty_table()
+    return pa.concat_tables(tables)
+
+
+def filter_and_save_by_keywords(folder_path, input_filename, output_filename, content_col, keywords, max_rows_per_file,
+                                group_col='Group', date_col='Date'):
+
+    # Filters the rows based on keywords in the specified column, adds a column for each keyword indicating its presence,
+    # and saves the result to new Excel files if the maximum number of rows is exceeded.
+    # Also saves the keyword co-occurrence and the keyword counts per group and day/month.
+
+    # Parameters:
+    # folder_path (str): The path to the folder containing the Parquet file.
+    # input_filename (str): The name of the input Parquet filename.
+    # content_col (str): The column name containing the content data.
+    # keywords (list): The list of keywords to filter the content.
+    # output_filename (str): The base name of the output Excel file.
+    # max_rows_per_file (int): The maximum number of rows per output file.
+    # group_col (str): The column name containing the group, for the timelines.
+    # date_col (str): The column name containing the date, for the timelines.
+
+    # Returns:
+    # None
+
+    # Steps:
+    # 1. Load the content, group and date columns of the Parquet file.
+    # 2. Build the sparse message x keyword matrix (one column per keyword, only the hits are stored).
+    # 3. Save the matrix, the keyword co-occurrence and the keyword counts per group and day/month.
+    # 4. Load the full rows where at least one keyword was found, batch by batch.
+    # 5. Decode the 'Comments List' column from JSON, if present.
+    # 6. Add a column for each keyword indicating its presence and one counting the keywords found in each row.
+    # 7. Split and save the filtered DataFrame into multiple Excel files if necessary.
+
+    # Usage:
+    # Place the Parquet file to be filtered in the specified folder path and specify the appropriate column names, keywords, output file name, and maximum number of rows per file.
+
+    # Example:
+    # filter_and_save_by_keywords(
+    #     folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira',
+    #     input_filename="unified_data_telegram.parquet",
+    #     content_col='Content',
+    #     keywords=['Trump', 'Biden', 'Kamala'],
+    #     output_filename='filtered_keywords',
+    #     max_rows_per_file=1000000
+    # )
+
+    try:
+        from scipy import sparse
+
+        # Combine folder path and input filename to get the full file path
+        input_file_path = os.path.join(folder_path, input_filename)
+        keywords = list(dict.fromkeys(keywords))
+
+        # Load only the columns the keyword search and the timelines need
+        print(f"Loading {input_file_path}...")
+        names = pq.read_schema(input_file_path).names
+        columns = [column for column in (content_col, group_col, date_col) if column in names]
+        table = pq.read_table(input_file_path, columns=columns)
+
+        # Store the keyword hits as a sparse matrix instead of one dense column per keyword
+        print("Searching keywords...")
+        matrix = keyword_matrix(table.column(content_col), keywords)
+        sparse.save_npz(os.path.join(folder_path, f'{output_filename}_matrix.npz'), matrix)
+
+        print("Computing keyword co-occurrence and timelines...")
+        keyword_cooccurrence(matrix, keywords).to_csv(os.path.join(folder_path, f'{output_filename}_cooccurrence.csv'))
+        if group_col in columns and date_col in columns:
+            groups = table.column(group_col).to_pandas()
+            dates = table.column(date_col).to_pandas()
+            for freq, name in (('D', 'day'), ('M', 'month')):
+                timeline = keyword_timeline(matrix, keywords, groups, dates, freq)
+                timeline.to_csv(os.path.join(folder_path, f'{output_filename}_by_group_{name}.csv'), index=False)
+        del table
+
+        # Load the full rows of the messages with at least one keyword only
+        print("Filtering by keywords...")
+        keyword_count = np.asarray(matrix.sum(axis=1)).ravel()
+        matched = np.flatnonzero(keyword_count)
+        filtered_df = read_rows(input_file_path, matched).to_pandas(types_mapper=pd.ArrowDtype)
+
+        # Decode the 'Comments List' column from JSON
+        if 'Comments List' in filtered_df.columns:
+            tqdm.pandas(desc="Decoding 'Comments List' column")
+            filtered_df['Comments List'] = filtered_df['Comments List'].progress_apply(
+                lambda x: json.loads(x) if pd.notnull(x) else x)
+
+        # Create a column for each keyword and one with the count of keywords found, for the filtered rows only
+        print("Creating keyword columns...")
+        keyword_columns = pd.DataFrame(matrix[matched].toarray().astype(np.int64), columns=keywords,
+                                       index=filtered_df.index)
+        filtered_df = pd.concat([filtered_df.drop(columns=keywords, errors='ignore'), keyword_columns], axis=1)
+        filtered_df['Keyword_Count'] = keyword_count[matched]
+
+        # Print the number of rows in the filtered dataframe
+        print(f"Number of rows in the filtered dataframe: {len(filtered_df)}")
+
+        # Split and save the final files
+        num_files = (len(filtered_df) // max_rows_per_file) + 1
+
+        for i in tqdm(range(num_files), desc="Saving files"):
+            start_row = i * max_rows_per_file
+            end_row = (i + 1) * max_rows_per_file
+            output_df = filtered_df.iloc[start_row:end_row]
+
+            part_suffix = 'unique' if num_files == 1 else f'part_{i + 1}'
+            output_path = os.path.join(folder_path, f'{output_filename}_{part_suffix}.xlsx')
+            output_df.to_excel(output_path, index=False, engine='openpyxl')
+
+            print(f"Filtered file saved at: {output_path}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
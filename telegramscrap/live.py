@@ -0,0 +1,271 @@
+"""
+Live Ingestion
+--------------
+Keeps channels up to date from Telegram's update events instead of walking their history again on a
+schedule, so new posts reach the Parquet files within seconds and cost no API requests to discover.
+
+- New-message and edit events of the channels are turned into rows with scraper.build_row and buffered;
+  an edit replaces the buffered version of its message.
+- Every flush_interval seconds (or as soon as max_rows rows are buffered) the buffer is written as one
+  Parquet partition LIVE_<UTC time>.parquet. It is written under a temporary name first, so
+  combine_parquet_files never reads a partial file; point the daemon at the folder of the FINAL files and
+  the next combine picks the partitions up.
+- The newest message ID written per channel is kept in .live_state.json. After every (re)connect, and every
+  backfill_interval seconds while connected, each channel is backfilled with iter_messages(min_id=...), so
+  posts sent while the daemon was disconnected or stopped are not lost. On the first start a channel is
+  followed from its newest message, the history itself is left to scraper.py.
+- Rows carry 'Edit Date'; combine_parquet_files keeps the latest edit of a message. Edits made while
+  disconnected and comments (which arrive after the post) are picked up by the next regular scrape.
+"""
+
+import asyncio
+import json
+import os
+from contextlib import suppress
+from datetime import datetime, timezone
+
+import pandas as pd
+from telethon import events
+from telethon.sync import TelegramClient
+
+from .metrics import ProgressReporter, ScrapeMetrics, make_exporter
+from .scraper import api_hash, api_id, build_row, username
+
+STATE_FILENAME = '.live_state.json'
+
+
+class LiveIngester:
+
+    # Daemon writing the posts of some channels to rolling Parquet partitions as they are posted or edited.
+    #
+    # Parameters:
+    # channels (list of str): Channels like '@ChannelName'.
+    # folder (str): Where the LIVE_*.parquet partitions and .live_state.json are written.
+    # flush_interval (float): Seconds between two partitions (nothing is written while no posts arrive).
+    # max_rows (int): Flush earlier once this many rows are buffered.
+    # backfill_interval (float): Seconds between two backfills while connected, 0 only backfills on connect.
+    # reconnect_delay (float): First wait before reconnecting, doubled after each failed attempt.
+    # max_reconnect_delay (float): Longest wait before reconnecting.
+    # progress_interval (float): Seconds between progress lines.
+    # metrics_file (str): Export metrics to this file (.prom for Prometheus, otherwise JSON lines).
+    # username, api_id, api_hash: Telegram credentials, the session file is named after the username.
+    # client_factory (callable): Builds the client like TelegramClient(username, api_id, api_hash).
+    #
+    # Usage:
+    # ingester = LiveIngester(['@ChannelA', '@ChannelB'], 'data/final', flush_interval=30)
+    # asyncio.run(ingester.run())  # until Ctrl+C, the buffer is flushed on the way out
+
+    def __init__(self, channels, folder, flush_interval=30, max_rows=10000, backfill_interval=600,
+                 reconnect_delay=5, max_reconnect_delay=300, progress_interval=60, metrics_file=None,
+                 username=username, api_id=api_id, api_hash=api_hash, client_factory=None):
+        self.channels = list(dict.fromkeys(channels))
+        self.folder = folder
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.backfill_interval = backfill_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.username = username
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.client_factory = client_factory or TelegramClient
+
+        os.makedirs(folder, exist_ok=True)
+        self.state_path = os.path.join(folder, STATE_FILENAME)
+        self.written = self._load_state()  # channel -> newest message ID in a partition
+        self.received = {channel: set() for channel in self.channels}  # IDs of new messages since the last backfill
+        self.buffer = {}  # (channel, message ID) -> row
+        self.peers = {}  # chat ID of the events -> channel
+        self.partitions = []
+        self.connections = 0
+
+        self.metrics = ScrapeMetrics()
+        for channel in self.channels:
+            self.metrics.start_channel(channel)
+        self.reporter = ProgressReporter(self.metrics, interval=progress_interval, exporter=make_exporter(metrics_file))
+        self._flush_now = None
+        self._lock = None
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding='utf-8') as f:
+            return {channel: int(message_id) for channel, message_id in json.load(f).get('last_message_id', {}).items()}
+
+    def _save_state(self):
+        temporary = self.state_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'last_message_id': self.written}, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.state_path)
+
+    def add(self, channel, message, edited=False):
+
+        # Buffers one message; edits replace the buffered version and do not count as received.
+
+        self.buffer[(channel, message.id)] = build_row(channel, message, [])
+        if not edited:
+            self.received[channel].add(message.id)
+        self.metrics.record_message(message.date, channel=channel)
+        if len(self.buffer) >= self.max_rows and self._flush_now is not None:
+            self._flush_now.set()
+
+    async def _on_new_message(self, event):
+        channel = self.peers.get(event.chat_id)
+        if channel is not None:
+            self.add(channel, event.message)
+
+    async def _on_edit(self, event):
+        channel = self.peers.get(event.chat_id)
+        if channel is not None:
+            self.add(channel, event.message, edited=True)
+
+    def _write_partition(self, rows):
+        path = os.path.join(self.folder, f'LIVE_{datetime.now(timezone.utc):%Y%m%d-%H%M%S-%f}.parquet')
+        # combine only lists *.parquet files, so a partition is never read half written
+        temporary = path + '.tmp'
+        pd.DataFrame(rows).to_parquet(temporary, index=False)
+        os.replace(temporary, path)
+        return path
+
+    async def flush(self):
+
+        # Writes the buffered rows as a new partition and records the newest message ID of each channel.
+
+        # Returns:
+        # str: Path of the partition, or None if the buffer was empty.
+
+        async with self._lock:
+            if not self.buffer:
+                return None
+            buffer, self.buffer = self.buffer, {}
+            path = await asyncio.to_thread(self._write_partition, list(buffer.values()))
+            for channel, message_id in buffer:
+                # An edit of a message that was never received as new must not skip the gap before it
+                if message_id in self.received[channel] and message_id > self.written.get(channel, 0):
+                    self.written[channel] = message_id
+            self._save_state()
+            self.partitions.append(path)
+            self.metrics.record_file(path)
+            print(f'{len(buffer)} posts written to {os.path.basename(path)}')
+            return path
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+            self.reporter.update()
+
+    async def backfill(self, client, since):
+
+        # Fetches the messages every channel received after the given IDs, skipping those already received.
+
+        # Parameters:
+        # client (TelegramClient): The connected client.
+        # since (dict): Channel -> message ID to backfill from; channels without one are followed from now on.
+
+        # Returns:
+        # int: Number of messages that had been missed.
+
+        total = 0
+        for channel in self.channels:
+            try:
+                last_id = since.get(channel)
+                if last_id is None:
+                    # First start: follow the channel from its newest message on
+                    async for message in client.iter_messages(channel, limit=1):
+                        last_id = message.id
+                    self.written.setdefault(channel, last_id or 0)
+                    self._save_state()
+                    continue
+                count = 0
+                async for message in client.iter_messages(channel, min_id=last_id, reverse=True):
+                    if message.id not in self.received[channel]:
+                        self.add(channel, message)
+                        count += 1
+                if count:
+                    print(f'[{channel}] {count} missed messages backfilled after message {last_id}')
+                total += count
+            except Exception as e:
+                print(f'{channel} backfill error: {e}')
+        return total
+
+    async def _listen(self, client, stop):
+        self.peers = {}
+        for channel in self.channels:
+            try:
+                self.peers[await client.get_peer_id(channel)] = channel
+            except Exception as e:
+                print(f'{channel} error: {e}')
+        # Events arriving during the backfill move self.written forward, so it is backfilled from the IDs
+        # written before subscribing; messages received twice share a buffer key.
+        since = dict(self.written)
+        client.add_event_handler(self._on_new_message, events.NewMessage(chats=self.channels))
+        client.add_event_handler(self._on_edit, events.MessageEdited(chats=self.channels))
+        self.connections += 1
+
+        disconnected = asyncio.ensure_future(client.run_until_disconnected())
+        stopped = asyncio.ensure_future(stop.wait())
+        try:
+            listening = False
+            while True:
+                # The next backfill starts where this one started, covering gaps telethon's own reconnects leave
+                checkpoint = dict(self.written)
+                await self.backfill(client, since)
+                since = {channel: checkpoint.get(channel, message_id) for channel, message_id in self.written.items()}
+                for channel, received in self.received.items():
+                    self.received[channel] = {message_id for message_id in received
+                                              if message_id > since.get(channel, 0)}
+                if not listening:
+                    print(f'Listening to {len(self.peers)} channels...')
+                    listening = True
+                done, _ = await asyncio.wait({disconnected, stopped}, timeout=self.backfill_interval or None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if done:
+                    break
+        finally:
+            stopped.cancel()
+            disconnected.cancel()
+
+    async def run(self, stop=None):
+
+        # Listens until `stop` is set (or the task is cancelled), reconnecting and backfilling after every disconnect.
+
+        # Parameters:
+        # stop (asyncio.Event): Optional event ending the daemon.
+
+        stop = stop or asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self.metrics.watch_flood_waits()
+        flusher = asyncio.create_task(self._flush_periodically())
+        delay = self.reconnect_delay
+        try:
+            while not stop.is_set():
+                connections = self.connections
+                try:
+                    async with self.client_factory(self.username, self.api_id, self.api_hash) as client:
+                        self.metrics.instrument(client)
+                        await self._listen(client, stop)
+                except Exception as e:
+                    print(f'Connection error: {e}')
+                if stop.is_set():
+                    break
+                # Back off only while reconnecting fails
+                delay = self.reconnect_delay if self.connections > connections else min(delay * 2,
+                                                                                        self.max_reconnect_delay)
+                print(f'Disconnected, reconnecting in {delay:.0f}s...')
+                try:
+                    await asyncio.wait_for(stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await flusher
+            await self.flush()
+            self.metrics.stop_watching_flood_waits()
+            self.reporter.update(force=True)
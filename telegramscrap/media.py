@@ -0,0 +1,280 @@
+"""
+Media Download Pipeline
+-----------------------
+Optional media stage for scraper.py: downloads photos, videos, audio and documents through a bounded
+pool of asyncio workers that runs next to message iteration, so text scraping never waits for a file.
+
+- Files are stored content-addressed: <media_folder>/sha256/<2 chars>/<2 chars>/<sha256><ext>.
+  Identical bytes forwarded across channels are stored once.
+- Telegram keeps the same photo/document id when media is forwarded, so media_index.jsonl maps those ids
+  to stored files and already known media is never downloaded again, in this run or the next ones.
+- Per-type size limits are checked against the size Telegram reports, before anything is downloaded.
+- One downloader can serve several sessions: every message is downloaded with the client that fetched it,
+  and drain(group) waits for the downloads of one channel only, so its file can be saved while others go on.
+- Every scraped row gets 'Media Type', 'Media Status', 'Media Path', 'Media Size', 'Media Mime' and 'Media SHA256'.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+MB = 1024 ** 2
+
+# Default maximum size per media type, in bytes (None means no limit)
+DEFAULT_SIZE_LIMITS = {
+    'photo': 20 * MB,
+    'video': 200 * MB,
+    'audio': 50 * MB,
+    'document': 50 * MB,
+}
+
+MEDIA_COLUMNS = ['Media Type', 'Media Status', 'Media Path', 'Media Size', 'Media Mime', 'Media SHA256']
+
+
+def media_type(message):
+
+    # Returns the media type of a message: 'photo', 'video', 'audio', 'document', or None when there is no
+    # downloadable file (no media, web page previews, polls, locations...).
+
+    if getattr(message, 'photo', None):
+        return 'photo'
+    if getattr(message, 'video', None) or getattr(message, 'gif', None) or getattr(message, 'video_note', None):
+        return 'video'
+    if getattr(message, 'audio', None) or getattr(message, 'voice', None):
+        return 'audio'
+    if getattr(message, 'document', None):
+        return 'document'
+    return None
+
+
+def media_key(message):
+
+    # Returns a stable id for the file attached to a message ('photo:123' / 'document:456'), shared by forwards.
+
+    photo = getattr(message, 'photo', None)
+    if photo is not None and getattr(photo, 'id', None) is not None:
+        return f'photo:{photo.id}'
+    document = getattr(message, 'document', None)
+    if document is not None and getattr(document, 'id', None) is not None:
+        return f'document:{document.id}'
+    return None
+
+
+def empty_media_fields(message=None):
+
+    # Returns the media columns for a row before (or without) downloading.
+
+    fields = dict.fromkeys(MEDIA_COLUMNS)
+    if message is not None and getattr(message, 'media', None):
+        fields['Media Type'] = media_type(message)
+        fields['Media Status'] = 'pending' if fields['Media Type'] else 'not_downloadable'
+    return fields
+
+
+def _hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class MediaDownloader:
+
+    # Bounded pool of asyncio workers downloading message media into content-addressed storage.
+    #
+    # Parameters:
+    # client (TelegramClient): Connected client used for downloads.
+    # media_folder (str): Root folder of the media store.
+    # concurrency (int): Number of downloads running at the same time.
+    # size_limits (dict): Maximum size in bytes per media type (see DEFAULT_SIZE_LIMITS), None for no limit.
+    # media_types (iterable): Media types to download, default all of DEFAULT_SIZE_LIMITS.
+    #
+    # Usage:
+    # downloader = MediaDownloader(client, 'media', concurrency=4)
+    # downloader.start()
+    # downloader.submit(message, row)  # row is the dict appended to the scraped data, updated in place
+    # await downloader.close()         # waits for the queued downloads
+    #
+    # With a session pool, share one downloader so the index and the in-flight downloads are shared too:
+    # downloader.submit(message, row, client=session.client, group=channel)
+    # await downloader.drain(channel)  # before saving the channel's rows
+
+    def __init__(self, client, media_folder, concurrency=4, size_limits=None, media_types=None):
+        self.client = client
+        self.media_folder = media_folder
+        self.concurrency = concurrency
+        self.size_limits = dict(DEFAULT_SIZE_LIMITS, **(size_limits or {}))
+        self.media_types = set(media_types) if media_types else set(DEFAULT_SIZE_LIMITS)
+        self.index_path = os.path.join(media_folder, 'media_index.jsonl')
+        # Downloads land in a folder of this downloader only, close() removes it
+        self.tmp_folder = os.path.join(media_folder, 'tmp', uuid.uuid4().hex)
+        self.index = self._load_index()
+        self.in_flight = {}
+        self.pending = {}  # group -> futures of its queued downloads
+        self.group_bytes = {}  # group -> bytes stored for it
+        self.queue = asyncio.Queue()
+        self.workers = []
+        self.bytes_downloaded = 0
+        self.downloads = 0
+        self.cache_hits = 0
+
+    def _load_index(self):
+        index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        index[entry['key']] = entry
+        return index
+
+    def _append_index(self, entry):
+        self.index[entry['key']] = entry
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def start(self):
+        os.makedirs(self.tmp_folder, exist_ok=True)
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def submit(self, message, row, client=None, group=None):
+
+        # Queues the media of `message` and returns immediately. `row` gets the MEDIA_COLUMNS fields
+        # right away ('pending') and is updated in place once the download is done.
+
+        # Parameters:
+        # client (TelegramClient): Client that fetched the message, default the downloader's client.
+        # group (str): Name the download is waited for with drain(), e.g. the channel.
+
+        row.update(empty_media_fields(message))
+        if row['Media Status'] != 'pending':
+            return
+        if row['Media Type'] not in self.media_types:
+            row['Media Status'] = 'skipped'
+            return
+        done = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(group, set()).add(done)
+        done.add_done_callback(self.pending[group].discard)
+        # Downloads run in the context of the submitter, so metrics charge their API calls to its channel
+        self.queue.put_nowait((message, row, client or self.client, group, done, contextvars.copy_context()))
+
+    async def drain(self, group=None):
+
+        # Waits for the queued downloads of one group.
+
+        # Returns:
+        # int: Bytes stored for the group since the last drain.
+
+        pending = list(self.pending.pop(group, ()))
+        if pending:
+            await asyncio.gather(*pending)
+        return self.group_bytes.pop(group, 0)
+
+    async def close(self):
+
+        # Waits for every queued download, then stops the workers.
+
+        await self.queue.join()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        shutil.rmtree(self.tmp_folder, ignore_errors=True)
+
+    async def _worker(self):
+        while True:
+            message, row, client, group, done, context = await self.queue.get()
+            try:
+                fetch = self._fetch(message, row['Media Type'], client, group)
+                row.update(await context.run(asyncio.ensure_future, fetch))
+            except Exception as e:
+                row['Media Status'] = 'error'
+                print(f'Error downloading media: {e}')
+            finally:
+                if not done.done():
+                    done.set_result(None)
+                self.queue.task_done()
+
+    async def _fetch(self, message, kind, client=None, group=None):
+        key = media_key(message)
+        entry = self.index.get(key) if key else None
+        if entry and os.path.exists(os.path.join(self.media_folder, entry['path'])):
+            self.cache_hits += 1
+            return self._fields(entry, kind, 'cached')
+
+        file = getattr(message, 'file', None)
+        size = getattr(file, 'size', None)
+        limit = self.size_limits.get(kind)
+        if limit is not None and size is not None and size > limit:
+            return {'Media Status': 'too_large', 'Media Size': size, 'Media Mime': getattr(file, 'mime_type', None)}
+
+        # The same media forwarded twice in one run is only downloaded once
+        if key and key in self.in_flight:
+            entry = await asyncio.shield(self.in_flight[key])
+            self.cache_hits += 1
+            return self._fields(entry, kind, 'cached')
+
+        future = asyncio.get_running_loop().create_future()
+        if key:
+            self.in_flight[key] = future
+        try:
+            entry = await self._download(message, key, file, client or self.client, group)
+            future.set_result(entry)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when nobody else is waiting on it
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+        return self._fields(entry, kind, 'downloaded')
+
+    async def _download(self, message, key, file, client, group=None):
+        temporary_path = os.path.join(self.tmp_folder, uuid.uuid4().hex)
+        downloaded_path = await client.download_media(message, file=temporary_path)
+        if not downloaded_path:
+            raise ValueError(f'nothing downloaded for message {getattr(message, "id", "?")}')
+
+        # Hashing and moving are disk bound, keep them off the event loop
+        sha256 = await asyncio.to_thread(_hash_file, downloaded_path)
+        extension = getattr(file, 'ext', None) or os.path.splitext(downloaded_path)[1]
+        relative_path = os.path.join('sha256', sha256[:2], sha256[2:4], sha256 + (extension or ''))
+        final_path = os.path.join(self.media_folder, relative_path)
+        size = os.path.getsize(downloaded_path)
+
+        if os.path.exists(final_path):
+            os.remove(downloaded_path)  # Same bytes already stored under another media id
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(downloaded_path, final_path)
+            self.bytes_downloaded += size
+            self.group_bytes[group] = self.group_bytes.get(group, 0) + size
+        self.downloads += 1
+
+        entry = {
+            'key': key or f'sha256:{sha256}',
+            'sha256': sha256,
+            'path': relative_path.replace(os.sep, '/'),
+            'size': size,
+            'mime': getattr(file, 'mime_type', None),
+        }
+        self._append_index(entry)
+        return entry
+
+    @staticmethod
+    def _fields(entry, kind, status):
+        return {
+            'Media Type': kind,
+            'Media Status': status,
+            'Media Path': entry['path'],
+            'Media Size': entry['size'],
+            'Media Mime': entry['mime'],
+            'Media SHA256': entry['sha256'],
+        }
@@ -0,0 +1,320 @@
+"""
+Scrape Metrics and Progress Reporting
+-------------------------------------
+Counters and a throttled progress line for scraper.py, replacing the per-message print block.
+
+- ScrapeMetrics keeps per-channel counters: messages, comments, API calls, flood-wait seconds and bytes written.
+- API calls are counted by wrapping the client's request method; flood waits are read from telethon's
+  "Sleeping for Ns on X flood wait" log records, so nothing in telethon needs to be patched.
+- When several channels are scraped at once, each task calls use_channel(), so the API calls and flood waits
+  made from that task are charged to its channel.
+- ProgressReporter prints one line at most every `interval` seconds, with rates and an ETA based on how much
+  of the date window has been walked (scraper.py walks each channel from the newest message back).
+- JsonLinesExporter and PrometheusTextExporter write the same snapshots to a file for long runs,
+  e.g. to tail or to feed node_exporter's textfile collector.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+TELETHON_FLOOD_LOGGER = 'telethon.client.users'
+
+# Channel scraped by the running asyncio task (see ScrapeMetrics.use_channel)
+_task_channel = contextvars.ContextVar('scrape_channel', default=None)
+
+
+# Function to format time in days, hours, minutes, and seconds
+def format_time(seconds):
+    days = seconds // 86400
+    hours = (seconds % 86400) // 3600
+    minutes = (seconds % 3600) // 60
+    seconds = seconds % 60
+    return f'{int(days):02}:{int(hours):02}:{int(minutes):02}:{int(seconds):02}'
+
+
+class ChannelMetrics:
+
+    # Counters for a single channel.
+
+    def __init__(self, channel, date_min=None, date_max=None):
+        self.channel = channel
+        self.date_min = date_min
+        self.date_max = date_max
+        self.messages = 0
+        self.comments = 0
+        self.api_calls = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+        self.bytes_written = 0
+        self.last_date = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    def progress(self):
+
+        # Returns the fraction of the date window already walked (0 to 1), or None if the window is unknown.
+
+        if self.finished_at is not None:
+            return 1.0
+        if self.last_date is None or self.date_min is None or self.date_max is None:
+            return None
+        window = (self.date_max - self.date_min).total_seconds()
+        if window <= 0:
+            return None
+        walked = (self.date_max - self.last_date).total_seconds()
+        return min(max(walked / window, 0.0), 1.0)
+
+    def snapshot(self):
+        elapsed = self.elapsed()
+        progress = self.progress()
+        eta = elapsed / progress - elapsed if progress else None
+        return {
+            'channel': self.channel,
+            'messages': self.messages,
+            'comments': self.comments,
+            'api_calls': self.api_calls,
+            'flood_waits': self.flood_waits,
+            'flood_wait_seconds': self.flood_wait_seconds,
+            'bytes_written': self.bytes_written,
+            'elapsed_seconds': elapsed,
+            'messages_per_second': self.messages / elapsed if elapsed else 0.0,
+            'comments_per_second': self.comments / elapsed if elapsed else 0.0,
+            'progress': progress,
+            'eta_seconds': eta,
+            'finished': self.finished_at is not None,
+        }
+
+
+class ScrapeMetrics:
+
+    # Per-channel counters for a scraping session. The record_* methods update the channel passed as
+    # `channel`, or by default the channel set with use_channel() in the running task, or else the one passed
+    # to the last start_channel() call.
+
+    def __init__(self):
+        self.channels = {}
+        self.current = None
+        self._flood_handler = None
+
+    def start_channel(self, channel, date_min=None, date_max=None):
+        self.current = ChannelMetrics(channel, date_min, date_max)
+        self.channels[channel] = self.current
+        return self.current
+
+    def use_channel(self, channel):
+
+        # Charges what the running asyncio task (and the tasks it starts from now on) records to `channel`.
+
+        _task_channel.set(channel)
+
+    def _target(self, channel=None):
+        channel = channel if channel is not None else _task_channel.get()
+        return self.channels.get(channel, self.current) if channel is not None else self.current
+
+    def finish_channel(self, channel=None):
+        target = self._target(channel)
+        if target is not None:
+            target.finished_at = time.time()
+
+    def record_message(self, date=None, comments=0, channel=None):
+        target = self._target(channel)
+        target.messages += 1
+        target.comments += comments
+        if date is not None:
+            target.last_date = date
+
+    def record_api_call(self, channel=None):
+        target = self._target(channel)
+        if target is not None:
+            target.api_calls += 1
+
+    def record_flood_wait(self, seconds, channel=None):
+        target = self._target(channel)
+        if target is not None:
+            target.flood_waits += 1
+            target.flood_wait_seconds += seconds
+
+    def record_file(self, path, channel=None):
+        if os.path.exists(path):
+            self.record_bytes(os.path.getsize(path), channel)
+
+    def record_bytes(self, size, channel=None):
+        target = self._target(channel)
+        if target is not None:
+            target.bytes_written += size
+
+    def instrument(self, client):
+
+        # Counts every API request made through `client` by wrapping its request method on this instance only.
+
+        # Parameters:
+        # client (TelegramClient): A connected telethon client (or a fake one exposing `_call`).
+
+        # Returns:
+        # TelegramClient: The same client.
+
+        call = getattr(client, '_call', None)
+        if call is None:
+            return client
+
+        async def counted_call(*args, **kwargs):
+            self.record_api_call()
+            return await call(*args, **kwargs)
+
+        client._call = counted_call
+        return client
+
+    def watch_flood_waits(self):
+
+        # Starts reading flood waits from telethon's log records. Call stop_watching_flood_waits() when done.
+
+        if self._flood_handler is None:
+            self._flood_handler = _FloodWaitLogHandler(self)
+            logger = logging.getLogger(TELETHON_FLOOD_LOGGER)
+            logger.addHandler(self._flood_handler)
+            if not logger.isEnabledFor(logging.INFO):
+                logger.setLevel(logging.INFO)
+
+    def stop_watching_flood_waits(self):
+        if self._flood_handler is not None:
+            logging.getLogger(TELETHON_FLOOD_LOGGER).removeHandler(self._flood_handler)
+            self._flood_handler = None
+
+    def snapshot(self):
+
+        # Returns all counters as a dict: one entry per channel plus the session totals.
+
+        channels = [metrics.snapshot() for metrics in self.channels.values()]
+        elapsed = sum(channel['elapsed_seconds'] for channel in channels)
+        total = {key: sum(channel[key] for channel in channels)
+                 for key in ('messages', 'comments', 'api_calls', 'flood_waits', 'flood_wait_seconds', 'bytes_written')}
+        total['elapsed_seconds'] = elapsed
+        total['messages_per_second'] = total['messages'] / elapsed if elapsed else 0.0
+        total['comments_per_second'] = total['comments'] / elapsed if elapsed else 0.0
+        return {'timestamp': datetime.now(timezone.utc).isoformat(), 'channels': channels, 'total': total}
+
+
+class _FloodWaitLogHandler(logging.Handler):
+
+    # Turns telethon's "Sleeping for %ds (%s) on %s flood wait" records into record_flood_wait() calls.
+
+    def __init__(self, metrics):
+        super().__init__(logging.INFO)
+        self.metrics = metrics
+
+    def emit(self, record):
+        if isinstance(record.msg, str) and record.msg.endswith('flood wait') and len(record.args or ()) >= 2:
+            self.metrics.record_flood_wait(float(record.args[1]))
+
+
+class JsonLinesExporter:
+
+    # Appends one JSON snapshot per report to `path`.
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, snapshot):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, default=str) + '\n')
+
+
+class PrometheusTextExporter:
+
+    # Rewrites `path` with the latest snapshot in the Prometheus text exposition format.
+
+    METRICS = [
+        ('messages', 'telegramscrap_messages_total', 'counter', 'Messages scraped.'),
+        ('comments', 'telegramscrap_comments_total', 'counter', 'Comments scraped.'),
+        ('api_calls', 'telegramscrap_api_calls_total', 'counter', 'Telegram API requests made.'),
+        ('flood_wait_seconds', 'telegramscrap_flood_wait_seconds_total', 'counter', 'Seconds spent in flood waits.'),
+        ('bytes_written', 'telegramscrap_bytes_written_total', 'counter', 'Bytes written to output files.'),
+        ('messages_per_second', 'telegramscrap_messages_per_second', 'gauge', 'Messages scraped per second.'),
+        ('comments_per_second', 'telegramscrap_comments_per_second', 'gauge', 'Comments scraped per second.'),
+    ]
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, snapshot):
+        lines = []
+        for key, name, metric_type, help_text in self.METRICS:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for channel in snapshot['channels']:
+                label = channel['channel'].replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{channel="{label}"}} {channel[key]}')
+        # Write then rename, so a scraper never reads a half written file
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temporary_path, self.path)
+
+
+def make_exporter(path):
+
+    # Picks the exporter from the file extension: '.prom' for Prometheus text, anything else for JSON lines.
+
+    # Parameters:
+    # path (str): Output file, or an empty string / None to disable exporting.
+
+    # Returns:
+    # JsonLinesExporter, PrometheusTextExporter or None.
+
+    if not path:
+        return None
+    if path.endswith('.prom'):
+        return PrometheusTextExporter(path)
+    return JsonLinesExporter(path)
+
+
+class ProgressReporter:
+
+    # Prints progress lines for the running channels at most every `interval` seconds and
+    # forwards the same snapshot to the exporter, if any.
+    #
+    # Parameters:
+    # metrics (ScrapeMetrics): Counters to report.
+    # interval (float): Minimum seconds between two reports. 0 reports on every update.
+    # exporter: Optional JsonLinesExporter / PrometheusTextExporter.
+    # stream: Where progress lines are printed (default: sys.stdout).
+
+    def __init__(self, metrics, interval=5.0, exporter=None, stream=None):
+        self.metrics = metrics
+        self.interval = interval
+        self.exporter = exporter
+        self.stream = stream
+        self._last_report = 0.0
+
+    def update(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        snapshot = self.metrics.snapshot()
+        # One line per channel still running (several when channels are scraped on a session pool)
+        running = [channel for channel in snapshot['channels'] if not channel['finished']]
+        if not running and self.metrics.current is not None:
+            running = [self.metrics.current.snapshot()]
+        for channel in running:
+            print(self.format_line(channel), file=self.stream or sys.stdout)
+        if self.exporter is not None:
+            self.exporter.export(snapshot)
+
+    @staticmethod
+    def format_line(channel):
+        line = (f'[{channel["channel"]}] {channel["messages"]:,} messages ({channel["messages_per_second"]:.1f}/s)'
+                f' | {channel["comments"]:,} comments ({channel["comments_per_second"]:.1f}/s)'
+                f' | {channel["api_calls"]:,} API calls | flood wait {channel["flood_wait_seconds"]:.0f}s'
+                f' | elapsed {format_time(channel["elapsed_seconds"])}')
+        if channel['progress'] is not None and not channel['finished']:
+            line += f' | {channel["progress"]:.1%} of window | ETA {format_time(channel["eta_seconds"] or 0)}'
+        return line
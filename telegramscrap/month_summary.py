@@ -1,6 +1,7 @@
 import pandas as pd
 from tqdm import tqdm
 import os
+from .corpus import read_corpus
 
 def create_group_month_summary(folder_path, input_filename, output_filename_base, date_col, group_col, comments_col):
     
@@ -44,7 +45,8 @@ def create_group_month_summary(folder_path, input_filename, output_filename_base
     try:
         # Load the Parquet file into a DataFrame
         input_file_path = os.path.join(folder_path, input_filename)
-        df = pd.read_parquet(input_file_path)
+        # Only the three columns used are loaded
+        df = read_corpus(input_file_path, columns=[date_col, group_col, comments_col])
 
         # Convert the 'Date' column to datetime
         df[date_col] = pd.to_datetime(df[date_col])
@@ -87,14 +89,3 @@ def create_group_month_summary(folder_path, input_filename, output_filename_base
         print(f"Total summary table saved as: {output_file_path_total}")
     except Exception as e:
         print(f"An error occurred: {e}")
-
-
-# Usage
-create_group_month_summary(
-    folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira', # Example
-    input_filename='unified_data_telegram.parquet', # Example
-    output_filename_base='resume', # Example
-    date_col='Date',
-    group_col='Group',
-    comments_col='Comments'
-)
@@ -0,0 +1,385 @@
+"""
+Cached Pipeline Runner
+----------------------
+Runs scrape -> combine -> analyses as a dependency graph and only reruns the stages whose inputs
+or parameters changed since their last successful run.
+
+- Every stage declares its input files, output files (glob patterns are allowed) and parameters.
+- A stage's fingerprint hashes its name, parameters and the content of its inputs. Content hashes are
+  cached by (size, mtime), so unchanged files are not read again.
+- A stage is skipped when its fingerprint matches the last run and its outputs are still on disk and
+  unchanged. Since fingerprints use content, a combine run that produces the same file leaves the
+  analyses downstream fresh.
+- Stages whose dependencies are done run in parallel in separate processes (e.g. hyperlinks and the
+  month summary). Each stage's output goes to <folder>/.pipeline/<stage>.log.
+- The state is kept in <folder>/.pipeline/state.json.
+
+Example:
+python -m telegramscrap pipeline --folder data --final-folder data/final --keywords Trump Biden Kamala
+"""
+
+import contextlib
+import glob
+import hashlib
+import importlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+from .filenames import COMMENTS_FILENAME, UNIFIED_FILENAME
+
+STATE_FOLDER = '.pipeline'
+DEFAULT_STAGES = ['combine', 'month_summary', 'keywords', 'hyperlinks', 'snowball', 'sampling', 'engagement',
+                  'channel_graph', 'authors', 'trends']
+
+
+class Stage:
+
+    # One step of the pipeline.
+
+    # Parameters:
+    # name (str): Unique stage name.
+    # function (str): 'module:function' to call, relative to the telegramscrap package. It is imported in the
+    #                 worker process, so parents never load the stage's dependencies.
+    # kwargs (dict): Arguments of the function. They are part of the fingerprint.
+    # inputs (list of str): Files (or glob patterns) the stage reads.
+    # outputs (list of str): Files (or glob patterns) the stage writes, each has to exist after a run.
+    # deps (list of str): Stages that have to finish first.
+
+    def __init__(self, name, function, kwargs=None, inputs=(), outputs=(), deps=()):
+        self.name = name
+        self.function = function
+        self.kwargs = kwargs or {}
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+
+    def __repr__(self):
+        return f'Stage({self.name!r})'
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        elif os.path.exists(pattern):
+            paths.append(pattern)
+    return paths
+
+
+def missing_outputs(patterns):
+    return [pattern for pattern in patterns if not expand_paths([pattern])]
+
+
+class FileHashCache:
+
+    # sha256 of files, remembered together with their size and mtime so unchanged files are hashed only once.
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def hash(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self.entries.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self.entries[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def hash_files(self, patterns):
+        return {os.path.relpath(path): self.hash(path) for path in expand_paths(patterns)}
+
+
+def stage_fingerprint(stage, hashes):
+
+    # Hashes the stage name, function, parameters and the content of its inputs into one hex digest.
+
+    payload = {
+        'name': stage.name,
+        'function': stage.function,
+        'kwargs': stage.kwargs,
+        'inputs': hashes.hash_files(stage.inputs),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _run_stage(function, kwargs, log_path):
+
+    # Runs one stage in a worker process, with its prints and progress bars going to log_path.
+
+    module_name, function_name = function.split(':')
+    start = time.perf_counter()
+    cwd = os.getcwd()  # Workers are reused, so a stage changing directory must not affect the next one
+    try:
+        with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            func = getattr(importlib.import_module(f'telegramscrap.{module_name}'), function_name)
+            func(**kwargs)
+    finally:
+        os.chdir(cwd)
+    return time.perf_counter() - start
+
+
+def run_scrape_stage(final_folder, **kwargs):
+    # scrape() writes its FINAL files to the working directory, which is this worker's own
+    import asyncio
+    from .scraper import scrape, scrape_with_sessions
+
+    os.makedirs(final_folder, exist_ok=True)
+    os.chdir(final_folder)
+    if kwargs.get('sessions'):
+        asyncio.run(scrape_with_sessions(**kwargs))
+    else:
+        kwargs.pop('sessions', None)
+        asyncio.run(scrape(**kwargs))
+
+
+class Pipeline:
+
+    # Runs a list of stages in dependency order, skipping the fresh ones.
+
+    # Parameters:
+    # stages (list of Stage): The stages; deps have to name stages in the list.
+    # folder (str): Where the state and the stage logs are kept (in a .pipeline subfolder).
+    # jobs (int): Maximum number of stages running at once.
+
+    def __init__(self, stages, folder, jobs=None):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            unknown = [dep for dep in stage.deps if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stages {unknown}")
+        self.order = self._topological_order()
+        self.state_folder = os.path.join(folder, STATE_FOLDER)
+        self.state_path = os.path.join(self.state_folder, 'state.json')
+        self.jobs = jobs or os.cpu_count() or 1
+        self.state = self._load_state()
+        self.hashes = FileHashCache(self.state.get('files'))
+
+    def _topological_order(self):
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage {name!r}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}, 'stages': {}}
+
+    def _save_state(self):
+        os.makedirs(self.state_folder, exist_ok=True)
+        self.state['files'] = self.hashes.entries
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def is_fresh(self, stage, fingerprint):
+        record = self.state['stages'].get(stage.name)
+        if not record or record['fingerprint'] != fingerprint:
+            return False
+        if missing_outputs(stage.outputs):
+            return False
+        return self.hashes.hash_files(stage.outputs) == record['outputs']
+
+    def status(self):
+
+        # Returns {stage: 'fresh' or 'stale'}, assuming the stages upstream do not change their outputs.
+
+        return {name: 'fresh' if self.is_fresh(self.stages[name], stage_fingerprint(self.stages[name], self.hashes))
+                else 'stale' for name in self.order}
+
+    def run(self, force=()):
+
+        # Runs the stale stages and returns {stage: 'fresh', 'done', 'failed' or 'skipped'}.
+
+        # Parameters:
+        # force (iterable of str): Stages to rerun even when they are fresh.
+
+        os.makedirs(self.state_folder, exist_ok=True)
+        results = {}
+        running = {}
+        force = set(force)
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            while len(results) < len(self.order):
+                for name in self.order:
+                    stage = self.stages[name]
+                    if name in results or name in (running_name for running_name, _ in running.values()):
+                        continue
+                    dep_results = [results.get(dep) for dep in stage.deps]
+                    if any(result in ('failed', 'skipped') for result in dep_results):
+                        results[name] = 'skipped'
+                        print(f'[{name}] skipped, a dependency failed')
+                        continue
+                    if None in dep_results:
+                        continue
+
+                    # Inputs are only hashed once the stages producing them have finished
+                    fingerprint = stage_fingerprint(stage, self.hashes)
+                    if name not in force and self.is_fresh(stage, fingerprint):
+                        results[name] = 'fresh'
+                        print(f'[{name}] up to date')
+                        continue
+
+                    print(f'[{name}] running...')
+                    log_path = os.path.join(self.state_folder, f'{name}.log')
+                    running[executor.submit(_run_stage, stage.function, stage.kwargs, log_path)] = (name, fingerprint)
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, fingerprint = running.pop(future)
+                    results[name] = self._finish(self.stages[name], future, fingerprint)
+                    self._save_state()
+
+        self._save_state()
+        return results
+
+    def _finish(self, stage, future, fingerprint):
+        log_path = os.path.join(self.state_folder, f'{stage.name}.log')
+        try:
+            seconds = future.result()
+        except Exception as e:
+            print(f'[{stage.name}] failed: {e!r} (see {log_path})')
+            return 'failed'
+        # Most analysis functions print their errors instead of raising, so a run only counts if its outputs exist
+        missing = missing_outputs(stage.outputs)
+        if missing:
+            print(f'[{stage.name}] failed: missing outputs {missing} (see {log_path})')
+            return 'failed'
+        self.state['stages'][stage.name] = {
+            'fingerprint': fingerprint,
+            'outputs': self.hashes.hash_files(stage.outputs),
+            'seconds': round(seconds, 3),
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+        }
+        print(f'[{stage.name}] done in {seconds:.2f}s')
+        return 'done'
+
+
+def build_stages(folder, final_folder, keywords=None, channels=None, date_min=None, date_max=None, key_search='',
+                 sessions=None, file_format='parquet', sample_size=10000, topics_sample_size=10000,
+                 min_cluster_size=50, stages=None):
+
+    # Builds the default scrape -> combine -> analyses graph.
+
+    # Parameters:
+    # folder (str): Where the unified file and the analysis outputs are written.
+    # final_folder (str): Where the FINAL_*.parquet files of the scrape are (and are written to).
+    # keywords (list of str): Keywords of the keyword filter, the stage is left out without them.
+    # channels (list of str): Channels to scrape, the scrape stage is left out without them.
+    # date_min, date_max (datetime): Time window of the scrape.
+    # key_search (str): Only scrape messages matching this keyword.
+    # sessions (list of str): Scrape on several sessions (see scrape_with_sessions).
+    # file_format (str): Format of the scraped files ('parquet' is needed by combine).
+    # sample_size (int): Size of the proportional sample.
+    # topics_sample_size (int): Number of documents used for topic modelling.
+    # min_cluster_size (int): HDBSCAN min_cluster_size for topic modelling.
+    # stages (list of str): Stage names to keep (default: DEFAULT_STAGES, plus scrape if channels are given).
+
+    # Returns:
+    # list of Stage: The selected stages.
+
+    # Absolute paths, so stages do not depend on the working directory of the worker running them
+    folder, final_folder = os.path.abspath(folder), os.path.abspath(final_folder)
+    unified = os.path.join(folder, UNIFIED_FILENAME)
+    comments = os.path.join(folder, COMMENTS_FILENAME)
+    # combine reads every .parquet file of final_folder, so it must not write its output there
+    if final_folder == folder:
+        raise ValueError("final_folder has to be different from folder")
+    final_files = os.path.join(final_folder, '*.parquet')
+
+    def analysis(name, function, kwargs, outputs):
+        return Stage(name, function, {'folder_path': folder, 'input_filename': UNIFIED_FILENAME, **kwargs},
+                     inputs=[unified], outputs=[os.path.join(folder, output) for output in outputs], deps=['combine'])
+
+    graph = [
+        Stage('combine', 'combine:combine_parquet_files',
+              {'folder_path': final_folder, 'duplicate_columns': ['Group', 'Message ID'], 'output_file_path': unified},
+              inputs=[final_files], outputs=[unified, comments], deps=['scrape'] if channels else []),
+        analysis('month_summary', 'month_summary:create_group_month_summary',
+                 {'output_filename_base': 'resume', 'date_col': 'Date', 'group_col': 'Group', 'comments_col': 'Comments'},
+                 ['resume_contents.xlsx', 'resume_comments.xlsx', 'resume_total.xlsx']),
+        analysis('hyperlinks', 'hyperlinks:analyze_hyperlinks', {},
+                 ['url_counts.csv', 'domain_counts.csv', 'messages_with_urls.csv']),
+        analysis('snowball', 'snowball:process_file_for_telegram_links', {'output_filename': 'telegram_links.xlsx'},
+                 ['telegram_links.xlsx']),
+        Stage('authors', 'authors:create_author_report', {'folder_path': folder, 'output_filename_base': 'authors'},
+              inputs=[comments], outputs=[os.path.join(folder, f'authors_{name}.csv')
+                                          for name in ('most_active', 'cross_group', 'group_overlap')],
+              deps=['combine']),
+        analysis('channel_graph', 'graph:build_channel_graph', {},
+                 ['channel_edges.csv', 'channel_ranking.csv', 'next_channels.txt']),
+        analysis('sampling', 'sampling:create_sampled_file',
+                 {'text_column': 'Content', 'category_column': 'Group', 'sample_size': sample_size,
+                  'output_filename': 'sampled_data.xlsx', 'min_length': 20},
+                 ['sampled_data.xlsx']),
+        analysis('engagement', 'engagement:create_engagement_report', {'output_filename_base': 'engagement'},
+                 ['engagement_top_reactions.xlsx', 'engagement_top_reactions_by_group.xlsx',
+                  'engagement_by_group_month.xlsx']),
+        analysis('topics', 'topics:run_topic_modelling',
+                 {'sample_size': topics_sample_size, 'min_cluster_size': min_cluster_size},
+                 ['topics.csv', 'documents_with_topics.csv']),
+    ]
+    if keywords:
+        graph.append(analysis('keywords', 'keywords:filter_and_save_by_keywords',
+                              {'output_filename': 'filtered_keywords', 'content_col': 'Content', 'keywords': list(keywords),
+                               'max_rows_per_file': 1000000},
+                              ['filtered_keywords_*.xlsx', 'filtered_keywords_matrix.npz',
+                               'filtered_keywords_cooccurrence.csv', 'filtered_keywords_by_group_*.csv']))
+    # The trends stage keeps its daily counts in trends_daily.parquet, so a rerun after a combine only counts new days
+    graph.append(analysis('trends', 'trends:create_trend_report', {'keywords': list(keywords or [])},
+                          ['trends_day.csv', 'trends_week.csv', 'trends_month.csv', 'trends_daily.parquet']))
+    # Charts need plotly and are not part of DEFAULT_STAGES; run them with stages=[..., 'trend_charts']
+    graph.append(Stage('trend_charts', 'trends:plot_trends', {'folder_path': folder, 'period': 'week'},
+                       inputs=[os.path.join(folder, 'trends_week.csv')],
+                       outputs=[os.path.join(folder, 'trends_week_*.html')], deps=['trends']))
+    if channels:
+        scrape_kwargs = {'final_folder': final_folder, 'file_format': file_format,
+                         'channels': list(channels), 'date_min': date_min, 'date_max': date_max,
+                         'key_search': key_search, 'sessions': sessions}
+        # The scrape is fingerprinted by its parameters only; rerun it with force=['scrape'] to fetch new messages.
+        # Its outputs are the FINAL files of its own channels, so LIVE_* partitions or other FINAL files in the
+        # folder do not make it stale.
+        extension = 'xlsx' if file_format == 'excel' else 'parquet'
+        scrape_outputs = [os.path.join(final_folder, f'FINAL_{glob.escape(channel)}_with_*.{extension}')
+                          for channel in channels]
+        graph.insert(0, Stage('scrape', 'pipeline:run_scrape_stage', scrape_kwargs, outputs=scrape_outputs))
+
+    configured = {stage.name for stage in graph}
+    if stages:
+        selected = set(stages)
+        if selected - configured:
+            raise ValueError(f"Unknown or unconfigured stages: {sorted(selected - configured)}")
+    else:
+        selected = configured & set(DEFAULT_STAGES + ['scrape'])
+    graph = [stage for stage in graph if stage.name in selected]
+    # Dependencies that were not selected are assumed to be up to date
+    for stage in graph:
+        stage.deps = [dep for dep in stage.deps if dep in selected]
+    return graph
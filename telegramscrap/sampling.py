@@ -4,6 +4,7 @@ from tqdm import tqdm
 import numpy as np
 import re
 import json
+from .corpus import read_corpus
 
 def remove_urls(text):
     
@@ -103,7 +104,7 @@ def create_sampled_file(folder_path, input_filename, text_column, category_colum
 
     # Load the Parquet file into a DataFrame
     print("Loading Parquet file...")
-    df = pd.read_parquet(input_file_path)
+    df = read_corpus(input_file_path)
 
     # Filter the data based on text length
     tqdm.pandas(desc="Filtering based on text length")
@@ -126,15 +127,3 @@ def create_sampled_file(folder_path, input_filename, text_column, category_colum
     sample_df.to_excel(output_path, index=False, engine='openpyxl')
 
     print(f"Sampled data saved in file: {output_path}")
-
-
-# Usage
-folder_path = r'C:\Users\Public\PyCharmProjects\Data_Conspira' # Example
-input_filename = "unified_data_telegram.parquet" # Example
-text_column = "Content"
-category_column = "Group"
-sample_size = 10000 # Example
-output_filename = 'sampled_data.xlsx' # Example
-min_length = 20 # Example
-
-create_sampled_file(folder_path, input_filename, text_column, category_column, sample_size, output_filename, min_length)
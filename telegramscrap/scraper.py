@@ -0,0 +1,383 @@
+# Scrapes posts, comments and reactions of Telegram channels with Telethon.
+#
+# Run it from the command line (see `python -m telegramscrap scrape --help`):
+# python -m telegramscrap scrape --channels @ChannelA @ChannelB --date-min 2025-01-20 --date-max 2025-04-30
+#
+# Credentials default to the TELEGRAM_USERNAME, TELEGRAM_API_ID and TELEGRAM_API_HASH environment variables.
+# The api_id and api_hash can only be generated from https://my.telegram.org/apps.
+# During the first run, Telegram may request a verification code. Please monitor your Telegram app and input
+# the required information promptly.
+
+# Initial imports
+import os
+import pandas as pd
+import time
+import json
+import re
+import asyncio
+
+# Telegram imports
+from telethon.sync import TelegramClient
+from telethon.errors import FloodWaitError
+
+# Progress and metrics
+from .metrics import ScrapeMetrics, ProgressReporter, make_exporter
+
+# Optional media stage
+from .media import MediaDownloader
+
+# Multi-account scraping
+from .sessions import SessionPool
+
+# Default credentials, the session file is named after the username
+username = os.environ.get('TELEGRAM_USERNAME', '')
+api_id = os.environ.get('TELEGRAM_API_ID', '')
+api_hash = os.environ.get('TELEGRAM_API_HASH', '')
+
+# Function to remove invalid XML characters from text
+def remove_unsupported_characters(text):
+    valid_xml_chars = (
+        "[^\u0009\u000A\u000D\u0020-\uD7FF\uE000-\uFFFD"
+        "\U00010000-\U0010FFFF]"
+    )
+    cleaned_text = re.sub(valid_xml_chars, '', text)
+    return cleaned_text
+
+# Function to turn message reactions into structured (emoji or custom emoji id, count) entries
+def parse_reactions(reactions):
+    parsed_reactions = []
+    if reactions:
+        for reaction_count in reactions.results:
+            reaction = reaction_count.reaction
+            emoji = getattr(reaction, 'emoticon', None)
+            custom_emoji_id = getattr(reaction, 'document_id', None)  # Custom emoji reactions have no emoticon
+            if emoji is not None:
+                reaction_type = 'emoji'
+            elif custom_emoji_id is not None:
+                reaction_type = 'custom_emoji'
+            else:
+                reaction_type = 'paid' if type(reaction).__name__ == 'ReactionPaid' else 'other'
+            parsed_reactions.append({
+                'Type': reaction_type,
+                'Emoji': emoji,
+                'Custom Emoji ID': custom_emoji_id,
+                'Count': reaction_count.count,
+            })
+    return parsed_reactions
+
+# Function to format structured reactions as the legacy 'Reactions' string, like "👍 12 ❤ 5 "
+def format_reactions(parsed_reactions):
+    emoji_string = ''
+    for reaction in parsed_reactions:
+        if reaction['Emoji'] is not None:
+            label = reaction['Emoji']
+        elif reaction['Custom Emoji ID'] is not None:
+            label = f"[custom:{reaction['Custom Emoji ID']}]"
+        else:
+            label = f"[{reaction['Type']}]"
+        emoji_string += label + " " + str(reaction['Count']) + " "
+    return emoji_string
+
+# Function to make nested columns Excel friendly (openpyxl cannot write lists)
+def to_excel_compatible(df):
+    df = df.copy()
+    if 'Reactions List' in df.columns:
+        df['Reactions List'] = df['Reactions List'].map(json.dumps)
+    return df
+
+# Function to collect the comments of a message as a list of dicts
+async def collect_comments(client, channel, message):
+    comments_list = []
+    async for comment_message in client.iter_messages(channel, reply_to=message.id):
+        comment_text = comment_message.text.replace("'", '"')
+
+        comment_media = 'True' if comment_message.media else 'False'
+
+        comment_reactions = parse_reactions(comment_message.reactions)
+
+        comment_date_time = comment_message.date.strftime('%Y-%m-%d %H:%M:%S')
+
+        comments_list.append({
+            'Type': 'comment',
+            'Comment Group': channel,
+            'Comment Author ID': comment_message.sender_id,
+            'Comment Content': comment_text,
+            'Comment Date': comment_date_time,
+            'Comment Message ID': comment_message.id,
+            'Comment Author': comment_message.post_author,
+            'Comment Views': comment_message.views,
+            'Comment Reactions': format_reactions(comment_reactions),
+            'Comment Reactions List': comment_reactions,
+            'Comment Shares': comment_message.forwards,
+            'Comment Media': comment_media,
+            'Comment Url': f'https://t.me/{channel}/{message.id}?comment={comment_message.id}'.replace('@', ''),
+        })
+    return comments_list
+
+# Function to get the channel a message was forwarded from: '@username', the channel ID or the sender name
+def forwarded_from(message):
+    forward = getattr(message, 'forward', None)
+    if forward is None:
+        return None
+    chat = getattr(forward, 'chat', None)
+    if getattr(chat, 'username', None):
+        return f'@{chat.username}'
+    if getattr(forward, 'chat_id', None) is not None:
+        return str(forward.chat_id)
+    return getattr(forward, 'from_name', None)
+
+# Function to build the output row of a message
+def build_row(channel, message, comments_list):
+    media = 'True' if message.media else 'False'
+
+    reactions = parse_reactions(message.reactions)
+
+    date_time = message.date.strftime('%Y-%m-%d %H:%M:%S')
+    edit_date = getattr(message, 'edit_date', None)
+    cleaned_content = remove_unsupported_characters(message.text)
+    cleaned_comments_list = remove_unsupported_characters(json.dumps(comments_list))
+
+    return {
+        'Type': 'text',
+        'Group': channel,
+        'Author ID': message.sender_id,
+        'Content': cleaned_content,
+        'Date': date_time,
+        'Message ID': message.id,
+        'Author': message.post_author,
+        'Views': message.views,
+        'Reactions': format_reactions(reactions),
+        'Reactions List': reactions,
+        'Shares': message.forwards,
+        'Media': media,
+        'Url': f'https://t.me/{channel}/{message.id}'.replace('@', ''),
+        'Comments List': cleaned_comments_list,
+        'Forwarded From': forwarded_from(message),
+        'Edit Date': edit_date.strftime('%Y-%m-%d %H:%M:%S') if edit_date else None,
+    }
+
+# Function to save a DataFrame as Parquet or Excel, returns the file name
+def save_dataframe(df, filename_base, file_format, metrics=None, channel=None):
+    if file_format == 'parquet':
+        filename = f'{filename_base}.parquet'
+        df.to_parquet(filename, index=False)
+    elif file_format == 'excel':
+        filename = f'{filename_base}.xlsx'
+        to_excel_compatible(df).to_excel(filename, index=False, engine='openpyxl')
+    else:
+        return None
+    if metrics is not None:
+        metrics.record_file(filename, channel)
+    return filename
+
+async def scrape(file_format, channels, date_min, date_max, key_search, start_time=None,
+                 progress_interval=5, metrics_file=None, download_media=False, media_folder='media',
+                 media_concurrency=4, username=username, api_id=api_id, api_hash=api_hash, min_channel_seconds=60,
+                 client_factory=None):
+    # Scrapes every channel in turn on a single session and saves FINAL_<channel>_with_<n> files in the
+    # working directory. Each channel takes at least min_channel_seconds, to be gentle with the API.
+    # Normalize File variable to avoid issues
+    file_format = re.sub(r'[^a-z]', '', file_format.lower())  # Converts to lowercase and removes non-alphabetic characters
+    client_factory = client_factory or TelegramClient
+    print(f'Username: {username}')
+    print(f'API ID: {api_id}')
+    print(f'Channels: {channels}')
+    print(f'File format: {file_format}')
+
+    metrics = ScrapeMetrics()
+    reporter = ProgressReporter(metrics, interval=progress_interval, exporter=make_exporter(metrics_file))
+    metrics.watch_flood_waits()
+
+    try:
+        # Scraping process
+        for channel in channels:
+            print(f'\n\n{"-" * 50}\n#Scraping {channel}...\n{"-" * 50}\n')
+
+            loop_start_time = time.time()
+            metrics.start_channel(channel, date_min, date_max)
+            data = []  # Reset data for each channel
+            t_index = 0  # Tracker for the number of messages processed
+            try:
+                c_index = 0
+                async with client_factory(username, api_id, api_hash) as client:
+                    metrics.instrument(client)
+                    downloader = None
+                    if download_media:
+                        downloader = MediaDownloader(client, media_folder, concurrency=media_concurrency)
+                        downloader.start()
+                    async for message in client.iter_messages(channel, search=key_search):
+                        try:
+                            if date_min <= message.date <= date_max:
+
+                                # Process comments of the message
+                                try:
+                                    comments_list = await collect_comments(client, channel, message)
+                                except Exception as e:
+                                    comments_list = []
+                                    print(f'Error processing comments: {e}')
+
+                                # Process the main message
+                                data.append(build_row(channel, message, comments_list))
+
+                                # Queue the media download, the row is filled in when the file is stored
+                                if downloader:
+                                    downloader.submit(message, data[-1])
+
+                                c_index += 1
+                                t_index += 1
+
+                                # Report progress (throttled to one line every progress_interval seconds)
+                                metrics.record_message(message.date, len(comments_list))
+                                reporter.update()
+
+                            elif message.date < date_min:
+                                break
+
+                        except Exception as e:
+                            print(f'Error processing message: {e}')
+
+                    if downloader:
+                        print(f'Waiting for {downloader.queue.qsize()} queued media downloads...')
+                        await downloader.close()
+                        metrics.record_bytes(downloader.bytes_downloaded)
+
+                print(f'\n\n##### {channel} was ok with {c_index:05} posts #####\n\n')
+
+                df = pd.DataFrame(data)
+                save_dataframe(df, f'complete_{channel}_in_{t_index}', file_format, metrics)
+                # files.download(partial_filename)
+
+            except Exception as e:
+                print(f'{channel} error: {e}')
+
+            metrics.finish_channel()
+            loop_end_time = time.time()
+            loop_duration = loop_end_time - loop_start_time
+
+            if loop_duration < min_channel_seconds:
+                await asyncio.sleep(min_channel_seconds - loop_duration)
+
+            print(f'\n{"-" * 50}\n#Concluded! #{t_index:05} posts were scraped!\n{"-" * 50}\n\n\n\n')
+            df = pd.DataFrame(data)
+            save_dataframe(df, f'FINAL_{channel}_with_{t_index:05}', file_format, metrics)
+
+            reporter.update(force=True)
+    finally:
+        metrics.stop_watching_flood_waits()
+    return metrics
+
+# Function to fetch comments on the channel's session, moving to another session if that one gets throttled
+async def collect_comments_on_pool(pool, session, channel, message):
+    try:
+        return await collect_comments(session.client, channel, message)
+    except FloodWaitError as e:
+        pool.report_flood_wait(session, e.seconds)
+    tried = {session.name}
+    while True:
+        other = await pool.acquire(exclude=tried, shared=True)
+        try:
+            return await collect_comments(other.client, channel, message)
+        except FloodWaitError as e:
+            pool.report_flood_wait(other, e.seconds)
+            tried.add(other.name)
+            if len(tried) >= len(pool.sessions):
+                tried = set()  # Every session was throttled once, wait for the first one to be free again
+        finally:
+            pool.release(other)
+
+# Function to scrape one channel on the session pool, resuming on another session after a flood wait
+async def scrape_channel_on_pool(pool, channel, file_format, date_min, date_max, key_search, metrics, reporter,
+                                 downloader=None):
+    data = []
+    offset_id = 0  # Last message processed, so a reassigned channel continues where it stopped
+    tried = set()
+    # Every channel runs in its own task, API calls and flood waits made from it are charged to the channel
+    metrics.use_channel(channel)
+    while True:
+        session = await pool.acquire(exclude=tried)
+        if channel not in metrics.channels:
+            metrics.start_channel(channel, date_min, date_max)
+        print(f'#Scraping {channel} on session {session.name}...')
+        try:
+            async for message in session.client.iter_messages(channel, search=key_search, offset_id=offset_id):
+                if date_min <= message.date <= date_max:
+                    try:
+                        comments_list = await collect_comments_on_pool(pool, session, channel, message)
+                    except Exception as e:
+                        comments_list = []
+                        print(f'Error processing comments: {e}')
+
+                    try:
+                        data.append(build_row(channel, message, comments_list))
+                        if downloader:
+                            downloader.submit(message, data[-1], client=session.client, group=channel)
+                        metrics.record_message(message.date, len(comments_list), channel)
+                        reporter.update()
+                    except Exception as e:
+                        print(f'Error processing message: {e}')
+
+                elif message.date < date_min:
+                    break
+                offset_id = message.id
+            break
+        except FloodWaitError as e:
+            pool.report_flood_wait(session, e.seconds)
+            tried = {session.name}
+        except Exception as e:
+            print(f'{channel} error: {e}')
+            break
+        finally:
+            pool.release(session)
+
+    if downloader:
+        # The rows are only complete once their media is stored
+        metrics.record_bytes(await downloader.drain(channel), channel)
+    metrics.finish_channel(channel)
+    print(f'#Concluded {channel}! #{len(data):05} posts were scraped!')
+    save_dataframe(pd.DataFrame(data), f'FINAL_{channel}_with_{len(data):05}', file_format, metrics, channel)
+    reporter.update(force=True)
+    return data
+
+async def scrape_with_sessions(file_format, channels, date_min, date_max, key_search, sessions,
+                               progress_interval=5, metrics_file=None, download_media=False, media_folder='media',
+                               media_concurrency=4, api_id=api_id, api_hash=api_hash, client_factory=None):
+    # Same output as scrape(), but channels (and comment fetches) are spread over a pool of sessions
+    # (one per Telegram account), scheduled by their recent flood waits.
+    file_format = re.sub(r'[^a-z]', '', file_format.lower())
+    print(f'Sessions: {sessions}')
+    print(f'Channels: {channels}')
+    print(f'File format: {file_format}')
+
+    metrics = ScrapeMetrics()
+    reporter = ProgressReporter(metrics, interval=progress_interval, exporter=make_exporter(metrics_file))
+    pool_options = {'client_factory': client_factory} if client_factory else {}
+    # Flood waits are reported from the task of the channel that got them, see metrics.use_channel()
+    pool = SessionPool(sessions, api_id, api_hash,
+                       on_flood_wait=lambda session, seconds: metrics.record_flood_wait(seconds), **pool_options)
+
+    async with pool:
+        for session in pool.sessions:
+            metrics.instrument(session.client)
+        # One downloader for every session, so media seen by several sessions is stored once; each message is
+        # downloaded with the client of the session that fetched it
+        downloader = None
+        if download_media:
+            downloader = MediaDownloader(pool.sessions[0].client, media_folder, concurrency=media_concurrency)
+            downloader.start()
+
+        # As many channels run at once as there are sessions; the pool decides which session serves which one
+        await asyncio.gather(*[
+            scrape_channel_on_pool(pool, channel, file_format, date_min, date_max, key_search, metrics, reporter,
+                                   downloader)
+            for channel in channels
+        ])
+
+        if downloader:
+            await downloader.close()
+
+        for session in pool.snapshot():
+            print(f"Session {session['session']}: {session['jobs']} jobs, {session['flood_waits']} flood waits "
+                  f"({session['flood_wait_seconds']:.0f}s)")
+
+    reporter.update(force=True)
+    return metrics
@@ -0,0 +1,208 @@
+"""
+Session Pool for Multi-Account Scraping
+---------------------------------------
+Telegram applies flood limits per account, so a single session caps how fast scraper.py can go.
+SessionPool keeps several logged-in sessions and hands them out based on their recent flood-wait history.
+
+- Each session gets its own telethon logger, so the flood waits telethon sleeps through are attributed
+  to the right session (see base_logger in TelegramClient).
+- Flood waits longer than flood_sleep_threshold are raised by telethon; report_flood_wait() then marks the
+  session as throttled until the wait is over and the caller retries the work on another session.
+- acquire() picks the available session with the lowest decayed flood-wait score and the fewest active jobs,
+  and waits when every session is throttled or busy.
+"""
+
+import asyncio
+import logging
+import time
+
+from telethon.sync import TelegramClient
+
+
+class SessionState:
+
+    # One account of the pool: its client, how many jobs use it, and its flood-wait history.
+
+    def __init__(self, name, client, logger):
+        self.name = name
+        self.client = client
+        self.logger = logger
+        self.active = 0
+        self.jobs = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+        self.flood_history = []  # (timestamp, seconds) of the recent flood waits, for the score only
+        self.throttled_until = 0.0
+
+    def flood_score(self, now, half_life):
+
+        # Sum of recent flood-wait seconds, each halved every `half_life` seconds.
+
+        return sum(seconds * 0.5 ** ((now - timestamp) / half_life) for timestamp, seconds in self.flood_history)
+
+    def snapshot(self, now, half_life):
+        return {
+            'session': self.name,
+            'active': self.active,
+            'jobs': self.jobs,
+            'flood_waits': self.flood_waits,
+            'flood_wait_seconds': self.flood_wait_seconds,
+            'flood_score': self.flood_score(now, half_life),
+            'throttled_for': max(0.0, self.throttled_until - now),
+        }
+
+
+class _SessionFloodLogHandler(logging.Handler):
+
+    # Reads telethon's "Sleeping for %ds (%s) on %s flood wait" records of one session.
+
+    def __init__(self, pool, state):
+        super().__init__(logging.INFO)
+        self.pool = pool
+        self.state = state
+
+    def emit(self, record):
+        if isinstance(record.msg, str) and record.msg.endswith('flood wait') and len(record.args or ()) >= 2:
+            self.pool.report_flood_wait(self.state, float(record.args[1]), slept=True)
+
+
+class SessionPool:
+
+    # Pool of Telegram sessions with flood-wait aware scheduling.
+    #
+    # Parameters:
+    # sessions (list of str): Session names (one .session file per account).
+    # api_id, api_hash: Telegram API credentials, shared by every session.
+    # client_factory (callable): Builds a client like TelegramClient(session, api_id, api_hash, **kwargs).
+    # flood_sleep_threshold (int): Flood waits up to this many seconds are slept through by telethon,
+    #                              longer ones are raised so the work can move to another session.
+    # half_life (float): Seconds after which a past flood wait counts half in the session score.
+    # max_active (int): Jobs a session runs at the same time when acquired exclusively.
+    # on_flood_wait (callable): Optional callback(session_name, seconds) for metrics.
+    #
+    # Usage:
+    # async with SessionPool(['account_a', 'account_b'], api_id, api_hash) as pool:
+    #     session = await pool.acquire()
+    #     try:
+    #         ... session.client.iter_messages(...) ...
+    #     except FloodWaitError as e:
+    #         pool.report_flood_wait(session, e.seconds)  # then retry with another acquire()
+    #     finally:
+    #         pool.release(session)
+
+    def __init__(self, sessions, api_id, api_hash, client_factory=TelegramClient, flood_sleep_threshold=10,
+                 half_life=600, max_active=1, on_flood_wait=None):
+        if not sessions:
+            raise ValueError('SessionPool needs at least one session')
+        self.session_names = list(dict.fromkeys(sessions))
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.client_factory = client_factory
+        self.flood_sleep_threshold = flood_sleep_threshold
+        self.half_life = half_life
+        self.max_active = max_active
+        self.on_flood_wait = on_flood_wait
+        self.sessions = []
+        self._changed = None
+
+    async def __aenter__(self):
+        self._changed = asyncio.Event()
+        try:
+            for name in self.session_names:
+                logger = logging.getLogger(f'telegramscrap.sessions.{name}')
+                client = self.client_factory(name, self.api_id, self.api_hash,
+                                             flood_sleep_threshold=self.flood_sleep_threshold, base_logger=logger)
+                await client.__aenter__()
+                state = SessionState(name, client, logger)
+                handler = _SessionFloodLogHandler(self, state)
+                flood_logger = logger.getChild('client.users')
+                flood_logger.addHandler(handler)
+                if not flood_logger.isEnabledFor(logging.INFO):
+                    flood_logger.setLevel(logging.INFO)
+                self.sessions.append(state)
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for state in self.sessions:
+            flood_logger = state.logger.getChild('client.users')
+            for handler in list(flood_logger.handlers):
+                if isinstance(handler, _SessionFloodLogHandler):
+                    flood_logger.removeHandler(handler)
+            await state.client.__aexit__(None, None, None)
+        self.sessions = []
+        return False
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _pick(self, now, exclude, shared):
+        candidates = [state for state in self.sessions if state.name not in exclude] or self.sessions
+        available = [state for state in candidates
+                     if state.throttled_until <= now and (shared or state.active < self.max_active)]
+        if not available:
+            return None, min((state.throttled_until for state in candidates if state.throttled_until > now), default=None)
+        best = min(available, key=lambda state: (state.flood_score(now, self.half_life), state.active, state.jobs))
+        return best, None
+
+    async def acquire(self, exclude=(), shared=False):
+
+        # Returns the best session for a new job, waiting while every candidate is throttled or busy.
+
+        # Parameters:
+        # exclude (iterable of str): Session names to avoid (e.g. the one that was just throttled).
+        #                            Ignored when it would leave no session at all.
+        # shared (bool): Accept a session that is already busy. Used for short jobs like comment fetches,
+        #                which must not wait for a whole channel to finish.
+
+        # Returns:
+        # SessionState: The acquired session. Call release() when done.
+
+        exclude = set(exclude)
+        while True:
+            now = time.monotonic()
+            state, wake_at = self._pick(now, exclude, shared)
+            if state is not None:
+                state.active += 1
+                state.jobs += 1
+                return state
+            timeout = max(0.0, wake_at - now) if wake_at is not None else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, state):
+        state.active -= 1
+        self._notify()
+
+    def report_flood_wait(self, state, seconds, slept=False):
+
+        # Records a flood wait of `seconds` on a session.
+
+        # Parameters:
+        # state (SessionState): The session that got the flood wait.
+        # seconds (float): Wait requested by Telegram.
+        # slept (bool): True when telethon already slept through it; otherwise the session is throttled
+        #               until the wait is over and new jobs go to other sessions.
+
+        now = time.monotonic()
+        state.flood_waits += 1
+        state.flood_wait_seconds += seconds
+        state.flood_history.append((now, seconds))
+        # Forget flood waits that no longer weigh anything in the score; the totals above are kept
+        horizon = now - 10 * self.half_life
+        state.flood_history = [(timestamp, wait) for timestamp, wait in state.flood_history if timestamp >= horizon]
+        if not slept:
+            state.throttled_until = max(state.throttled_until, now + seconds)
+            print(f'Session {state.name} throttled for {seconds:.0f}s, moving work to other sessions')
+        if self.on_flood_wait is not None:
+            self.on_flood_wait(state.name, seconds)
+        self._notify()
+
+    def snapshot(self):
+        now = time.monotonic()
+        return [state.snapshot(now, self.half_life) for state in self.sessions]
@@ -2,6 +2,7 @@ import pandas as pd
 from tqdm import tqdm
 import os
 import re
+from .corpus import read_corpus
 
 def extract_telegram_links(content):
     
@@ -63,7 +64,7 @@ def process_file_for_telegram_links(folder_path, input_filename, output_filename
 
     # Load the Parquet file with progress bar
     print(f"Loading {file_path}...")
-    df = pd.read_parquet(file_path)
+    df = read_corpus(file_path, columns=['Content'])
 
     # Extract Telegram links from the 'Content' column with progress bar
     print("Extracting Telegram links...")
@@ -92,10 +93,3 @@ def process_file_for_telegram_links(folder_path, input_filename, output_filename
     link_counts.to_excel(output_path, index=False)
 
     print(f"Analysis completed and saved to '{output_path}'")
-
-
-# Usage
-folder_path = r'C:\Users\Public\PyCharmProjects\Data_Conspira' # Example
-input_filename = "unified_data_telegram.parquet" # Example
-output_filename = 'telegram_links.xlsx' # Example
-process_file_for_telegram_links(folder_path, input_filename, output_filename)
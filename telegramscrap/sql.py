@@ -0,0 +1,204 @@
+"""
+SQL Queries over the Scraped Corpus
+-----------------------------------
+Registers the scraped Parquet files as views of an embedded DuckDB database, so new questions can be
+answered with one SQL query instead of another pandas script that loads the whole corpus into RAM.
+DuckDB scans the files in parallel, pushes filters and column selections down into the Parquet reader
+and spills to disk when an aggregation does not fit in memory.
+
+Views:
+- posts: one row per post, from unified_data_telegram.parquet or, if it does not exist yet, from the
+  FINAL_*.parquet files and LIVE_*.parquet partitions (normalized and deduplicated like combine_parquet_files does).
+- comments: one row per comment, from comments.parquet (written by combine_parquet_files) if there is one,
+  otherwise unnested from the 'Comments List' JSON of the posts.
+- links: one row per URL found in a post, with its domain and the normalized t.me link (if any).
+- monthly: posts, comments, views and shares per group and month.
+
+Example:
+python -m telegramscrap query --folder data "SELECT domain, count(*) AS n FROM links GROUP BY domain ORDER BY n DESC LIMIT 10"
+"""
+
+import glob
+import os
+
+from .filenames import COMMENTS_FILENAME, UNIFIED_FILENAME
+
+FINAL_PATTERN = 'FINAL_*.parquet'
+LIVE_PATTERN = 'LIVE_*.parquet'
+
+# Structure of the 'Comments List' JSON written by scraper.collect_comments
+COMMENT_STRUCTURE = """[{
+    "Type": "VARCHAR",
+    "Comment Group": "VARCHAR",
+    "Comment Author ID": "BIGINT",
+    "Comment Content": "VARCHAR",
+    "Comment Date": "VARCHAR",
+    "Comment Message ID": "BIGINT",
+    "Comment Author": "VARCHAR",
+    "Comment Views": "BIGINT",
+    "Comment Reactions": "VARCHAR",
+    "Comment Reactions List": "JSON",
+    "Comment Shares": "BIGINT",
+    "Comment Media": "VARCHAR",
+    "Comment Url": "VARCHAR"
+}]"""
+
+URL_PATTERN = r'http[s]?://\S+|www\.\S+'
+
+
+def sql_string(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def parquet_source(paths):
+    return f"read_parquet([{', '.join(sql_string(path) for path in paths)}], union_by_name = true)"
+
+
+def find_corpus_files(folder, source='auto'):
+
+    # Finds the Parquet files the posts view is built on.
+
+    # Parameters:
+    # folder (str): Folder with the unified file and/or the FINAL_*.parquet files.
+    # source (str): 'unified', 'final' or 'auto' (the unified file if it exists, otherwise the FINAL files).
+
+    # Returns:
+    # tuple: (source, list of paths), source being 'unified' or 'final'.
+
+    unified = os.path.join(folder, UNIFIED_FILENAME)
+    if source == 'unified' or (source == 'auto' and os.path.exists(unified)):
+        if not os.path.exists(unified):
+            raise FileNotFoundError(unified)
+        return 'unified', [unified]
+    # Partitions written by the live daemon count as scraped files too
+    final_files = sorted(glob.glob(os.path.join(glob.escape(folder), FINAL_PATTERN))
+                         + glob.glob(os.path.join(glob.escape(folder), LIVE_PATTERN)))
+    if not final_files:
+        raise FileNotFoundError(f"No {UNIFIED_FILENAME} or {FINAL_PATTERN} files in {folder}")
+    return 'final', final_files
+
+
+def connect(folder='.', source='auto', comments_filename=COMMENTS_FILENAME, database=':memory:', threads=None,
+            memory_limit=None):
+
+    # Opens a DuckDB connection with the posts, comments, links and monthly views registered.
+
+    # Parameters:
+    # folder (str): Folder with the unified file and/or the FINAL_*.parquet files.
+    # source (str): 'unified', 'final' or 'auto', see find_corpus_files.
+    # comments_filename (str): Comments table in folder, used for the comments view if it exists.
+    # database (str): DuckDB database file, in memory by default (views only reference the Parquet files).
+    # threads (int): Threads DuckDB may use (default: all cores).
+    # memory_limit (str): Memory limit like '4GB', DuckDB spills to disk beyond it.
+
+    # Returns:
+    # duckdb.DuckDBPyConnection: The connection.
+
+    # Example:
+    # con = connect(r'C:\Users\Public\PyCharmProjects\Data_Conspira')
+    # con.sql("SELECT * FROM monthly WHERE \"Group\" = '@Channel'").df()
+
+    # DuckDB is only needed for queries, so it is not imported with the package
+    import duckdb
+
+    source, paths = find_corpus_files(folder, source)
+    con = duckdb.connect(database)
+    if threads:
+        con.execute(f'SET threads = {int(threads)}')
+    if memory_limit:
+        con.execute(f'SET memory_limit = {sql_string(memory_limit)}')
+
+    columns = {row[0] for row in con.sql(f'DESCRIBE SELECT * FROM {parquet_source(paths)}').fetchall()}
+    replacements = [
+        """CASE WHEN starts_with("Group", '@') THEN "Group" ELSE '@' || "Group" END AS "Group\"""",
+        'CAST("Date" AS TIMESTAMP) AS "Date"',
+        'CAST("Message ID" AS VARCHAR) AS "Message ID"',
+    ]
+    if 'Media' in columns:
+        # FINAL files store 'True'/'False' strings, the unified file booleans
+        replacements.append("""lower(CAST("Media" AS VARCHAR)) = 'true' AS "Media\"""")
+    extra = ''
+    if 'Comments' not in columns and 'Comments List' in columns:
+        extra = """, coalesce(json_array_length("Comments List"), 0) AS "Comments\""""
+    posts_sql = f'SELECT * REPLACE ({", ".join(replacements)}){extra} FROM {parquet_source(paths)}'
+    if source == 'final':
+        # Same deduplication as combine_parquet_files, keeping the latest edit of a post
+        order = ' ORDER BY "Edit Date" DESC NULLS LAST' if 'Edit Date' in columns else ''
+        posts_sql = (f'SELECT * FROM ({posts_sql}) '
+                     f'QUALIFY row_number() OVER (PARTITION BY "Group", "Message ID"{order}) = 1')
+    con.execute(f'CREATE VIEW posts AS {posts_sql}')
+
+    comments_path = os.path.join(folder, comments_filename) if comments_filename else None
+    if comments_path and os.path.exists(comments_path):
+        con.execute(f'CREATE VIEW comments AS SELECT * FROM {parquet_source([comments_path])}')
+    else:
+        con.execute(f"""
+            CREATE VIEW comments AS
+            SELECT * REPLACE (CAST("Comment Date" AS TIMESTAMP) AS "Comment Date",
+                              CAST("Comment Message ID" AS VARCHAR) AS "Comment Message ID",
+                              lower("Comment Media") = 'true' AS "Comment Media")
+            FROM (
+                SELECT "Group" AS "Post Group", "Message ID" AS "Post Message ID",
+                       unnest(from_json("Comments List", {sql_string(COMMENT_STRUCTURE)}), recursive := true)
+                FROM posts
+                WHERE "Comments List" IS NOT NULL AND "Comments List" <> '[]'
+            )
+        """)
+
+    con.execute(f"""
+        CREATE VIEW links AS
+        SELECT "Group", "Message ID", "Date", url,
+               lower(regexp_extract(url, '^(?:https?://)?([^/?#]+)', 1)) AS domain,
+               nullif(regexp_extract(url, '^(https?://t\\.me/[\\w+]+)', 1), '') AS telegram_link
+        FROM (
+            SELECT "Group", "Message ID", "Date", unnest(regexp_extract_all("Content", {sql_string(URL_PATTERN)})) AS url
+            FROM posts
+        )
+    """)
+
+    con.execute("""
+        CREATE VIEW monthly AS
+        SELECT "Group", strftime("Date", '%Y-%m') AS "Month",
+               count(*) AS "Posts",
+               CAST(sum("Comments") AS BIGINT) AS "Comments",
+               count(*) + CAST(sum("Comments") AS BIGINT) AS "Total",
+               CAST(sum("Views") AS BIGINT) AS "Views",
+               CAST(sum("Shares") AS BIGINT) AS "Shares"
+        FROM posts
+        GROUP BY ALL
+    """)
+    return con
+
+
+def query(sql, folder='.', **kwargs):
+
+    # Runs one SQL query over the views of connect() and returns the result as a DataFrame.
+
+    # Example:
+    # query('SELECT "Group", sum("Posts") FROM monthly GROUP BY ALL', folder=r'C:\Users\Public\PyCharmProjects\Data_Conspira')
+
+    con = connect(folder, **kwargs)
+    try:
+        return con.sql(sql).df()
+    finally:
+        con.close()
+
+
+def export_query(sql, output_path, folder='.', **kwargs):
+
+    # Runs one SQL query and writes the result to output_path (.parquet, .csv or .xlsx).
+    # Parquet and CSV are written by DuckDB directly, without going through pandas.
+
+    con = connect(folder, **kwargs)
+    try:
+        extension = os.path.splitext(output_path)[1].lower()
+        if extension in ('.parquet', '.csv'):
+            file_format = 'PARQUET' if extension == '.parquet' else 'CSV, HEADER'
+            con.execute(f'COPY ({sql}) TO {sql_string(output_path)} (FORMAT {file_format})')
+        elif extension == '.xlsx':
+            con.sql(sql).df().to_excel(output_path, index=False, engine='openpyxl')
+        else:
+            raise ValueError(f"Unsupported output format: {output_path}")
+    finally:
+        con.close()
+    print(f"Query result saved at: {output_path}")
@@ -0,0 +1,165 @@
+# --- FULL SETUP INSTRUCTIONS FOR WINDOWS USERS ---
+# 1. Open PowerShell as Administrator and allow script execution:
+#    Set-ExecutionPolicy -ExecutionPolicy RemoteSigned -Scope CurrentUser
+#    (Type 'Y' and press Enter if prompted)
+#
+# 2. Create a virtual environment (in your project folder):
+#    python -m venv venv
+#
+# 3. Activate the virtual environment:
+#    .\venv\Scripts\Activate
+#
+# 4. Upgrade pip and install required Python packages:
+#    pip install --upgrade pip setuptools wheel
+#    pip install pandas
+#    pip install telethon openpyxl pyarrow fastparquet scikit-learn
+#    pip install hdbscan
+#    pip install bertopic
+#
+# 5. If you get an error about building hdbscan:
+#    - Download and install Microsoft C++ Build Tools from:
+#      https://visualstudio.microsoft.com/visual-cpp-build-tools/
+#    - During installation, select "Desktop development with C++" workload (default options are fine)
+#    - Restart your computer after installation
+#    - Then try installing hdbscan and bertopic again
+# -----------------------------------------------
+
+import os
+import re
+import time
+from collections import Counter
+
+from .corpus import read_corpus
+
+
+# --- REMOVE URLS FROM TEXTS ---
+def remove_urls(text):
+    return re.sub(r'http[s]?://\S+|www\.\S+', '', text)
+
+
+def run_topic_modelling(folder_path, input_filename, sample_size=10000, min_cluster_size=50, output_folder=None,
+                        visualize=False):
+
+    # Fits a BERTopic model on the 'Content' column and saves the topics and the topic of each document.
+
+    # Parameters:
+    # folder_path (str): The path to the folder containing the Parquet file.
+    # input_filename (str): The name of the input Parquet file.
+    # sample_size (int): Only the first sample_size documents are used (for testing on large corpora).
+    # min_cluster_size (int): HDBSCAN min_cluster_size. Higher values give fewer, broader topics (try 30, 50 or more).
+    # output_folder (str): Where topics.csv and documents_with_topics.csv are saved, defaults to folder_path.
+    # visualize (bool): Open the interactive BERTopic visualizations in the browser.
+
+    # Returns:
+    # BERTopic: The fitted topic model.
+
+    # Example:
+    # run_topic_modelling(
+    #     folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira',
+    #     input_filename='korpus.parquet',
+    #     sample_size=10000,
+    #     min_cluster_size=50
+    # )
+
+    # bertopic, hdbscan and scikit-learn take seconds to import, so they are only loaded when topics are modelled
+    import numpy as np
+    from bertopic import BERTopic
+    from hdbscan import HDBSCAN
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    output_folder = output_folder or folder_path
+
+    # Load your parquet file
+    print("Reading parquet file...")
+    start = time.time()
+    df = read_corpus(os.path.join(folder_path, input_filename))
+    print(f"File loaded in {time.time() - start:.2f} seconds")
+
+    print("Columns:", df.columns)
+    documents = df['Content'].astype(str).apply(remove_urls).tolist()
+
+    # For testing: only use a sample of the data (e.g. first 1000 messages)
+    if len(documents) > sample_size:
+        print(f"Using only the first {sample_size} documents for testing.")
+        documents = documents[:sample_size]
+    print(f"Loaded documents: {len(documents)}")
+
+    # Optionally, customize the vectorizer
+    print("Initializing vectorizer...")
+    vectorizer_model = CountVectorizer(stop_words="english")
+
+    # --- REDUCE NUMBER OF TOPICS: Use HDBSCAN with higher min_cluster_size ---
+    cluster_model = HDBSCAN(min_cluster_size=min_cluster_size)
+
+    # Create and fit BERTopic model
+    print("Starting BERTopic modeling...")
+    start = time.time()
+    topic_model = BERTopic(vectorizer_model=vectorizer_model, hdbscan_model=cluster_model)
+    topics, probs = topic_model.fit_transform(documents)
+    print(f"BERTopic finished after {time.time() - start:.2f} seconds")
+
+    # View topics (prints a summary table)
+    print("Topic overview:")
+    print(topic_model.get_topic_info())
+
+    # Save topics to a CSV file for later analysis
+    # This file contains the topic number, frequency, and top words for each topic
+    topic_model.get_topic_info().to_csv(os.path.join(output_folder, "topics.csv"), index=False)
+
+    # Save topic assignment for each document (so you know which message got which topic)
+    df_sample = df.iloc[:len(documents)].copy()
+    df_sample['topic'] = topics
+    df_sample.to_csv(os.path.join(output_folder, "documents_with_topics.csv"), index=False)
+
+    # Show keywords for each topic (prints the top words for each topic)
+    print("\nTop keywords per topic:")
+    for topic_num in topic_model.get_topic_freq().Topic:
+        print(f"Topic {topic_num}: {topic_model.get_topic(topic_num)}")
+
+    # Find the most common topic
+    most_common_topic, count = Counter(topics).most_common(1)[0]
+    print(f"\nMost common topic: {most_common_topic} with {count} documents")
+
+    # Show average topic probability (confidence)
+    avg_prob = np.nanmean([p.max() if p is not None else np.nan for p in probs])
+    print(f"\nAverage topic assignment confidence: {avg_prob:.3f}")
+
+    # List all topics sorted by frequency
+    topic_freq = topic_model.get_topic_freq()
+    print("\nTopics sorted by frequency:")
+    print(topic_freq.sort_values('Count', ascending=False))
+
+    # Show the top 5 topics and their top 5 keywords
+    print("\nTop 5 topics and their top 5 keywords:")
+    for topic_num in topic_freq.sort_values('Count', ascending=False).head(5)['Topic']:
+        words = [w for w, _ in topic_model.get_topic(topic_num)[:5]]
+        print(f"Topic {topic_num}: {', '.join(words)}")
+
+    if visualize:
+        show_topic_visualizations(topic_model, probs)
+
+    return topic_model
+
+
+def show_topic_visualizations(topic_model, probs):
+
+    # Opens the interactive BERTopic visualizations in the browser (these require plotly).
+
+    try:
+        print("\nOpening topic visualizations...")
+        topic_model.visualize_topics().show()
+        topic_model.visualize_barchart().show()
+        topic_model.visualize_heatmap().show()
+    except Exception as e:
+        print(f"Visualization error: {e}")
+
+    try:
+        print("\nOpening additional topic visualizations...")
+        # Visualize topic similarity as a hierarchical dendrogram
+        topic_model.visualize_hierarchy().show()
+        # Visualize the distribution of topics over documents
+        topic_model.visualize_distribution(probs[0]).show()  # For the first document
+        # Visualize term score decline for a topic (e.g., topic 0)
+        topic_model.visualize_term_rank(topic=0).show()
+    except Exception as e:
+        print(f"Additional visualization error: {e}")
@@ -0,0 +1,361 @@
+"""
+Windowed Trends
+---------------
+Counts messages, URLs, domains, keywords and topics per group and per day, week and month. It generalizes the
+url_trend_per_day chart of hyperlinks.py to every metric and to every group.
+
+- One pass over the corpus. The 'Date' column is binned to days once; combined files store it as a timestamp,
+  so nothing is parsed. Every metric is a sparse message x value matrix, and one sparse product with the
+  (group, day) indicator gives all daily counts. Weeks (starting on Monday) and months are summed from the days.
+- Metrics: 'messages', 'messages_with_urls', 'urls', 'domain' (URLs per domain), 'keyword' (messages
+  containing the keyword) and 'topic' (messages per BERTopic topic, from documents_with_topics.csv). URLs and
+  domains are those of hyperlinks.extract_urls and get_domain.
+- The daily counts are cached in <output>_daily.parquet. The next run only reads the messages from the last
+  cached day on; combine sorts the corpus by date, so Parquet statistics skip the older row groups. Those days
+  are then replaced in the cache. The cache stores the input path and a fingerprint of the older messages
+  (a hash of their 'Group', 'Message ID' and 'Edit Date'). It is rebuilt when the keywords or the input file
+  change, when older messages are added, removed or edited (e.g. combine picked up older files or newer
+  versions of old posts), or with rebuild=True.
+- Results are long tables <output>_day.csv, <output>_week.csv and <output>_month.csv with 'Metric', 'Value'
+  (the domain, keyword or topic, empty for the other metrics), 'Group', 'Period' (first day) and 'Count'.
+- Charts are a separate step: plot_trends, or the trend-charts command. It reads the saved tables, so the
+  counts never wait for plotly. PNG export goes through kaleido and is opt-in.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .hyperlinks import URL_PATTERN, get_domain
+from .keywords import keyword_matrix
+
+PERIODS = ['day', 'week', 'month']
+CACHE_METADATA_KEY = b'telegramscrap.trends'
+COLUMNS = ['Metric', 'Value', 'Group', 'Period', 'Count']
+
+
+def _days(dates):
+    # Arrow date column -> datetime64[D], NaT where missing; only string columns have to be parsed
+    if pa.types.is_timestamp(dates.type) or pa.types.is_date(dates.type):
+        return dates.to_numpy().astype('datetime64[D]')
+    parsed = pd.to_datetime(pd.Series(dates.to_numpy(zero_copy_only=False)), errors='coerce', utc=True)
+    return parsed.dt.tz_localize(None).to_numpy().astype('datetime64[D]')
+
+
+def url_matrices(texts):
+
+    # Finds the URLs of every message.
+
+    # Parameters:
+    # texts (pyarrow.Array or ChunkedArray): The message texts.
+
+    # Returns:
+    # tuple: (URLs per message as an int64 array, csr_matrix of URLs per message and domain, list of the domains).
+
+    from scipy import sparse
+
+    # Arrow finds the few messages with links first, only those go through Python's regex engine. URLs and
+    # domains are the ones of hyperlinks.extract_urls and get_domain, the domain is looked up once per unique URL
+    candidates = np.flatnonzero(pc.fill_null(pc.match_substring_regex(texts, r'https?://\S|www\.\S'), False)
+                                .to_numpy(zero_copy_only=False))
+    matches = pd.Series(texts.take(candidates).to_pylist(), index=candidates, dtype=object).str.findall(URL_PATTERN)
+    matches = matches.explode().dropna()
+    rows = matches.index.to_numpy(dtype=np.int64)
+    urls = np.bincount(rows, minlength=len(texts)).astype(np.int64)
+
+    url_codes, unique_urls = pd.factorize(matches)
+    domains = np.array([get_domain(url) or '' for url in unique_urls], dtype=object)[url_codes]
+    has_domain = domains != ''
+    codes, names = pd.factorize(domains[has_domain], sort=True)
+    matrix = sparse.csr_matrix((np.ones(len(codes), dtype=np.int64), (rows[has_domain], codes)),
+                               shape=(len(texts), len(names)))
+    matrix.sum_duplicates()
+    return urls, matrix, list(names)
+
+
+def daily_counts(table, keywords=(), content_col='Content', group_col='Group', date_col='Date'):
+
+    # Counts every metric per group and day in one pass.
+
+    # Parameters:
+    # table (pyarrow.Table): The corpus, at least the content, group and date columns.
+    # keywords (list of str): Keywords to count, matched like in keywords.py.
+    # content_col, group_col, date_col (str): Column names.
+
+    # Returns:
+    # DataFrame: 'Metric', 'Value', 'Group', 'Day' and 'Count', only non-zero counts.
+
+    from scipy import sparse
+
+    days = _days(table.column(date_col))
+    groups = table.column(group_col).to_numpy(zero_copy_only=False)
+    valid = ~np.isnat(days) & pd.notna(groups)
+    texts = table.column(content_col)
+    if not (pa.types.is_string(texts.type) or pa.types.is_large_string(texts.type)):
+        texts = texts.cast(pa.large_string())
+    texts = pc.fill_null(texts.filter(pa.array(valid)), '')
+    n = len(texts)
+
+    # Every metric adds columns to one message x column matrix, labelled by (metric, value)
+    urls, domains, domain_names = url_matrices(texts)
+    blocks = [
+        sparse.csr_matrix(np.ones((n, 1), dtype=np.int64)),
+        sparse.csr_matrix((urls > 0).astype(np.int64).reshape(-1, 1)),
+        sparse.csr_matrix(urls.reshape(-1, 1)),
+        domains,
+    ]
+    labels = [('messages', ''), ('messages_with_urls', ''), ('urls', '')] + [('domain', name) for name in domain_names]
+    if keywords:
+        blocks.append(keyword_matrix(texts, list(keywords)).astype(np.int64))
+        labels += [('keyword', keyword) for keyword in keywords]
+    matrix = sparse.hstack(blocks, format='csr')
+
+    group_codes, group_names = pd.factorize(groups[valid], sort=True)
+    day_codes, day_names = pd.factorize(days[valid], sort=True)
+    # One row per (group, day) with messages
+    keys, key_codes = np.unique(group_codes.astype(np.int64) * max(len(day_names), 1) + day_codes, return_inverse=True)
+    indicator = sparse.csr_matrix((np.ones(n, dtype=np.int64), (key_codes, np.arange(n))), shape=(len(keys), n))
+    counts = (indicator @ matrix).tocoo()
+
+    metrics, values = (np.asarray(column, dtype=object) for column in zip(*labels))
+    return pd.DataFrame({
+        'Metric': metrics[counts.col],
+        'Value': values[counts.col],
+        'Group': np.asarray(group_names, dtype=object)[keys[counts.row] // max(len(day_names), 1)],
+        'Day': np.asarray(day_names)[keys[counts.row] % max(len(day_names), 1)],
+        'Count': counts.data.astype(np.int64),
+    })
+
+
+def topic_daily_counts(topics_file_path, group_col='Group', date_col='Date', topic_col='topic'):
+
+    # Counts the messages of every topic per group and day, from the documents_with_topics.csv of topics.py.
+
+    # Parameters:
+    # topics_file_path (str): Path of the CSV file.
+    # group_col, date_col, topic_col (str): Column names.
+
+    # Returns:
+    # DataFrame: 'Metric' ('topic'), 'Value' (topic number), 'Group', 'Day' and 'Count'.
+
+    df = pd.read_csv(topics_file_path, usecols=[group_col, date_col, topic_col])
+    # A CSV has no timestamp type; the file only holds the modelled sample, so parsing it is cheap
+    dates = pd.to_datetime(df[date_col], format='ISO8601', errors='coerce', utc=True)
+    df['Day'] = dates.dt.tz_localize(None).dt.floor('D')
+    df = df.dropna(subset=[group_col, 'Day', topic_col])
+    counts = df.groupby([topic_col, group_col, 'Day']).size().rename('Count').reset_index()
+    return pd.DataFrame({
+        'Metric': 'topic',
+        'Value': counts[topic_col].astype(int).astype(str),
+        'Group': counts[group_col].to_numpy(),
+        'Day': counts['Day'].to_numpy().astype('datetime64[D]'),
+        'Count': counts['Count'].to_numpy(dtype=np.int64),
+    })
+
+
+def _fingerprint(table, mask):
+    # Order-independent hash of the identity and edit date of the masked messages; combine may reorder ties
+    older = table.filter(pa.array(mask)).to_pandas()
+    hashes = np.sort(pd.util.hash_pandas_object(older, index=False).to_numpy())
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+def _read_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return None, None
+    table = pq.read_table(cache_path)
+    metadata = (table.schema.metadata or {}).get(CACHE_METADATA_KEY)
+    if metadata is None:
+        return None, None
+    return table.to_pandas(), json.loads(metadata)
+
+
+def _write_cache(daily, metadata, cache_path):
+    table = pa.Table.from_pandas(daily, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), CACHE_METADATA_KEY: json.dumps(metadata)})
+    temporary = cache_path + '.tmp'
+    pq.write_table(table, temporary)
+    os.replace(temporary, cache_path)
+
+
+def update_daily_counts(input_file_path, cache_path, keywords=(), rebuild=False):
+
+    # Brings the cached daily counts up to date with the corpus, only counting the days that can have changed.
+
+    # Parameters:
+    # input_file_path (str): The corpus Parquet file.
+    # cache_path (str): The cache Parquet file, created if missing.
+    # keywords (list of str): Keywords to count; other keywords than the cached ones rebuild the cache.
+    #   Another input file or added, removed or edited messages before the cached days rebuild it as well.
+    # rebuild (bool): Count the whole corpus again.
+
+    # Returns:
+    # DataFrame: The daily counts of the whole corpus ('Metric', 'Value', 'Group', 'Day', 'Count').
+
+    keywords = list(keywords or [])
+    input_path = os.path.abspath(input_file_path)
+    columns = ['Content', 'Group', 'Date']
+    schema = pq.read_schema(input_file_path)
+    identity = pq.read_table(input_file_path, columns=[name for name in ['Date', 'Group', 'Message ID', 'Edit Date']
+                                                       if name in schema.names])
+    dates = identity.column('Date')
+    days = _days(dates)
+
+    cached, metadata = (None, None) if rebuild else _read_cache(cache_path)
+    since = None
+    if (metadata is not None and metadata['keywords'] == keywords and metadata.get('input') == input_path
+            and pa.types.is_timestamp(dates.type)):
+        since = np.datetime64(metadata['since'], 'D')
+        # Messages added, removed or edited before the last cached day (not only new ones) make the cache stale
+        if _fingerprint(identity, days < since) != metadata.get('fingerprint'):
+            print("Messages before the cached days changed, counting the whole corpus again.")
+            since = None
+
+    if since is None:
+        print(f"Counting {len(days)} messages...")
+        daily = daily_counts(pq.read_table(input_file_path, columns=columns), keywords)
+    else:
+        table = pq.read_table(input_file_path, columns=columns,
+                              filters=[('Date', '>=', pd.Timestamp(since).to_pydatetime())])
+        print(f"Counting {table.num_rows} messages from {since} on ({len(days) - table.num_rows} are cached)...")
+        cached['Day'] = cached['Day'].to_numpy().astype('datetime64[D]')
+        daily = pd.concat([cached[cached['Day'] < since], daily_counts(table, keywords)], ignore_index=True)
+
+    # The last day can still get messages, so the next run counts it again
+    newest = days[~np.isnat(days)].max() if (~np.isnat(days)).any() else np.datetime64('1970-01-01', 'D')
+    _write_cache(daily, {'keywords': keywords, 'input': input_path, 'since': str(newest),
+                         'fingerprint': _fingerprint(identity, days < newest)}, cache_path)
+    return daily
+
+
+def bin_counts(daily, period):
+
+    # Sums daily counts into days, weeks (starting on Monday) or months.
+
+    # Parameters:
+    # daily (DataFrame): Output of daily_counts.
+    # period (str): 'day', 'week' or 'month'.
+
+    # Returns:
+    # DataFrame: 'Metric', 'Value', 'Group', 'Period' (first day of the period) and 'Count'.
+
+    days = pd.to_datetime(daily['Day'])
+    if period == 'day':
+        starts = days
+    elif period == 'week':
+        starts = days - pd.to_timedelta(days.dt.dayofweek, unit='D')
+    elif period == 'month':
+        starts = days.dt.to_period('M').dt.start_time
+    else:
+        raise ValueError(f"Unknown period {period!r}, expected one of {PERIODS}")
+    counts = daily.assign(Period=starts).groupby(COLUMNS[:-1], sort=True)['Count'].sum()
+    return counts.reset_index()
+
+
+def create_trend_report(folder_path, input_filename, output_folder=None, keywords=None, topics_filename=None,
+                        output_filename_base='trends', rebuild=False):
+
+    # Counts messages, URLs, domains, keywords and topics per group and day, week and month, and saves them.
+
+    # Parameters:
+    # folder_path (str): The path to the folder containing the Parquet file.
+    # input_filename (str): The name of the input Parquet file.
+    # output_folder (str): Where results and the cache are saved, defaults to folder_path.
+    # keywords (list of str): Keywords to count per period.
+    # topics_filename (str): documents_with_topics.csv of topics.py in output_folder, counted if it exists.
+    # output_filename_base (str): Base name of the output files.
+    # rebuild (bool): Ignore the cache and count the whole corpus.
+
+    # Returns:
+    # dict: Period ('day', 'week', 'month') -> DataFrame of counts.
+
+    # Steps:
+    # 1. Bring the cached daily counts up to date, only counting the days since the last run.
+    # 2. Add the topic counts, if a topics file is given.
+    # 3. Sum the days into weeks and months.
+    # 4. Save <output>_day.csv, <output>_week.csv and <output>_month.csv.
+
+    # Example:
+    # create_trend_report(
+    #     folder_path=r'C:\Users\Public\PyCharmProjects\Data_Conspira',
+    #     input_filename='unified_data_telegram.parquet',
+    #     keywords=['Trump', 'Biden', 'Kamala']
+    # )
+
+    output_folder = output_folder or folder_path
+    input_file_path = os.path.join(folder_path, input_filename)
+    print(f"Loading {input_file_path}...")
+    daily = update_daily_counts(input_file_path, os.path.join(output_folder, f'{output_filename_base}_daily.parquet'),
+                                keywords, rebuild)
+
+    # Topics are modelled on a sample that changes with every run, so they are not cached
+    if topics_filename:
+        topics_file_path = os.path.join(output_folder, topics_filename)
+        if os.path.exists(topics_file_path):
+            daily = pd.concat([daily, topic_daily_counts(topics_file_path)], ignore_index=True)
+        else:
+            print(f"{topics_file_path} not found, topics are left out.")
+
+    results = {}
+    for period in PERIODS:
+        results[period] = bin_counts(daily, period)
+        output_path = os.path.join(output_folder, f'{output_filename_base}_{period}.csv')
+        results[period].to_csv(output_path, index=False)
+        print(f"{len(results[period])} rows saved at: {output_path}")
+    return results
+
+
+def plot_trends(folder_path, output_filename_base='trends', period='day', top_n=10, png=False):
+
+    # Renders line charts of saved trends: the totals of all groups, messages of the top groups, and the
+    # top domains, keywords and topics. Run it after create_trend_report, in its own process if needed.
+
+    # Parameters:
+    # folder_path (str): Folder of the <output>_<period>.csv files; the charts are saved there.
+    # output_filename_base (str): Base name used by create_trend_report.
+    # period (str): 'day', 'week' or 'month'.
+    # top_n (int): Number of groups and values per chart.
+    # png (bool): Also save static PNG charts (needs kaleido, much slower than HTML).
+
+    # Returns:
+    # list of str: Paths of the HTML charts.
+
+    # plotly is only needed for charts, so it is imported here and not when the module is loaded
+    import plotly.express as px
+
+    counts = pd.read_csv(os.path.join(folder_path, f'{output_filename_base}_{period}.csv'),
+                         keep_default_na=False, parse_dates=['Period'])
+    charts = []
+
+    def save(fig, name):
+        path = os.path.join(folder_path, f'{output_filename_base}_{period}_{name}.html')
+        fig.write_html(path)
+        charts.append(path)
+        if png:
+            fig.write_image(path[:-len('.html')] + '.png')
+        print(f"Saved: {os.path.basename(path)}")
+
+    totals = counts[counts['Value'] == ''].groupby(['Period', 'Metric'])['Count'].sum().reset_index()
+    if not totals.empty:
+        save(px.line(totals, x='Period', y='Count', color='Metric', title=f'Messages and URLs per {period}'), 'totals')
+
+    messages = counts[counts['Metric'] == 'messages']
+    top_groups = messages.groupby('Group')['Count'].sum().nlargest(top_n).index
+    if len(top_groups):
+        save(px.line(messages[messages['Group'].isin(top_groups)], x='Period', y='Count', color='Group',
+                     title=f'Messages per {period} of the {len(top_groups)} largest groups'), 'messages_by_group')
+
+    for metric in ('domain', 'keyword', 'topic'):
+        values = counts[counts['Metric'] == metric].groupby(['Period', 'Value'])['Count'].sum().reset_index()
+        if values.empty:
+            continue
+        top_values = values.groupby('Value')['Count'].sum().nlargest(top_n).index
+        save(px.line(values[values['Value'].isin(top_values)], x='Period', y='Count', color='Value',
+                     title=f'Top {len(top_values)} {metric}s per {period}'), metric)
+    return charts